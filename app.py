@@ -10,45 +10,31 @@ Author: ChatGPT (为用户定制)
 
 import sys
 import os
-import io
-import math
 import re
 import threading
+from collections import OrderedDict
 from functools import partial
 
-from PIL import Image, ImageDraw, ImageOps, ImageFont, ImageQt
-import qrcode
-from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H
+from PIL import Image, ImageDraw, ImageOps, ImageQt
 
-import barcode
-from barcode.writer import ImageWriter
+from qrlist.render import (hex_to_rgba, qr_matrix_cache, rasterize_qr_matrix, _rasterize_qr_reference,
+                           BARCODE_QUIET_ZONE_MODULES, build_barcode_modules, render_bar_pattern,
+                           _add_text_label, label_font_cache)
+from qrlist.pdf import StreamingPDFWriter
+from qrlist.progress import ProgressReporter
 
-from PySide6.QtCore import Qt, QThread, Signal, QSize
-from PySide6.QtGui import QPixmap, QColor, QIntValidator
+from PySide6.QtCore import Qt, QThread, Signal, QSize, QTimer, QAbstractListModel, QModelIndex
+from PySide6.QtGui import QPixmap, QColor
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QTextEdit, QFileDialog,
-    QTabWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QScrollArea,
+    QTabWidget, QVBoxLayout, QHBoxLayout,
     QComboBox, QSpinBox, QColorDialog, QCheckBox, QMessageBox, QGroupBox,
-    QFormLayout, QLineEdit, QProgressBar
+    QFormLayout, QLineEdit, QProgressBar, QListView
 )
 
 # -----------------------------
-# 辅助函数：颜色 / 图片转换
+# 辅助函数：图片转换
 # -----------------------------
-def hex_to_rgba(hex_color: str, alpha=255):
-    """将 '#RRGGBB' -> (R,G,B,A)"""
-    if not hex_color:
-        return (0, 0, 0, alpha)
-    s = hex_color.strip()
-    if s.startswith('#'):
-        s = s[1:]
-    if len(s) == 3:
-        s = ''.join([c*2 for c in s])
-    r = int(s[0:2], 16)
-    g = int(s[2:4], 16)
-    b = int(s[4:6], 16)
-    return (r, g, b, alpha)
-
 def pil_image_to_qpixmap(img: Image.Image):
     """PIL Image -> QPixmap"""
     if img.mode != "RGBA":
@@ -68,7 +54,8 @@ def generate_qr_pil(data: str,
                     module_color: str = "#000000",
                     back_color: str = "#FFFFFF",
                     outer_eye_color: str = None,
-                    inner_eye_color: str = None) -> Image.Image:
+                    inner_eye_color: str = None,
+                    renderer: str = "fast") -> Image.Image:
     """
     生成二维码 PIL Image
     - version: 1..40 (None 表示自动)
@@ -77,72 +64,19 @@ def generate_qr_pil(data: str,
     - padding_px: 内边距（像素）
     - module_color/back_color: hex str
     - outer_eye_color / inner_eye_color: hex str（可选）
+    - renderer: 'fast'（整块栅格化）或 'reference'（逐模块绘制，用于对比）
     """
-    # 错误修正映射
-    ec_map = {"L": ERROR_CORRECT_L, "M": ERROR_CORRECT_M, "Q": ERROR_CORRECT_Q, "H": ERROR_CORRECT_H}
-    ec = ec_map.get(error_correction.upper(), ERROR_CORRECT_M)
-
-    # 如果指定版本则不自动 fit，否则自动选择最小版本
-    qr = qrcode.QRCode(
-        version=version if version else None,
-        error_correction=ec,
-        box_size=1,
-        border=0
-    )
-    qr.add_data(data)
-    try:
-        qr.make(fit=(version is None))
-    except Exception as e:
-        # 如果版本不兼容，尝试自动模式
-        qr = qrcode.QRCode(error_correction=ec, box_size=1, border=0)
-        qr.add_data(data)
-        qr.make(fit=True)
-
-    matrix = qr.get_matrix()  # boolean matrix: True => 黑模块
+    # 编码结果按 (data, version, error_correction) 缓存，只改颜色 / 尺寸时不重新编码
+    matrix = qr_matrix_cache.get(data, version, error_correction)
     modules = len(matrix)  # e.g. 21, 25, ...
     # 计算每个模块的像素大小（尽量接近用户希望的 out_px）
     available_px = max(1, out_px - 2 * padding_px)
     box_size = max(1, available_px // modules)
-    qr_px = modules * box_size
     # 生成基础图（不含 padding）
-    img = Image.new("RGBA", (qr_px, qr_px), hex_to_rgba(back_color))
-    draw = ImageDraw.Draw(img)
-    mod_color_rgba = hex_to_rgba(module_color)
-    for r in range(modules):
-        for c in range(modules):
-            if matrix[r][c]:
-                x0 = c * box_size
-                y0 = r * box_size
-                draw.rectangle([x0, y0, x0 + box_size - 1, y0 + box_size - 1], fill=mod_color_rgba)
-
-    # 现在给 finder (眼) 着色（outer 7x7 / inner 3x3），基于模块坐标
-    # 找到三角 finder 模块左上角坐标（模块单位）
-    finder_coords = [(0, 0), (modules - 7, 0), (0, modules - 7)]
-    # 画 outer 7x7、白环 5x5、inner 3x3
-    for fx, fy in finder_coords:
-        # outer 7x7
-        if outer_eye_color:
-            col = hex_to_rgba(outer_eye_color)
-            x0 = fx * box_size
-            y0 = fy * box_size
-            draw.rectangle([x0, y0, x0 + 7 * box_size - 1, y0 + 7 * box_size - 1], fill=col)
-        # white 5x5 (to make ring)
-        bc = hex_to_rgba(back_color)
-        x1 = (fx + 1) * box_size
-        y1 = (fy + 1) * box_size
-        draw.rectangle([x1, y1, x1 + 5 * box_size - 1, y1 + 5 * box_size - 1], fill=bc)
-        # inner 3x3
-        if inner_eye_color:
-            col2 = hex_to_rgba(inner_eye_color)
-            x2 = (fx + 2) * box_size
-            y2 = (fy + 2) * box_size
-            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=col2)
-        else:
-            # restore inner to module_color if no inner specified
-            ic = hex_to_rgba(module_color)
-            x2 = (fx + 2) * box_size
-            y2 = (fy + 2) * box_size
-            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=ic)
+    if renderer == "reference":
+        img = _rasterize_qr_reference(matrix, box_size, back_color, module_color, outer_eye_color, inner_eye_color)
+    else:
+        img = rasterize_qr_matrix(matrix, box_size, back_color, module_color, outer_eye_color, inner_eye_color)
 
     # 增加 padding
     final = ImageOps.expand(img, border=padding_px, fill=hex_to_rgba(back_color))
@@ -167,198 +101,280 @@ def generate_barcode_pil(data: str,
                          show_text: bool = True,
                          font_path: str = None,
                          text_pos: str = "bottom",
-                         text_align: str = "center") -> Image.Image:
+                         text_align: str = "center",
+                         text_margin: int = 5,
+                         text_size: int = 12,
+                         text_bold: bool = False,
+                         text_italic: bool = False) -> Image.Image:
     """
-    使用 python-barcode + PIL 生成条形码并按像素调整到我们想要的宽度/高度/颜色
+    使用 python-barcode 的模块串 + PIL 直接绘制条形码（不经过 ImageWriter 的 PNG 编解码）
     - barcode_type: 'code128','ean13','ean8','code39','itf','upca' ...
-    - bar_width_px: 1..20, 表示窄条宽度（像素）
+    - bar_width_px: 1..20, 表示窄条宽度（像素），每个模块正好这么宽
     - bar_height_px: 1..500
-    - margin_px: 左右空白（quiet zone）像素
+    - margin_px: 左右空白像素（另含 6.5 个模块的静区）
     - bg_transparent: 背景是否透明
     - show_text: 是否绘制文字（human readable）
     - font_path: 字体文件路径，可为 None（使用默认）
     - text_pos: 'top' or 'bottom'
-    - text_align: 'left'/'center'/'right' （只影响显示）
+    - text_align: 'left'/'center'/'right'
+    - text_margin: 文字与条码之间的间距（像素）
+    - text_size / text_bold / text_italic: 字号、加粗、斜体
     """
-    # 获取 barcode class
-    try:
-        barcode_cls = barcode.get_barcode_class(barcode_type)
-    except Exception as e:
-        # fallback
-        barcode_cls = barcode.get_barcode_class("code128")
-
-    writer_options = {
-        "write_text": show_text,
-        # module_width/module_height 这里设置为 1 单位，后面用图像缩放调节到所需 px
-        "module_width": 1.0,
-        "module_height": 50.0,
-        "quiet_zone": 6.5,
-        "font_size": 10,
-        "text_distance": 5.0,
-    }
-    writer = ImageWriter()
-    # 通过内存写入
-    buf = io.BytesIO()
-    try:
-        obj = barcode_cls(data, writer=writer)
-        obj.write(buf, options=writer_options)
-    except Exception as e:
-        # 如果数据与类型不匹配（如 EAN13 长度不对），降级为 code128
-        obj = barcode.get_barcode_class("code128")(data, writer=writer)
-        buf = io.BytesIO()
-        obj.write(buf, options=writer_options)
-
-    buf.seek(0)
-    img = Image.open(buf).convert("RGBA")
-
-    # 现在确定当前最窄黑条的像素宽度（扫描第一行）
-    # 转为 L 并二值化
-    gray = img.convert("L")
-    bw = gray.point(lambda p: 255 if p > 128 else 0, mode='1')
-    bw_pix = bw.load()
-    width, height = bw.size
-    # 找到一行上连续黑段的宽度分布，用来猜测 narrow bar width
-    row = height // 2
-    runs = []
-    cur = None
-    curw = 0
-    for x in range(width):
-        v = bw_pix[x, row]
-        if v == 0:  # 黑
-            if cur == 'b':
-                curw += 1
-            else:
-                if cur in ('w', None):
-                    if curw > 0:
-                        runs.append((cur, curw))
-                    cur = 'b'
-                    curw = 1
-        else:
-            if cur == 'w':
-                curw += 1
-            else:
-                if cur in ('b', None):
-                    if curw > 0:
-                        runs.append((cur, curw))
-                    cur = 'w'
-                    curw = 1
-    if curw > 0:
-        runs.append((cur, curw))
-    # 找到最小的黑段宽
-    black_runs = [w for typ, w in runs if typ == 'b']
-    actual_narrow = min(black_runs) if black_runs else 1
-    scale_x = max(1.0, bar_width_px / actual_narrow)
-
-    # 缩放横向以满足 bar_width_px
-    new_w = max(1, int(round(img.width * scale_x)))
-    # 纵向则直接调整到用户指定的 bar_height_px（保留文字区域先不变，最后整体缩放处理）
-    # 为保证比例与文字位置，我们先把整个图像按 x 缩放，再按 y 缩放到目标高度 + 文字空间
-    img = img.resize((new_w, int(round(img.height * scale_x))), Image.NEAREST)
-
-    # 现在裁剪或拉伸到指定高度（bar_height_px + 若有文字则保留文本区域）
-    # 计算 actual bar 区域高度（图片中黑条区域顶部到底部），以便拉伸黑条部分到指定 bar_height_px
-    # 这里简化处理：将整个图像高度缩放到 bar_height_px 或稍大（若包含文字则加上）
-    # 如果有文字，则尝试把条形码主体拉到 bar_height_px，并保持文字尺寸不被拉变形
+    bar_rgba = hex_to_rgba(bar_color)
+    bg_rgba = (0, 0, 0, 0) if bg_transparent else hex_to_rgba(bg_color)
+    obj, code = build_barcode_modules(data, barcode_type)
+    img = render_bar_pattern(code, bar_width_px, bar_height_px, bar_rgba, bg_rgba)
+    # 静区
+    quiet_px = int(round(BARCODE_QUIET_ZONE_MODULES * max(1, bar_width_px)))
+    img = ImageOps.expand(img, border=(quiet_px, 0, quiet_px, 0), fill=bg_rgba)
+
+    # 文字用缓存字体绘制，与 qrlist 共用标签排版（字体文件/位置/对齐）
     if show_text:
-        # 假设原图底部有文本区域，大约占原图高度的 0.18，尝试保留该部分
-        text_area_est = int(max(8, img.height * 0.18))
-        bar_area = img.crop((0, 0, img.width, img.height - text_area_est))
-        text_area = img.crop((0, img.height - text_area_est, img.width, img.height))
-        # 拉伸 bar_area 到目标高度
-        bar_area = bar_area.resize((img.width, max(1, bar_height_px)), Image.NEAREST)
-        # 调整 text_area 字体（若用户指定 font_path，我们再重绘文本以更好支持样式）
-        # 组装回去
-        new_h = bar_area.height + text_area.height
-        new_img = Image.new("RGBA", (img.width, new_h), (255, 255, 255, 0 if bg_transparent else 255))
-        new_img.paste(bar_area, (0, 0))
-        new_img.paste(text_area, (0, bar_area.height))
-        img = new_img
-    else:
-        # 没有文字，直接把整张图拉伸到目标高度
-        img = img.resize((img.width, max(1, bar_height_px)), Image.NEAREST)
+        font = label_font_cache.get(font_path, text_size, text_bold, text_italic)
+        img = _add_text_label(img, obj.get_fullcode(), font, bar_rgba, bg_rgba, text_pos, text_align, text_margin)
 
     # 添加左右 margin
-    img = ImageOps.expand(img, border=(margin_px, 0, margin_px, 0), fill=(255, 255, 255, 0 if bg_transparent else 255))
+    img = ImageOps.expand(img, border=(margin_px, 0, margin_px, 0), fill=bg_rgba)
+    return img
 
-    # 替换颜色：将黑色替换为 bar_color，将白/背景替换为 bg_color/透明
-    px = img.load()
-    w, h = img.size
-    bar_rgba = hex_to_rgba(bar_color)
-    bg_rgba = (0, 0, 0, 0) if bg_transparent else hex_to_rgba(bg_color)
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = px[x, y]
-            # 将接近黑的像素视为黑
-            if r < 100 and g < 100 and b < 100:
-                px[x, y] = bar_rgba
-            else:
-                px[x, y] = bg_rgba
-
-    # 如果需要重新绘制文字（不同字体/对齐/样式），这里可以扩展：为简单起见，使用原有文字
-    # TODO: 若提供 font_path，则可以用 PIL 重绘下方文字以支持加粗/斜体/对齐
+# -----------------------------
+# 按需生成：单条图像 / 缩略图 / 缓存
+# -----------------------------
+def render_item(text: str, mode: str, options: dict) -> Image.Image:
+    """按当前参数生成一条数据的完整尺寸图像；生成失败时返回一张错误图片"""
+    try:
+        if mode == 'qr':
+            return generate_qr_pil(
+                data=text,
+                version=options.get('version', None),
+                error_correction=options.get('error_correction', 'M'),
+                out_px=options.get('out_px', 300),
+                padding_px=options.get('padding_px', 10),
+                module_color=options.get('module_color', '#000000'),
+                back_color=options.get('back_color', '#FFFFFF'),
+                outer_eye_color=options.get('outer_eye_color', None),
+                inner_eye_color=options.get('inner_eye_color', None)
+            )
+        return generate_barcode_pil(
+            data=text,
+            barcode_type=options.get('barcode_type', 'code128'),
+            bar_width_px=options.get('bar_width_px', 2),
+            bar_height_px=options.get('bar_height_px', 100),
+            margin_px=options.get('margin_px', 6),
+            bar_color=options.get('bar_color', '#000000'),
+            bg_transparent=options.get('bg_transparent', False),
+            bg_color=options.get('bg_color', '#FFFFFF'),
+            show_text=options.get('show_text', True),
+            font_path=options.get('font_path', None),
+            text_pos=options.get('text_pos', 'bottom'),
+            text_align=options.get('text_align', 'center'),
+            text_margin=options.get('text_margin', 5),
+            text_size=options.get('text_size', 12),
+            text_bold=options.get('text_bold', False),
+            text_italic=options.get('text_italic', False),
+        )
+    except Exception as e:
+        # 如果生成失败，生成一张错误图片
+        img = Image.new("RGBA", (200, 200), (255, 0, 0, 255))
+        d = ImageDraw.Draw(img)
+        d.text((10, 10), "ERROR", fill=(255, 255, 255, 255))
+        return img
 
+def render_thumbnail(text: str, mode: str, options: dict, size: int) -> Image.Image:
+    """
+    直接以缩略图尺寸生成，不先生成完整尺寸图像：
+    二维码按比例缩小边长和内边距，条形码用 1 像素条宽，仍超出 size 时再缩小
+    """
+    if mode == 'qr':
+        out_px = options.get('out_px', 300)
+        scale = min(1.0, size / out_px)
+        options = dict(options, out_px=max(1, int(out_px * scale)),
+                       padding_px=int(options.get('padding_px', 10) * scale))
+    else:
+        options = dict(options, bar_width_px=1)
+    img = render_item(text, mode, options)
+    if img.width > size or img.height > size:
+        img.thumbnail((size, size), Image.LANCZOS)
     return img
 
+class ImageLRU:
+    """线程安全的图像 LRU 缓存，超过 max_items 张时淘汰最久未使用的"""
+    def __init__(self, max_items: int):
+        self.max_items = max_items
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+            return img
+
+    def put(self, key, img):
+        with self._lock:
+            self._entries[key] = img
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
 # -----------------------------
-# 后台生成线程（用于批量生成，避免阻塞 UI）
+# 后台生成线程（按需生成可见的缩略图，避免阻塞 UI）
 # -----------------------------
 class GeneratorThread(QThread):
-    image_generated = Signal(int, object, str)  # index, PIL.Image, text
-    progress = Signal(int, int)  # processed, total
-    finished_all = Signal()
+    """
+    按 want() 给出的行号（最新的可见区域优先）逐个生成缩略图并放入 thumb_cache，
+    不保留完整尺寸图像；未请求的行不会生成
+    """
+    image_generated = Signal(int, object, str)  # index, 缩略图 PIL.Image, text
 
-    def __init__(self, items, mode, options):
+    def __init__(self, items, mode, options, thumb_size, thumb_cache):
         super().__init__()
         self.items = items  # list of strings
         self.mode = mode  # 'qr' or 'barcode'
         self.options = options
+        self.thumb_size = thumb_size
+        self.thumb_cache = thumb_cache
+        self._wanted = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+
+    def want(self, indices, visible=None):
+        """
+        把新请求的行号合并到待生成队列最前（去重，新请求优先），可在界面线程调用；
+        给出 visible（当前可见的行号范围）时丢弃已滚出视图的旧请求
+        """
+        with self._lock:
+            fresh = list(dict.fromkeys(indices))
+            queued = set(fresh)
+            older = [i for i in self._wanted if i not in queued and (visible is None or i in visible)]
+            self._wanted = fresh + older
+        self._wake.set()
+
+    def _next_wanted(self):
+        with self._lock:
+            if self._wanted:
+                return self._wanted.pop(0)
+            self._wake.clear()
+            return None
+
+    def run(self):
+        while self._running:
+            i = self._next_wanted()
+            if i is None:
+                self._wake.wait()
+                continue
+            if self.thumb_cache.get(i) is not None:
+                continue
+            text = self.items[i]
+            thumb = render_thumbnail(text, self.mode, self.options, self.thumb_size)
+            self.thumb_cache.put(i, thumb)
+            if self._running:
+                self.image_generated.emit(i, thumb, text)
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+class ExportThread(QThread):
+    """
+    流式导出：逐条生成、写入并释放，内存占用与数据量无关。
+    PDF 每条一页，页面生成后立即写盘；PNG/JPG 每条一个文件
+    """
+    progress = Signal(int, int)  # processed, total
+    finished_ok = Signal(str)
+    error = Signal(str)
+
+    def __init__(self, items, mode, options, fmt, path):
+        super().__init__()
+        self.items = items
+        self.mode = mode
+        self.options = options
+        self.fmt = fmt
+        self.path = path
         self._running = True
 
     def run(self):
         total = len(self.items)
-        for i, text in enumerate(self.items):
-            if not self._running:
-                break
-            try:
-                if self.mode == 'qr':
-                    img = generate_qr_pil(
-                        data=text,
-                        version=self.options.get('version', None),
-                        error_correction=self.options.get('error_correction', 'M'),
-                        out_px=self.options.get('out_px', 300),
-                        padding_px=self.options.get('padding_px', 10),
-                        module_color=self.options.get('module_color', '#000000'),
-                        back_color=self.options.get('back_color', '#FFFFFF'),
-                        outer_eye_color=self.options.get('outer_eye_color', None),
-                        inner_eye_color=self.options.get('inner_eye_color', None)
-                    )
+        writer = None
+        # 合并逐条进度，约 10Hz 发一次信号，避免逐条排队大量信号
+        reporter = ProgressReporter(lambda r: self.progress.emit(r["items_done"], r["items_total"]), total)
+        try:
+            if self.fmt == "PDF":
+                writer = StreamingPDFWriter(self.path, resolution=100.0)
+            ext = "png" if self.fmt == "PNG" else "jpg"
+            for i, text in enumerate(self.items, 1):
+                if not self._running:
+                    if writer is not None:
+                        writer.abort()  # 删除未完成的 PDF
+                    return  # 用户取消不算失败，不发 error
+                im = render_item(text, self.mode, self.options)
+                if writer is not None:
+                    writer.add_page(im)
                 else:
-                    img = generate_barcode_pil(
-                        data=text,
-                        barcode_type=self.options.get('barcode_type', 'code128'),
-                        bar_width_px=self.options.get('bar_width_px', 2),
-                        bar_height_px=self.options.get('bar_height_px', 100),
-                        margin_px=self.options.get('margin_px', 6),
-                        bar_color=self.options.get('bar_color', '#000000'),
-                        bg_transparent=self.options.get('bg_transparent', False),
-                        bg_color=self.options.get('bg_color', '#FFFFFF'),
-                        show_text=self.options.get('show_text', True),
-                        font_path=self.options.get('font_path', None),
-                        text_pos=self.options.get('text_pos', 'bottom'),
-                        text_align=self.options.get('text_align', 'center'),
-                    )
-            except Exception as e:
-                # 如果生成失败，生成一张错误图片
-                img = Image.new("RGBA", (200, 200), (255, 0, 0, 255))
-                d = ImageDraw.Draw(img)
-                d.text((10, 10), "ERROR", fill=(255, 255, 255, 255))
-            self.image_generated.emit(i, img, text)
-            self.progress.emit(i + 1, total)
-        self.finished_all.emit()
+                    safe = re.sub(r'[\\/:*?"<>|]', '_', text)[:60] or f"code_{i:04d}"
+                    fname = os.path.join(self.path, f"{safe}.{ext}")
+                    if ext == 'jpg':
+                        im.convert("RGB").save(fname, quality=95)
+                    else:
+                        im.save(fname)
+                im.close()
+                reporter.update(i)
+            if writer is not None:
+                writer.close()
+            self.finished_ok.emit(f"已导出到 {self.path}")
+        except Exception as e:
+            if writer is not None:
+                writer.abort()
+            self.error.emit(str(e))
 
     def stop(self):
         self._running = False
 
+class ThumbnailModel(QAbstractListModel):
+    """缩略图列表模型：QListView 只请求可见行，未缓存的缩略图通过 on_missing 交给后台生成"""
+    def __init__(self, thumb_cache, on_missing, parent=None):
+        super().__init__(parent)
+        self.items = []
+        self.thumb_cache = thumb_cache
+        self._on_missing = on_missing
+
+    def set_items(self, items):
+        self.beginResetModel()
+        self.items = items
+        self.endResetModel()
+
+    def thumb_ready(self, row):
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self.items[row][:20]
+        if role == Qt.ToolTipRole:
+            return self.items[row]
+        if role == Qt.DecorationRole:
+            thumb = self.thumb_cache.get(row)
+            if thumb is None:
+                self._on_missing(row)
+                return None
+            return pil_image_to_qpixmap(thumb)
+        return None
+
 # -----------------------------
 # 主窗口 UI
 # -----------------------------
@@ -367,9 +383,18 @@ class MainWindow(QWidget):
         super().__init__()
         self.setWindowTitle("批量二维码 / 条形码 生成器")
         self.resize(1200, 800)
-        self.generated_images = []  # 存储 (text, PIL.Image)
+        self.items = []  # 当前生成的数据，图像按需生成
+        self.mode = 'qr'
+        self.options = {}
         self.thumb_size = 150  # 缩略图显示大小
+        self.thumb_cache = ImageLRU(500)  # 缩略图（约 45 MB 上限）
+        self.full_cache = ImageLRU(16)  # 点击查看的完整尺寸图像
         self.generator_thread = None
+        self.export_thread = None
+        self._thumb_wanted = []
+        self.thumb_timer = QTimer()
+        self.thumb_timer.setSingleShot(True)
+        self.thumb_timer.timeout.connect(self._flush_thumb_requests)
 
         self._build_ui()
 
@@ -409,16 +434,19 @@ class MainWindow(QWidget):
         self._build_barcode_tab()
         main_layout.addWidget(self.tabs, 0)
 
-        # 中心显示区：滚动显示区域
+        # 中心显示区：虚拟缩略图网格（只生成可见的缩略图）
         center_layout = QVBoxLayout()
-        self.scroll_area = QScrollArea()
-        self.scroll_widget = QWidget()
-        self.grid_layout = QGridLayout(self.scroll_widget)
-        self.grid_layout.setSpacing(10)
-        self.scroll_widget.setLayout(self.grid_layout)
-        self.scroll_area.setWidgetResizable(True)
-        self.scroll_area.setWidget(self.scroll_widget)
-        center_layout.addWidget(self.scroll_area)
+        self.thumb_model = ThumbnailModel(self.thumb_cache, self._request_thumb, self)
+        self.thumb_view = QListView()
+        self.thumb_view.setViewMode(QListView.IconMode)
+        self.thumb_view.setResizeMode(QListView.Adjust)
+        self.thumb_view.setMovement(QListView.Static)
+        self.thumb_view.setUniformItemSizes(True)
+        self.thumb_view.setIconSize(QSize(self.thumb_size, self.thumb_size))
+        self.thumb_view.setGridSize(QSize(self.thumb_size + 20, self.thumb_size + 40))
+        self.thumb_view.setModel(self.thumb_model)
+        self.thumb_view.clicked.connect(self._on_thumb_clicked)
+        center_layout.addWidget(self.thumb_view)
         main_layout.addLayout(center_layout, 1)
 
         # 进度条与导出控件
@@ -427,6 +455,14 @@ class MainWindow(QWidget):
         self.progress_bar.setVisible(False)
         bottom_layout.addWidget(self.progress_bar, 4)
 
+        bottom_layout.addWidget(QLabel("跳转到第"))
+        self.jump_spin = QSpinBox()
+        self.jump_spin.setRange(1, 1)
+        self.jump_spin.setKeyboardTracking(False)
+        self.jump_spin.valueChanged.connect(self._jump_to_item)
+        bottom_layout.addWidget(self.jump_spin)
+        bottom_layout.addWidget(QLabel("条"))
+
         # 导出选项
         self.export_format_combo = QComboBox()
         self.export_format_combo.addItems(["PDF", "PNG", "JPG"])
@@ -693,47 +729,70 @@ class MainWindow(QWidget):
         self.start_generation(items, mode='barcode', options=options)
 
     def clear_display(self):
-        # 清理 grid
-        for i in reversed(range(self.grid_layout.count())):
-            widget = self.grid_layout.itemAt(i).widget()
-            if widget:
-                widget.setParent(None)
-        self.generated_images = []
+        if self.generator_thread is not None:
+            self.generator_thread.stop()
+            self.generator_thread.wait()
+            self.generator_thread = None
+        self.items = []
+        self.thumb_model.set_items([])
+        self.thumb_cache.clear()
+        self.full_cache.clear()
 
     def start_generation(self, items, mode, options):
-        # 启动线程
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(items))
-        self.progress_bar.setValue(0)
-
-        self.generator_thread = GeneratorThread(items, mode, options)
+        # 只记录数据和参数，缩略图在滚动到可见时才由后台线程生成
+        self.items = items
+        self.mode = mode
+        self.options = options
+        self.generator_thread = GeneratorThread(items, mode, options, self.thumb_size, self.thumb_cache)
         self.generator_thread.image_generated.connect(self.on_image_generated)
-        self.generator_thread.progress.connect(self.on_progress)
-        self.generator_thread.finished_all.connect(self.on_generation_finished)
         self.generator_thread.start()
-
-    def on_image_generated(self, idx, pil_img, text):
-        # 存储图像（完整尺寸）
-        self.generated_images.append((text, pil_img))
-        # 生成缩略图以显示
-        thumb = pil_img.copy()
-        thumb.thumbnail((self.thumb_size, self.thumb_size), Image.LANCZOS)
-        pix = pil_image_to_qpixmap(thumb)
-        label = QLabel()
-        label.setPixmap(pix)
-        label.setFixedSize(self.thumb_size + 10, self.thumb_size + 30)
-        label.setScaledContents(False)
-        label.setToolTip(text)
-        # 点击缩略图弹出大图
-        label.mousePressEvent = partial(self._on_thumb_clicked, pil_img, text)
-        pos = self.grid_layout.count()
-        cols = max(1, self.scroll_widget.width() // (self.thumb_size + 20))
-        row = pos // 6
-        col = pos % 6
-        self.grid_layout.addWidget(label, row, col)
-
-    def _on_thumb_clicked(self, pil_img, text, ev):
+        self.thumb_model.set_items(items)
+        self.thumb_view.scrollToTop()
+        self.jump_spin.blockSignals(True)
+        self.jump_spin.setRange(1, max(1, len(items)))
+        self.jump_spin.setValue(1)
+        self.jump_spin.blockSignals(False)
+
+    def _request_thumb(self, row):
+        # 一次绘制中陆续到达的请求合并后再交给后台
+        if row not in self._thumb_wanted:
+            self._thumb_wanted.append(row)
+        self.thumb_timer.start(0)
+
+    def _flush_thumb_requests(self):
+        wanted, self._thumb_wanted = self._thumb_wanted, []
+        if self.generator_thread is not None:
+            self.generator_thread.want(wanted, self._visible_rows())
+
+    def _visible_rows(self):
+        """缩略图视图当前可见的行号范围（网格尺寸固定，由滚动位置推算）"""
+        grid = self.thumb_view.gridSize()
+        viewport = self.thumb_view.viewport()
+        per_row = max(1, viewport.width() // grid.width())
+        top = self.thumb_view.verticalScrollBar().value()
+        first = top // grid.height() * per_row
+        last = (top + viewport.height()) // grid.height() * per_row + per_row
+        return range(first, min(last, self.thumb_model.rowCount()))
+
+    def on_image_generated(self, idx, thumb, text):
+        self.thumb_model.thumb_ready(idx)
+
+    def _jump_to_item(self, number):
+        if self.items:
+            self.thumb_view.scrollTo(self.thumb_model.index(number - 1), QListView.PositionAtTop)
+
+    def _full_image(self, row):
+        """完整尺寸图像：缓存中没有时按当前参数重新生成"""
+        img = self.full_cache.get(row)
+        if img is None:
+            img = render_item(self.items[row], self.mode, self.options)
+            self.full_cache.put(row, img)
+        return img
+
+    def _on_thumb_clicked(self, index):
         # 弹窗显示大图，并提供保存单张按钮
+        text = self.items[index.row()]
+        pil_img = self._full_image(index.row())
         w = QWidget()
         w.setWindowTitle(text[:50])
         v = QVBoxLayout(w)
@@ -757,57 +816,51 @@ class MainWindow(QWidget):
         v.addWidget(btn)
         w.resize(600, 600)
         w.show()
+        self._popup = w
 
-    def on_progress(self, p, total):
-        self.progress_bar.setValue(p)
-        QApplication.processEvents()
-
-    def on_generation_finished(self):
-        self.progress_bar.setVisible(False)
-        QMessageBox.information(self, "完成", "全部生成完毕。")
+    def closeEvent(self, event):
+        for thread in (self.generator_thread, self.export_thread):
+            if thread is not None:
+                thread.stop()
+                thread.wait()
+        super().closeEvent(event)
 
     # -----------------------------
     # 导出
     # -----------------------------
     def export_results(self):
-        if not self.generated_images:
+        if self.export_thread is not None:
+            self.export_thread.stop()  # 导出中再次点击即取消
+            return
+        if not self.items:
             QMessageBox.warning(self, "没有数据", "当前没有已生成的图片，请先生成。")
             return
         fmt = self.export_format_combo.currentText()
         if fmt == "PDF":
             path, _ = QFileDialog.getSaveFileName(self, "保存 PDF", "batch_codes.pdf", "PDF 文件 (*.pdf)")
-            if not path:
-                return
-            # PIL 可以把多张图合成 pdf（所有图需为 RGB）
-            imgs = []
-            for _, im in self.generated_images:
-                if im.mode in ("RGBA", "P"):
-                    imgs.append(im.convert("RGB"))
-                else:
-                    imgs.append(im.copy())
-            try:
-                imgs[0].save(path, "PDF", resolution=100.0, save_all=True, append_images=imgs[1:])
-                QMessageBox.information(self, "导出成功", f"已导出到 {path}")
-            except Exception as e:
-                QMessageBox.critical(self, "导出失败", str(e))
         else:
             # PNG / JPG：选择文件夹并批量保存
-            folder = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
-            if not folder:
-                return
-            ext = "png" if fmt == "PNG" else "jpg"
-            try:
-                for i, (text, im) in enumerate(self.generated_images, 1):
-                    safe = re.sub(r'[\\/:*?"<>|]', '_', text)[:60] or f"code_{i:04d}"
-                    fname = os.path.join(folder, f"{safe}.{ext}")
-                    if ext == 'jpg':
-                        rgb = im.convert("RGB")
-                        rgb.save(fname, quality=95)
-                    else:
-                        im.save(fname)
-                QMessageBox.information(self, "导出成功", f"已导出到 {folder}")
-            except Exception as e:
-                QMessageBox.critical(self, "导出失败", str(e))
+            path = QFileDialog.getExistingDirectory(self, "选择输出文件夹")
+        if not path:
+            return
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setMaximum(len(self.items))
+        self.progress_bar.setValue(0)
+        self.export_btn.setText("取消导出")
+        self.export_thread = ExportThread(self.items, self.mode, self.options, fmt, path)
+        self.export_thread.progress.connect(self.on_progress)
+        self.export_thread.finished_ok.connect(lambda msg: QMessageBox.information(self, "导出成功", msg))
+        self.export_thread.error.connect(lambda msg: QMessageBox.critical(self, "导出失败", msg))
+        self.export_thread.finished.connect(self.on_export_finished)
+        self.export_thread.start()
+
+    def on_progress(self, p, total):
+        self.progress_bar.setValue(p)
+
+    def on_export_finished(self):
+        self.progress_bar.setVisible(False)
+        self.export_btn.setText("导出结果")
+        self.export_thread = None
 
 # -----------------------------
 # 启动程序
@@ -9,58 +9,32 @@ Author: ChatGPT (为用户定制), modified by Grok
 
 import sys
 import os
-import io
-import math
-import re
-import threading
-import gc
 from functools import partial
 import logging
-import time
+import threading
+
+from PIL import Image, ImageQt
 
-from PIL import Image, ImageDraw, ImageOps, ImageFont, ImageQt
-import qrcode
-from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H
-import barcode
-from barcode.writer import ImageWriter
+from qrlist import (
+    SEPARATORS, InputDataset, TableDataset, SerialTemplate, plan_job_layout, PreviewPages,
+    image_codes_per_page, BatchExporter, ExportCancelled, DEFAULT_BUDGET_MB, MB, MemoryGovernor,
+    estimate_export_memory, format_duration,
+)
 
-from PySide6.QtCore import Qt, QThread, Signal, QSize, QTimer
+from PySide6.QtCore import Qt, QThread, Signal, QSize, QTimer, QAbstractListModel, QModelIndex
 from PySide6.QtGui import QPixmap, QColor, QFont
 from PySide6.QtWidgets import (
     QApplication, QWidget, QLabel, QPushButton, QTextEdit, QFileDialog,
     QTabWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QScrollArea,
     QComboBox, QSpinBox, QColorDialog, QCheckBox, QMessageBox, QGroupBox,
-    QFormLayout, QLineEdit, QProgressBar, QDialog
+    QFormLayout, QLineEdit, QProgressBar, QDialog, QListView, QStackedWidget
 )
 
-# 设置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-# 页面尺寸定义（像素，基于300 DPI）
-PAGE_SIZES = {
-    "A3": (3508, 4961),  # 297mm x 420mm
-    "A4": (2480, 3508),  # 210mm x 297mm
-    "A5": (1748, 2480),  # 148mm x 210mm
-}
-
 # -----------------------------
-# 辅助函数：颜色 / 图片转换
+# 辅助函数：图片转换
 # -----------------------------
-def hex_to_rgba(hex_color: str, alpha=255):
-    """将 '#RRGGBB' -> (R,G,B,A)"""
-    if not hex_color:
-        return (0, 0, 0, alpha)
-    s = hex_color.strip()
-    if s.startswith('#'):
-        s = s[1:]
-    if len(s) == 3:
-        s = ''.join([c*2 for c in s])
-    r = int(s[0:2], 16)
-    g = int(s[2:4], 16)
-    b = int(s[4:6], 16)
-    return (r, g, b, alpha)
-
 def pil_image_to_qpixmap(img: Image.Image):
     """PIL Image -> QPixmap"""
     if img.mode != "RGBA":
@@ -69,371 +43,6 @@ def pil_image_to_qpixmap(img: Image.Image):
     pix = QPixmap.fromImage(qim)
     return pix
 
-# -----------------------------
-# QR 生成核心逻辑
-# -----------------------------
-def generate_qr_pil(data: str,
-                    version: int = None,
-                    error_correction: str = "M",
-                    out_px: int = 300,
-                    left_right_padding_px: int = 10,
-                    top_bottom_padding_px: int = 10,
-                    module_color: str = "#000000",
-                    back_color: str = "#FFFFFF",
-                    outer_eye_color: str = None,
-                    inner_eye_color: str = None,
-                    show_text: bool = False,
-                    font_path: str = None,
-                    text_pos: str = "bottom",
-                    text_align: str = "center",
-                    text_margin: int = 5,
-                    text_size: int = 12,
-                    text_bold: bool = False,
-                    text_italic: bool = False) -> Image.Image:
-    """
-    生成二维码 PIL Image，支持文字大小和样式（加粗/斜体），非正方形画布
-    """
-    ec_map = {"L": ERROR_CORRECT_L, "M": ERROR_CORRECT_M, "Q": ERROR_CORRECT_Q, "H": ERROR_CORRECT_H}
-    ec = ec_map.get(error_correction.upper(), ERROR_CORRECT_M)
-
-    qr = qrcode.QRCode(
-        version=version if version else None,
-        error_correction=ec,
-        box_size=1,
-        border=0
-    )
-    qr.add_data(data)
-    try:
-        qr.make(fit=(version is None))
-    except Exception:
-        qr = qrcode.QRCode(error_correction=ec, box_size=1, border=0)
-        qr.add_data(data)
-        qr.make(fit=True)
-
-    matrix = qr.get_matrix()
-    modules = len(matrix)
-    available_px = max(1, out_px - 2 * left_right_padding_px)
-    box_size = max(1, available_px // modules)
-    qr_px = modules * box_size
-    img = Image.new("RGBA", (qr_px, qr_px), hex_to_rgba(back_color))
-    draw = ImageDraw.Draw(img)
-    mod_color_rgba = hex_to_rgba(module_color)
-    for r in range(modules):
-        for c in range(modules):
-            if matrix[r][c]:
-                x0 = c * box_size
-                y0 = r * box_size
-                draw.rectangle([x0, y0, x0 + box_size - 1, y0 + box_size - 1], fill=mod_color_rgba)
-
-    finder_coords = [(0, 0), (modules - 7, 0), (0, modules - 7)]
-    for fx, fy in finder_coords:
-        if outer_eye_color:
-            col = hex_to_rgba(outer_eye_color)
-            x0 = fx * box_size
-            y0 = fy * box_size
-            draw.rectangle([x0, y0, x0 + 7 * box_size - 1, y0 + 7 * box_size - 1], fill=col)
-        bc = hex_to_rgba(back_color)
-        x1 = (fx + 1) * box_size
-        y1 = (fy + 1) * box_size
-        draw.rectangle([x1, y1, x1 + 5 * box_size - 1, y1 + 5 * box_size - 1], fill=bc)
-        if inner_eye_color:
-            col2 = hex_to_rgba(inner_eye_color)
-            x2 = (fx + 2) * box_size
-            y2 = (fy + 2) * box_size
-            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=col2)
-        else:
-            ic = hex_to_rgba(module_color)
-            x2 = (fx + 2) * box_size
-            y2 = (fy + 2) * box_size
-            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=ic)
-
-    # 添加文字
-    if show_text:
-        # 选择字体：优先用户指定字体，支持加粗/斜体
-        font = None
-        font_name = font_path if font_path and os.path.exists(font_path) else None
-        if font_name:
-            if text_bold and text_italic:
-                try_font = font_name.replace(".ttf", "bi.ttf").replace(".otf", "bi.otf")
-            elif text_bold:
-                try_font = font_name.replace(".ttf", "bd.ttf").replace(".otf", "bd.otf")
-            elif text_italic:
-                try_font = font_name.replace(".ttf", "i.ttf").replace(".otf", "i.otf")
-            else:
-                try_font = font_name
-            try:
-                font = ImageFont.truetype(try_font, size=max(6, text_size))
-                logger.info(f"Loaded font: {try_font}, size: {text_size}")
-            except Exception as e:
-                logger.warning(f"Failed to load font {try_font}: {e}")
-                font_name = None
-
-        if not font:
-            try:
-                if text_bold and text_italic:
-                    font = ImageFont.truetype("arialbi.ttf", size=max(6, text_size))
-                elif text_bold:
-                    font = ImageFont.truetype("arialbd.ttf", size=max(6, text_size))
-                elif text_italic:
-                    font = ImageFont.truetype("ariali.ttf", size=max(6, text_size))
-                else:
-                    font = ImageFont.truetype("arial.ttf", size=max(6, text_size))
-                logger.info(f"Loaded fallback font: Arial, size: {text_size}")
-            except Exception as e:
-                logger.warning(f"Failed to load Arial font: {e}")
-                font = ImageFont.load_default()
-                text_size = min(text_size, 12)
-                logger.info(f"Using Pillow default font, size limited to: {text_size}")
-
-        # 计算文字尺寸
-        text_bbox = draw.textbbox((0, 0), data, font=font)
-        text_w, text_h = text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
-        extra_height = text_h + text_margin * 2
-
-        # 创建新画布以容纳文字
-        new_h = qr_px + extra_height
-        new_img = Image.new("RGBA", (qr_px, new_h), hex_to_rgba(back_color))
-        draw = ImageDraw.Draw(new_img)
-
-        # 放置二维码和文字
-        if text_pos == "bottom":
-            new_img.paste(img, (0, 0))
-            text_y = qr_px + text_margin
-        else:
-            new_img.paste(img, (0, extra_height))
-            text_y = text_margin
-
-        # 计算文字对齐
-        if text_align == "center":
-            text_x = (qr_px - text_w) // 2
-        elif text_align == "right":
-            text_x = qr_px - text_w - text_margin
-        else:
-            text_x = text_margin
-
-        # 渲染文字
-        draw.text((text_x, text_y), data, font=font, fill=mod_color_rgba)
-        img = new_img
-
-    # 添加左右和上下内边距
-    final = ImageOps.expand(img, border=(left_right_padding_px, top_bottom_padding_px, left_right_padding_px, top_bottom_padding_px), fill=hex_to_rgba(back_color))
-    final_h = (qr_px + extra_height if show_text else qr_px) + 2 * top_bottom_padding_px
-
-    # 调整到目标宽度（保持比例，纵向可能非正方形）
-    if final.width != out_px:
-        scale = out_px / final.width
-        final = final.resize((out_px, int(final.height * scale)), Image.NEAREST)
-
-    return final
-
-# -----------------------------
-# Barcode 生成核心逻辑
-# -----------------------------
-def generate_barcode_pil(data: str,
-                        barcode_type: str = "code128",
-                        bar_width_px: int = 2,
-                        bar_height_px: int = 100,
-                        margin_px: int = 6,
-                        bar_color: str = "#000000",
-                        bg_transparent: bool = False,
-                        bg_color: str = "#FFFFFF",
-                        show_text: bool = True,
-                        font_path: str = None,
-                        text_pos: str = "bottom",
-                        text_align: str = "center",
-                        text_margin: int = 5,
-                        text_size: int = 12,
-                        text_bold: bool = False,
-                        text_italic: bool = False) -> Image.Image:
-    try:
-        barcode_cls = barcode.get_barcode_class(barcode_type)
-    except Exception:
-        barcode_cls = barcode.get_barcode_class("code128")
-
-    writer_options = {
-        "write_text": show_text,
-        "module_width": 1.0,
-        "module_height": 50.0,
-        "quiet_zone": 6.5,
-        "font_size": text_size,
-        "text_distance": text_margin,
-    }
-    writer = ImageWriter()
-    buf = io.BytesIO()
-    try:
-        obj = barcode_cls(data, writer=writer)
-        obj.write(buf, options=writer_options)
-    except Exception:
-        obj = barcode.get_barcode_class("code128")(data, writer=writer)
-        buf = io.BytesIO()
-        obj.write(buf, options=writer_options)
-
-    buf.seek(0)
-    img = Image.open(buf).convert("RGBA")
-
-    gray = img.convert("L")
-    bw = gray.point(lambda p: 255 if p > 128 else 0, mode='1')
-    bw_pix = bw.load()
-    width, height = bw.size
-    row = height // 2
-    runs = []
-    cur = None
-    curw = 0
-    for x in range(width):
-        v = bw_pix[x, row]
-        if v == 0:
-            if cur == 'b':
-                curw += 1
-            else:
-                if cur in ('w', None):
-                    if curw > 0:
-                        runs.append((cur, curw))
-                    cur = 'b'
-                    curw = 1
-        else:
-            if cur == 'w':
-                curw += 1
-            else:
-                if cur in ('b', None):
-                    if curw > 0:
-                        runs.append((cur, curw))
-                    cur = 'w'
-                    curw = 1
-    if curw > 0:
-        runs.append((cur, curw))
-    black_runs = [w for typ, w in runs if typ == 'b']
-    actual_narrow = min(black_runs) if black_runs else 1
-    scale_x = max(1.0, bar_width_px / actual_narrow)
-
-    new_w = max(1, int(round(img.width * scale_x)))
-    img = img.resize((new_w, int(round(img.height * scale_x))), Image.NEAREST)
-
-    if show_text:
-        text_area_est = int(max(8, img.height * 0.18))
-        bar_area = img.crop((0, 0, img.width, img.height - text_area_est))
-        text_area = img.crop((0, img.height - text_area_est, img.width, img.height))
-        bar_area = bar_area.resize((img.width, max(1, bar_height_px)), Image.NEAREST)
-        new_h = bar_area.height + text_area.height + text_margin * 2
-        new_img = Image.new("RGBA", (img.width, new_h), (255, 255, 255, 0 if bg_transparent else 255))
-        if text_pos == "bottom":
-            new_img.paste(bar_area, (0, 0))
-            new_img.paste(text_area, (0, bar_area.height + text_margin))
-        else:
-            new_img.paste(bar_area, (0, text_area.height + text_margin))
-            new_img.paste(text_area, (0, 0))
-        img = new_img
-    else:
-        img = img.resize((img.width, max(1, bar_height_px)), Image.NEAREST)
-
-    img = ImageOps.expand(img, border=(margin_px, margin_px, margin_px, margin_px), fill=(255, 255, 255, 0 if bg_transparent else 255))
-
-    px = img.load()
-    w, h = img.size
-    bar_rgba = hex_to_rgba(bar_color)
-    bg_rgba = (0, 0, 0, 0) if bg_transparent else hex_to_rgba(bg_color)
-    for y in range(h):
-        for x in range(w):
-            r, g, b, a = px[x, y]
-            if r < 100 and g < 100 and b < 100:
-                px[x, y] = bar_rgba
-            else:
-                px[x, y] = bg_rgba
-
-    return img
-
-# -----------------------------
-# 后台生成线程
-# -----------------------------
-class GeneratorThread(QThread):
-    image_generated = Signal(int, object, str)
-    progress = Signal(int, int)
-    finished_all = Signal()
-    error = Signal(str)
-
-    def __init__(self, items, mode, options, batch_size=1000, max_display=50):
-        super().__init__()
-        self.items = items[:max_display]  # 限制生成前50个
-        self.mode = mode
-        self.options = options
-        self.batch_size = batch_size
-        self.max_display = max_display
-        self._running = True
-
-    def run(self):
-        total = len(self.items)
-        try:
-            for batch_start in range(0, total, self.batch_size):
-                if not self._running:
-                    break
-                batch = self.items[batch_start:batch_start + self.batch_size]
-                for i, text in enumerate(batch):
-                    global_idx = batch_start + i
-                    if not self._running:
-                        break
-                    try:
-                        if self.mode == 'qr':
-                            img = generate_qr_pil(
-                                data=text,
-                                version=self.options.get('version', None),
-                                error_correction=self.options.get('error_correction', 'M'),
-                                out_px=self.options.get('out_px', 300),
-                                left_right_padding_px=self.options.get('left_right_padding_px', 10),
-                                top_bottom_padding_px=self.options.get('top_bottom_padding_px', 10),
-                                module_color=self.options.get('module_color', '#000000'),
-                                back_color=self.options.get('back_color', '#FFFFFF'),
-                                outer_eye_color=self.options.get('outer_eye_color', None),
-                                inner_eye_color=self.options.get('inner_eye_color', None),
-                                show_text=self.options.get('show_text', False),
-                                font_path=self.options.get('font_path', None),
-                                text_pos=self.options.get('text_pos', 'bottom'),
-                                text_align=self.options.get('text_align', 'center'),
-                                text_margin=self.options.get('text_margin', 5),
-                                text_size=self.options.get('text_size', 12),
-                                text_bold=self.options.get('text_bold', False),
-                                text_italic=self.options.get('text_italic', False)
-                            )
-                        else:
-                            img = generate_barcode_pil(
-                                data=text,
-                                barcode_type=self.options.get('barcode_type', 'code128'),
-                                bar_width_px=self.options.get('bar_width_px', 2),
-                                bar_height_px=self.options.get('bar_height_px', 100),
-                                margin_px=self.options.get('margin_px', 6),
-                                bar_color=self.options.get('bar_color', '#000000'),
-                                bg_transparent=self.options.get('bg_transparent', False),
-                                bg_color=self.options.get('bg_color', '#FFFFFF'),
-                                show_text=self.options.get('show_text', True),
-                                font_path=self.options.get('font_path', None),
-                                text_pos=self.options.get('text_pos', 'bottom'),
-                                text_align=self.options.get('text_align', 'center'),
-                                text_margin=self.options.get('text_margin', 5),
-                                text_size=self.options.get('text_size', 12),
-                                text_bold=self.options.get('text_bold', False),
-                                text_italic=self.options.get('text_italic', False)
-                            )
-                        if global_idx < self.max_display:
-                            self.image_generated.emit(global_idx, img, text)
-                    except Exception as e:
-                        img = Image.new("RGBA", (200, 200), (255, 0, 0, 255))
-                        d = ImageDraw.Draw(img)
-                        d.text((10, 10), "ERROR", fill=(255, 255, 255, 255))
-                        if global_idx < self.max_display:
-                            self.image_generated.emit(global_idx, img, text)
-                    self.progress.emit(global_idx + 1, total)
-                    img = None
-                    gc.collect()
-                gc.collect()
-        except MemoryError:
-            self.error.emit("内存不足，请减少每次生成的数据量或降低图像分辨率。")
-            return
-        except Exception as e:
-            self.error.emit(f"生成失败：{str(e)}")
-            return
-        self.finished_all.emit()
-
-    def stop(self):
-        self._running = False
-
 # -----------------------------
 # 导出进度对话框
 # -----------------------------
@@ -442,7 +51,7 @@ class ProgressDialog(QDialog):
         super().__init__(parent)
         self.setWindowTitle("导出进度")
         self.setModal(True)
-        self.setFixedSize(400, 150)
+        self.setFixedSize(420, 180)
         self.total_items = total_items
         layout = QVBoxLayout()
 
@@ -454,6 +63,9 @@ class ProgressDialog(QDialog):
         self.status_label = QLabel("准备开始导出...")
         layout.addWidget(self.status_label)
 
+        self.stats_label = QLabel("")
+        layout.addWidget(self.stats_label)
+
         self.cancel_btn = QPushButton("取消导出")
         layout.addWidget(self.cancel_btn)
 
@@ -462,6 +74,16 @@ class ProgressDialog(QDialog):
     def update_progress(self, value):
         self.progress_bar.setValue(value)
 
+    def update_report(self, report):
+        """显示 ProgressReporter 的快照：条数 / 页数、速度、已写入大小和剩余时间"""
+        if report["items_total"] and report["items_total"] != self.progress_bar.maximum():
+            self.progress_bar.setMaximum(report["items_total"])
+        self.progress_bar.setValue(report["items_done"])
+        pages = f"，{report['pages_done']}/{report['pages_total']} 页" if report["pages_total"] else ""
+        self.stats_label.setText(
+            f"{report['items_done']}/{report['items_total']} 条{pages}  ·  {report['items_per_s']:.0f} 条/秒  ·  "
+            f"已写入 {report['bytes_written'] / MB:.1f} MB  ·  剩余 {format_duration(report['eta'])}")
+
     def update_status(self, status):
         self.status_label.setText(status)
 
@@ -469,294 +91,212 @@ class ProgressDialog(QDialog):
 # 导出线程
 # -----------------------------
 class ExportThread(QThread):
-    progress = Signal(int)
+    """在后台线程中运行 BatchExporter，通过信号上报进度（约 10Hz 合并后的快照）"""
+    report = Signal(object)  # ProgressReporter 快照
     status = Signal(str)
     finished = Signal(str)
     error = Signal(str)
 
-    def __init__(self, items, mode, options, fmt, arrangement, cols_per_row, output_path, page_size, auto_size, parent=None):
+    def __init__(self, items, mode, options, fmt, arrangement, cols_per_row, output_path, page_size, auto_size,
+                 pages_per_pdf=0, pdf_mode="raster", workers=None, separate_files=False, labels=None, governor=None,
+                 profile_memory=False, trace=False, parent=None):
         super().__init__(parent)
-        self.items = items
+        self.exporter = BatchExporter(items, mode, options, fmt, arrangement, cols_per_row, output_path,
+                                      page_size, auto_size, pages_per_pdf=pages_per_pdf, pdf_mode=pdf_mode,
+                                      workers=workers, separate_files=separate_files,
+                                      on_report=self.report.emit, on_status=self.status.emit,
+                                      labels=labels, governor=governor, profile_memory=profile_memory,
+                                      trace=trace)
+
+    def run(self):
+        try:
+            self.finished.emit(self.exporter.run())
+        except ExportCancelled:
+            pass
+        except MemoryError:
+            self.error.emit("内存不足，请减少图像分辨率或数据量。")
+        except Exception as e:
+            self.error.emit(f"导出失败：{str(e)}")
+
+    def stop(self):
+        self.exporter.stop()
+
+# -----------------------------
+# 预览：按屏幕分辨率在后台渲染
+# -----------------------------
+PREVIEW_DEBOUNCE_MS = 80
+THUMB_LEVEL = 2  # 缩略图为预览页的 1/4
+
+class PreviewThread(QThread):
+    """
+    一个预览任务的后台渲染线程：先按导出规则规划整个任务的版面，再按 want() 给出的顺序逐页渲染。
+    want() 会替换尚未开始的请求（最新的视图优先）；参数变化时由界面 stop() 并新建线程，
+    过期的结果按 request_id 丢弃
+    """
+    planned = Signal(int, object)  # 请求序号, PreviewPages
+    rendered = Signal(int, int, int, object)  # 请求序号, 页号, 级别, PIL Image
+    error = Signal(int, str)
+
+    def __init__(self, request_id, mode, options, items, labels, page_size, arrangement, cols_per_row, auto_size,
+                 target_size, governor, parent=None):
+        super().__init__(parent)
+        self.request_id = request_id
         self.mode = mode
         self.options = options
-        self.fmt = fmt
+        self.items = items
+        self.labels = labels
+        self.page_size = page_size
         self.arrangement = arrangement
         self.cols_per_row = cols_per_row
-        self.output_path = output_path
-        self.page_size = page_size
         self.auto_size = auto_size
+        self.target_size = target_size
+        self.governor = governor
+        self._wanted = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
         self._running = True
-        self.temp_files = []
+
+    def want(self, keys):
+        """设置待渲染的 (页号, 级别) 列表，可在界面线程调用"""
+        with self._lock:
+            self._wanted = list(keys)
+        self._wake.set()
+
+    def _next_wanted(self):
+        with self._lock:
+            if self._wanted:
+                return self._wanted.pop(0)
+            self._wake.clear()
+            return None
 
     def run(self):
+        cancelled = lambda: not self._running
         try:
-            if self.fmt == "PDF":
-                self._export_pdf()
-            else:
-                self._export_images()
-        except MemoryError:
-            self.error.emit("内存不足，请减少图像分辨率或数据量。")
-        except Exception as e:
-            self.error.emit(f"导出失败：{str(e)}")
-        finally:
-            self._cleanup_temp_files()
-
-    def _export_pdf(self):
-        a4_width, a4_height = PAGE_SIZES[self.page_size]
-        margin = self.options.get('left_right_padding_px', 0)
-        spacing = self.options.get('top_bottom_padding_px', 0)
-        codes_per_row = self.cols_per_row if self.arrangement == "横向排列" else 1
-        codes_per_col = 3 if self.arrangement == "竖向排列" else 1
-        codes_per_page = codes_per_row * codes_per_col
-        pages_per_pdf = 100  # 每100页生成一个PDF
-
-        # 计算图像大小
-        max_width = 0
-        max_height = 0
-        sample_size = min(10, len(self.items))
-        if self.auto_size and self.arrangement == "横向排列":
-            available_width = (a4_width - 2 * margin - (codes_per_row - 1) * spacing) // codes_per_row
-            self.options['out_px'] = max(100, available_width)
-            if self.mode == 'barcode':
-                self.options['bar_width_px'] = max(1, available_width // 50)  # 假设条宽比例
-
-        for text in self.items[:sample_size]:
-            if not self._running:
+            layout = plan_job_layout(self.mode, self.options, self.items, self.labels, self.page_size,
+                                     self.arrangement, self.cols_per_row, self.auto_size, cancelled=cancelled)
+            if layout is None:
                 return
-            img = generate_qr_pil(text, **self.options) if self.mode == 'qr' else generate_barcode_pil(text, **self.options)
-            max_width = max(max_width, img.width)
-            max_height = max(max_height, img.height)
-            img.close()
-            img = None
-            gc.collect()
-
-        current_page = None
-        draw = None
-        x, y = margin, margin
-        page_count = 0
-        item_count = 0
-        segment_images = []
-        pdf_index = 1
-
-        for i, text in enumerate(self.items):
-            if not self._running:
-                break
-
-            if current_page is None:
-                current_page = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-                draw = ImageDraw.Draw(current_page)
-                self.status.emit(f"正在导出第 {page_count + 1} 页，第 {item_count + 1} 条数据")
-
-            img = generate_qr_pil(text, **self.options) if self.mode == 'qr' else generate_barcode_pil(text, **self.options)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            img = img.resize((max_width, max_height), Image.LANCZOS)
-
-            if self.arrangement == "横向排列":
-                if x + max_width > a4_width - margin:
-                    x = margin
-                    y += max_height + spacing
-                if y + max_height > a4_height - margin:
-                    if current_page is not None:
-                        temp_path = f"{self.output_path}.temp_{page_count}.png"
-                        current_page.save(temp_path, "PNG", optimize=True)
-                        self.temp_files.append(temp_path)
-                        segment_images.append(current_page)
-                        current_page.close()
-                        current_page = None
-                        draw = None
-                        page_count += 1
-                        x, y = margin, margin
-                        if len(segment_images) >= pages_per_pdf:
-                            self._save_segment_pdf(segment_images, pdf_index)
-                            segment_images = []
-                            pdf_index += 1
-                        if not self._running:
-                            break
-                        current_page = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-                        draw = ImageDraw.Draw(current_page)
-                        self.status.emit(f"正在导出第 {page_count + 1} 页，第 {item_count + 1} 条数据")
-                if self._running and current_page is not None:
-                    current_page.paste(img, (x, y))
-                    draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                    x += max_width + spacing
-            else:
-                if y + max_height > a4_height - margin:
-                    if current_page is not None:
-                        temp_path = f"{self.output_path}.temp_{page_count}.png"
-                        current_page.save(temp_path, "PNG", optimize=True)
-                        self.temp_files.append(temp_path)
-                        segment_images.append(current_page)
-                        current_page.close()
-                        current_page = None
-                        draw = None
-                        page_count += 1
-                        x, y = margin, margin
-                        if len(segment_images) >= pages_per_pdf:
-                            self._save_segment_pdf(segment_images, pdf_index)
-                            segment_images = []
-                            pdf_index += 1
-                        if not self._running:
-                            break
-                        current_page = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-                        draw = ImageDraw.Draw(current_page)
-                        self.status.emit(f"正在导出第 {page_count + 1} 页，第 {item_count + 1} 条数据")
-                if self._running and current_page is not None:
-                    current_page.paste(img, (x, y))
-                    draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                    y += max_height + spacing
-
-            item_count += 1
-            self.progress.emit(item_count)
-            img.close()
-            img = None
-            gc.collect()
-            if item_count % 100 == 0:
-                QApplication.processEvents()
-
-        # 保存最后一页
-        if self._running and current_page is not None:
-            temp_path = f"{self.output_path}.temp_{page_count}.png"
-            current_page.save(temp_path, "PNG", optimize=True)
-            self.temp_files.append(temp_path)
-            segment_images.append(current_page)
-            current_page.close()
-            current_page = None
-            draw = None
-            page_count += 1
-
-        # 保存剩余的页面到最后一个PDF
-        if self._running and segment_images:
-            self._save_segment_pdf(segment_images, pdf_index)
-
-        if self._running:
-            self.finished.emit(f"已导出 {len(self.items)} 个二维码/条形码到 {self.output_path}")
-
-    def _save_segment_pdf(self, images, pdf_index):
-        if not images or not self._running:
-            return
-        output_path = f"{self.output_path.rsplit('.', 1)[0]}_{pdf_index}.pdf"
-        self.status.emit(f"正在生成PDF文件 {output_path}")
-        start_time = time.time()
-        try:
-            images[0].save(output_path, "PDF", resolution=100.0, save_all=True, append_images=images[1:])
-            logger.info(f"Created PDF {output_path}, {len(images)} pages, time: {time.time() - start_time:.2f}s")
+            scale = min(self.target_size[0] / layout.page_width, self.target_size[1] / layout.page_height, 1.0)
+            pages = PreviewPages(self.mode, self.options, layout, self.items, self.labels, scale,
+                                 max_bytes=self.governor.cache_bytes(64 * MB))
+            self.planned.emit(self.request_id, pages)
+            while self._running:
+                key = self._next_wanted()
+                if key is None:
+                    self._wake.wait()
+                    continue
+                page, level = key
+                if not 0 <= page < pages.pages:
+                    continue
+                img = pages.render(page, level, cancelled)
+                if img is not None and self._running:
+                    self.rendered.emit(self.request_id, page, level, img)
         except Exception as e:
-            logger.error(f"Failed to create PDF {output_path}: {str(e)}")
-            self.error.emit(f"生成PDF失败：{str(e)}")
-            return
+            logger.exception("Preview failed")
+            self.error.emit(self.request_id, f"预览失败：{str(e)}")
 
-    def _export_images(self):
-        a4_width, a4_height = PAGE_SIZES[self.page_size]
-        margin = self.options.get('left_right_padding_px', 0)
-        spacing = self.options.get('top_bottom_padding_px', 0)
-        codes_per_row = self.cols_per_row if self.arrangement == "横向排列" else 1
-        codes_per_col = 3 if self.arrangement == "竖向排列" else 1
-        codes_per_page = codes_per_row * codes_per_col
-
-        if self.auto_size and self.arrangement == "横向排列":
-            available_width = (a4_width - 2 * margin - (codes_per_row - 1) * spacing) // codes_per_row
-            self.options['out_px'] = max(100, available_width)
-            if self.mode == 'barcode':
-                self.options['bar_width_px'] = max(1, available_width // 50)
-
-        if len(self.items) > codes_per_page:
-            reply = QMessageBox.question(
-                None, "数据量警告",
-                f"当前 {len(self.items)} 条数据超过单页容量（{codes_per_page} 个）。选择“是”保存为单独文件，选择“否”仅导出单页。",
-                QMessageBox.Yes | QMessageBox.No
-            )
-            if reply == QMessageBox.Yes:
-                folder = QFileDialog.getExistingDirectory(None, "选择输出文件夹")
-                if not folder:
-                    self.finished.emit("")
-                    return
-                ext = "png" if self.fmt == "PNG" else "jpg"
-                for i, text in enumerate(self.items):
-                    if not self._running:
-                        return
-                    img = generate_qr_pil(text, **self.options) if self.mode == 'qr' else generate_barcode_pil(text, **self.options)
-                    if img.mode in ("RGBA", "P"):
-                        img = img.convert("RGB")
-                    safe_text = "".join(c for c in text if c.isalnum() or c in "-_")[:50]
-                    fname = os.path.join(folder, f"code_{i+1}_{safe_text}.{ext}")
-                    if ext == 'jpg':
-                        img.save(fname, quality=95)
-                    else:
-                        img.save(fname)
-                    self.progress.emit(i + 1)
-                    self.status.emit(f"正在导出第 {i + 1} 条数据")
-                    img.close()
-                    img = None
-                    gc.collect()
-                    if (i + 1) % 100 == 0:
-                        QApplication.processEvents()
-                self.finished.emit(f"已将 {len(self.items)} 个二维码/条形码导出到 {folder}")
-                return
+    def stop(self):
+        self._running = False
+        self._wake.set()
 
-        folder = QFileDialog.getExistingDirectory(None, "选择输出文件夹")
-        if not folder:
-            self.finished.emit("")
-            return
-        ext = "png" if self.fmt == "PNG" else "jpg"
-        output_img = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-        draw = ImageDraw.Draw(output_img)
-        x, y = margin, margin
-        max_width = 0
-        max_height = 0
-
-        for i, text in enumerate(self.items[:codes_per_page]):
-            if not self._running:
+class PageThumbModel(QAbstractListModel):
+    """
+    预览页缩略图列表：QListView 只请求可见行，未缓存的缩略图通过 on_missing 回调交给后台渲染，
+    任务有几十万页时也只渲染看到的页面
+    """
+
+    def __init__(self, on_missing, parent=None):
+        super().__init__(parent)
+        self._pages = None
+        self._on_missing = on_missing
+
+    def set_pages(self, pages):
+        self.beginResetModel()
+        self._pages = pages
+        self.endResetModel()
+
+    def page_updated(self, page):
+        index = self.index(page)
+        self.dataChanged.emit(index, index, [Qt.DecorationRole])
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self._pages is None:
+            return 0
+        return self._pages.pages
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or self._pages is None:
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return f"第 {row + 1} 页"
+        if role == Qt.DecorationRole:
+            img = self._pages.cached(row, THUMB_LEVEL)
+            if img is None:
+                self._on_missing(row)
+                return None
+            return pil_image_to_qpixmap(img)
+        return None
+
+# -----------------------------
+# 文件数据源：后台索引 + 虚拟列表
+# -----------------------------
+class DatasetIndexThread(QThread):
+    """在后台分段为文件数据集建立索引，每段完成后上报进度"""
+    progress = Signal(int, int, int)  # 已索引条数, 已处理字节, 总字节
+    indexed = Signal(int)
+
+    def __init__(self, dataset, chunk_bytes=4 * 1024 * 1024, parent=None):
+        super().__init__(parent)
+        self.dataset = dataset
+        self.chunk_bytes = chunk_bytes
+        self._running = True
+
+    def run(self):
+        while self._running:
+            complete = self.dataset.index_chunk(self.chunk_bytes)
+            self.progress.emit(len(self.dataset), self.dataset.indexed_bytes, self.dataset.size_bytes)
+            if complete:
+                self.indexed.emit(len(self.dataset))
                 return
-            img = generate_qr_pil(text, **self.options) if self.mode == 'qr' else generate_barcode_pil(text, **self.options)
-            if img.mode in ("RGBA", "P"):
-                img = img.convert("RGB")
-            max_width = max(max_width, img.width)
-            max_height = max(max_height, img.height)
-            img = img.resize((max_width, max_height), Image.LANCZOS)
-            if self.arrangement == "横向排列":
-                if x + max_width > a4_width - margin:
-                    x = margin
-                    y += max_height + spacing
-                if y + max_height > a4_height - margin:
-                    break
-                output_img.paste(img, (x, y))
-                draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                x += max_width + spacing
-            else:
-                if y + max_height > a4_height - margin:
-                    break
-                output_img.paste(img, (x, y))
-                draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                y += max_height + spacing
-            self.progress.emit(i + 1)
-            self.status.emit(f"正在导出第 {i + 1} 条数据")
-            img.close()
-            img = None
-            gc.collect()
-            if (i + 1) % 100 == 0:
-                QApplication.processEvents()
-        fname = os.path.join(folder, f"batch_codes.{ext}")
-        if ext == 'jpg':
-            output_img.save(fname, quality=95)
-        else:
-            output_img.save(fname)
-        output_img.close()
-        output_img = None
-        gc.collect()
-        self.finished.emit(f"已导出 {min(codes_per_page, len(self.items))} 个二维码/条形码到 {fname}")
-
-    def _cleanup_temp_files(self):
-        for temp_file in self.temp_files:
-            try:
-                os.remove(temp_file)
-            except:
-                pass
-        self.temp_files = []
 
     def stop(self):
         self._running = False
 
+class DatasetListModel(QAbstractListModel):
+    """只读列表模型：QListView 只请求可见行，数据按需从数据集解码"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._dataset = None
+        self._rows = 0
+
+    def set_dataset(self, dataset):
+        self.beginResetModel()
+        self._dataset = dataset
+        self._rows = len(dataset) if dataset is not None else 0
+        self.endResetModel()
+
+    def sync_rows(self):
+        """索引推进后追加新行"""
+        n = len(self._dataset) if self._dataset is not None else 0
+        if n > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, n - 1)
+            self._rows = n
+            self.endInsertRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid() or self._dataset is None:
+            return None
+        row = index.row()
+        labels = getattr(self._dataset, "labels", None)
+        if labels is not None:
+            return f"{row + 1}. {self._dataset[row]}  —  {labels[row]}"
+        return f"{row + 1}. {self._dataset[row]}"
+
 # -----------------------------
 # 主窗口 UI
 # -----------------------------
@@ -765,16 +305,26 @@ class MainWindow(QWidget):
         super().__init__()
         self.setWindowTitle("批量二维码 / 条形码 生成器")
         self.resize(1200, 900)
-        self.generated_images = []
         self.preview_image = None
-        self.max_display_items = 50
-        self.batch_size = 1000
+        self.dataset = None  # 当前输入的 InputDataset，输入或分隔符变化时重建
+        self.file_dataset = None  # 文件模式下 mmap 打开的数据集（文件不读入内存）
+        self.index_thread = None
+        self._preview_request = 0  # 最新一次预览请求的序号
+        self._preview_threads = []
+        self._preview_pages = None  # 当前任务的 PreviewPages（版面规划完成后设置）
+        self._preview_page = 0
+        self._thumb_wanted = []
+        self.thumb_timer = QTimer()
+        self.thumb_timer.setSingleShot(True)
+        self.thumb_timer.timeout.connect(self._flush_preview_wants)
+        self.memory_governor = MemoryGovernor()
         self.debounce_timer = QTimer()
         self.debounce_timer.setSingleShot(True)
         self.debounce_timer.timeout.connect(self._on_param_changed)
 
         self._build_ui()
         self._apply_stylesheet()
+        self._connect_param_signals()
 
     def _apply_stylesheet(self):
         self.setStyleSheet("""
@@ -854,16 +404,98 @@ class MainWindow(QWidget):
         input_layout = QHBoxLayout()
         self.text_input = QTextEdit()
         self.text_input.setPlaceholderText("输入要编码的内容，或使用右侧文件上传按钮")
-        input_layout.addWidget(self.text_input, 3)
+        self.text_input.textChanged.connect(self._invalidate_dataset)
+
+        # 文件模式：只显示文件信息和可见行，文件保留在磁盘上
+        file_panel = QWidget()
+        file_layout = QVBoxLayout(file_panel)
+        file_layout.setContentsMargins(0, 0, 0, 0)
+        self.file_path_label = QLabel()
+        self.file_path_label.setWordWrap(True)
+        self.file_stats_label = QLabel()
+
+        # 表格文件（CSV / XLSX）：选择数据列和标签列
+        self.table_options = QWidget()
+        table_layout = QHBoxLayout(self.table_options)
+        table_layout.setContentsMargins(0, 0, 0, 0)
+        table_layout.addWidget(QLabel("数据列："))
+        self.data_column_combo = QComboBox()
+        self.data_column_combo.currentIndexChanged.connect(self._on_table_options_changed)
+        table_layout.addWidget(self.data_column_combo, 1)
+        table_layout.addWidget(QLabel("标签列："))
+        self.label_column_combo = QComboBox()
+        self.label_column_combo.currentIndexChanged.connect(self._on_table_options_changed)
+        table_layout.addWidget(self.label_column_combo, 1)
+        self.header_chk = QCheckBox("首行为表头")
+        self.header_chk.setChecked(True)
+        self.header_chk.toggled.connect(self._on_table_options_changed)
+        table_layout.addWidget(self.header_chk)
+        self.table_options.setVisible(False)
+
+        self.file_model = DatasetListModel(self)
+        self.file_list_view = QListView()
+        self.file_list_view.setUniformItemSizes(True)
+        self.file_list_view.setModel(self.file_model)
+        file_layout.addWidget(self.file_path_label)
+        file_layout.addWidget(self.file_stats_label)
+        file_layout.addWidget(self.table_options)
+        file_layout.addWidget(self.file_list_view, 1)
+
+        # 序列号模板：按需生成，不展开成文本
+        serial_panel = QWidget()
+        serial_form = QFormLayout(serial_panel)
+        self.serial_prefix_line = QLineEdit("SN-")
+        self.serial_start_line = QLineEdit("1")
+        self.serial_stop_line = QLineEdit("1000")
+        self.serial_step_spin = QSpinBox()
+        self.serial_step_spin.setRange(-1000000, 1000000)
+        self.serial_step_spin.setValue(1)
+        self.serial_width_spin = QSpinBox()
+        self.serial_width_spin.setRange(0, 30)
+        self.serial_width_spin.setValue(6)
+        self.serial_suffix_line = QLineEdit()
+        self.serial_check_combo = QComboBox()
+        self.serial_check_combo.addItem("无", None)
+        self.serial_check_combo.addItem("EAN", "ean")
+        self.serial_check_combo.addItem("Luhn", "luhn")
+        self.serial_summary_label = QLabel()
+        self.serial_summary_label.setWordWrap(True)
+        serial_form.addRow("前缀：", self.serial_prefix_line)
+        serial_form.addRow("起始值：", self.serial_start_line)
+        serial_form.addRow("结束值（含）：", self.serial_stop_line)
+        serial_form.addRow("步长：", self.serial_step_spin)
+        serial_form.addRow("补零位数：", self.serial_width_spin)
+        serial_form.addRow("后缀：", self.serial_suffix_line)
+        serial_form.addRow("校验位：", self.serial_check_combo)
+        serial_form.addRow(self.serial_summary_label)
+        for line in (self.serial_prefix_line, self.serial_start_line, self.serial_stop_line, self.serial_suffix_line):
+            line.textChanged.connect(self._update_serial_summary)
+        for spin in (self.serial_step_spin, self.serial_width_spin):
+            spin.valueChanged.connect(self._update_serial_summary)
+        self.serial_check_combo.currentIndexChanged.connect(self._update_serial_summary)
+
+        self.input_stack = QStackedWidget()
+        self.input_stack.addWidget(self.text_input)
+        self.input_stack.addWidget(file_panel)
+        self.input_stack.addWidget(serial_panel)
+        input_layout.addWidget(self.input_stack, 3)
 
         right_col = QVBoxLayout()
         self.load_file_btn = QPushButton("上传文件")
         self.load_file_btn.clicked.connect(self.load_file)
         right_col.addWidget(self.load_file_btn)
+        self.serial_btn = QPushButton("序列号模板")
+        self.serial_btn.clicked.connect(self.show_serial_template)
+        right_col.addWidget(self.serial_btn)
+        self.close_file_btn = QPushButton("改为手动输入")
+        self.close_file_btn.clicked.connect(self.close_file)
+        self.close_file_btn.setVisible(False)
+        right_col.addWidget(self.close_file_btn)
         right_col.addSpacing(10)
         right_col.addWidget(QLabel("分隔符："))
         self.sep_combo = QComboBox()
-        self.sep_combo.addItems(["自动", ",", ";", "换行"])
+        self.sep_combo.addItems(list(SEPARATORS))
+        self.sep_combo.currentTextChanged.connect(self._on_sep_changed)
         right_col.addWidget(self.sep_combo)
         right_col.addStretch()
         input_layout.addLayout(right_col, 1)
@@ -880,10 +512,6 @@ class MainWindow(QWidget):
         left_layout.addWidget(self.tabs, 1)
 
         bottom_layout = QHBoxLayout()
-        self.progress_bar = QProgressBar()
-        self.progress_bar.setVisible(False)
-        bottom_layout.addWidget(self.progress_bar, 3)
-
         bottom_layout.addWidget(QLabel("页面尺寸："))
         self.page_size_combo = QComboBox()
         self.page_size_combo.addItems(["A3", "A4", "A5"])
@@ -906,6 +534,37 @@ class MainWindow(QWidget):
         self.export_format_combo = QComboBox()
         self.export_format_combo.addItems(["PDF", "PNG", "JPG"])
         bottom_layout.addWidget(self.export_format_combo)
+
+        bottom_layout.addWidget(QLabel("PDF 模式："))
+        self.pdf_mode_combo = QComboBox()
+        self.pdf_mode_combo.addItems(["位图", "矢量"])
+        bottom_layout.addWidget(self.pdf_mode_combo)
+
+        bottom_layout.addWidget(QLabel("渲染进程数："))
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 128)
+        self.workers_spin.setValue(os.cpu_count() or 1)
+        bottom_layout.addWidget(self.workers_spin)
+
+        bottom_layout.addWidget(QLabel("PDF 分段（页/文件，0 不分段）："))
+        self.pages_per_pdf_spin = QSpinBox()
+        self.pages_per_pdf_spin.setRange(0, 100000)
+        self.pages_per_pdf_spin.setValue(0)
+        bottom_layout.addWidget(self.pages_per_pdf_spin)
+
+        bottom_layout.addWidget(QLabel("内存上限（MB）："))
+        self.memory_budget_spin = QSpinBox()
+        self.memory_budget_spin.setRange(256, 1024 * 1024)
+        self.memory_budget_spin.setSingleStep(256)
+        self.memory_budget_spin.setValue(DEFAULT_BUDGET_MB)
+        self.memory_budget_spin.valueChanged.connect(self._on_memory_budget_changed)
+        bottom_layout.addWidget(self.memory_budget_spin)
+        self.profile_memory_chk = QCheckBox("内存分析")
+        self.profile_memory_chk.setToolTip("记录导出过程的内存时间线和各阶段峰值分配，报告保存在输出旁（较慢）")
+        bottom_layout.addWidget(self.profile_memory_chk)
+        self.trace_chk = QCheckBox("时间线")
+        self.trace_chk.setToolTip("记录导出每条、每页和写入的时间线（Chrome Trace JSON，可用 Perfetto 打开）")
+        bottom_layout.addWidget(self.trace_chk)
         self.export_btn = QPushButton("导出结果")
         self.export_btn.clicked.connect(self.export_results)
         bottom_layout.addWidget(self.export_btn)
@@ -913,8 +572,25 @@ class MainWindow(QWidget):
 
         main_layout.addLayout(left_layout, 2)
 
-        # 右侧：预览区域
+        # 右侧：预览区域（整个任务的任意一页 + 缩略图列表）
         right_layout = QVBoxLayout()
+        nav_layout = QHBoxLayout()
+        self.prev_page_btn = QPushButton("上一页")
+        self.prev_page_btn.clicked.connect(lambda: self.page_spin.setValue(self.page_spin.value() - 1))
+        nav_layout.addWidget(self.prev_page_btn)
+        self.page_spin = QSpinBox()
+        self.page_spin.setRange(1, 1)
+        self.page_spin.setKeyboardTracking(False)
+        self.page_spin.valueChanged.connect(lambda v: self._show_preview_page(v - 1))
+        nav_layout.addWidget(self.page_spin)
+        self.page_count_label = QLabel("/ 0 页")
+        nav_layout.addWidget(self.page_count_label)
+        self.next_page_btn = QPushButton("下一页")
+        self.next_page_btn.clicked.connect(lambda: self.page_spin.setValue(self.page_spin.value() + 1))
+        nav_layout.addWidget(self.next_page_btn)
+        nav_layout.addStretch()
+        right_layout.addLayout(nav_layout)
+
         self.scroll_area = QScrollArea()
         self.scroll_widget = QWidget()
         self.preview_label = QLabel()
@@ -923,7 +599,19 @@ class MainWindow(QWidget):
         self.scroll_widget.layout().addWidget(self.preview_label)
         self.scroll_area.setWidgetResizable(True)
         self.scroll_area.setWidget(self.scroll_widget)
-        right_layout.addWidget(self.scroll_area)
+        right_layout.addWidget(self.scroll_area, 1)
+
+        self.thumb_model = PageThumbModel(self._request_thumb, self)
+        self.thumb_view = QListView()
+        self.thumb_view.setViewMode(QListView.IconMode)
+        self.thumb_view.setFlow(QListView.LeftToRight)
+        self.thumb_view.setWrapping(False)
+        self.thumb_view.setUniformItemSizes(True)
+        self.thumb_view.setIconSize(QSize(110, 150))
+        self.thumb_view.setFixedHeight(200)
+        self.thumb_view.setModel(self.thumb_model)
+        self.thumb_view.clicked.connect(lambda index: self.page_spin.setValue(index.row() + 1))
+        right_layout.addWidget(self.thumb_view)
         main_layout.addLayout(right_layout, 3)
 
         self.setLayout(main_layout)
@@ -939,13 +627,34 @@ class MainWindow(QWidget):
         self.bar_auto_size_chk.setVisible(is_horizontal)
 
     def _connect_param_signals(self):
-        pass  # 移除自动更新预览的信号连接
+        """参数控件变化时（防抖后）在后台重新渲染已显示的预览"""
+        for spin in self.tabs.findChildren(QSpinBox):
+            spin.valueChanged.connect(self._debounce_update_preview)
+        for combo in self.tabs.findChildren(QComboBox):
+            combo.currentIndexChanged.connect(self._debounce_update_preview)
+        for chk in self.tabs.findChildren(QCheckBox):
+            chk.toggled.connect(self._debounce_update_preview)
+        for line in self.tabs.findChildren(QLineEdit):
+            line.textChanged.connect(self._debounce_update_preview)
+        for combo in (self.page_size_combo, self.arrangement_combo, self.cols_per_row_combo):
+            combo.currentIndexChanged.connect(self._debounce_update_preview)
+        self.tabs.currentChanged.connect(self._debounce_update_preview)
 
     def _debounce_update_preview(self):
-        pass  # 移除防抖更新逻辑
+        self.debounce_timer.start(PREVIEW_DEBOUNCE_MS)
 
     def _on_param_changed(self):
-        pass  # 移除参数变化时的自动更新
+        # 只更新已生成过的预览，不在调整参数时自动开始生成
+        if self.preview_image is None or not self._input_dataset():
+            return
+        mode = 'qr' if self.tabs.currentWidget() == self.qr_tab else 'barcode'
+        auto_size = self.qr_auto_size_chk.isChecked() if mode == 'qr' else self.bar_auto_size_chk.isChecked()
+        self._render_preview(auto_size)
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.preview_image is not None:
+            self._debounce_update_preview()
 
     def _build_qr_tab(self):
         layout = QHBoxLayout()
@@ -1165,128 +874,191 @@ class MainWindow(QWidget):
             target_lineedit.setText(hexv)
 
     def load_file(self):
-        path, _ = QFileDialog.getOpenFileName(self, "选择文件", "", "文本文件 (*.txt *.csv);;所有文件 (*)")
+        path, _ = QFileDialog.getOpenFileName(self, "选择文件", "", "文本/表格文件 (*.txt *.csv *.xlsx);;所有文件 (*)")
         if not path:
             return
         try:
-            with open(path, 'r', encoding='utf-8') as f:
-                data = f.read()
-            self.text_input.setPlainText(data)
-            QMessageBox.information(self, "文件加载", f"已加载 {os.path.basename(path)}")
+            self._open_file_dataset(path)
+        except Exception as e:
+            QMessageBox.critical(self, "文件错误", f"读取失败: {e}")
+
+    def _open_file_dataset(self, path, data_column=0, label_column=None):
+        """
+        文本文件 mmap 打开，CSV / XLSX 按表格逐行读取选定列；都在后台建立索引，列表只解码可见的行
+        """
+        is_table = path.lower().endswith((".csv", ".xlsx", ".xlsm"))
+        if is_table:
+            dataset = TableDataset(path, data_column, label_column, header=self.header_chk.isChecked(), lazy=True)
+        else:
+            dataset = InputDataset.open(path, self.sep_combo.currentText(), lazy=True)
+        self._close_file_dataset()
+        self.table_options.setVisible(is_table)
+        if is_table:
+            self._fill_column_combos(dataset.columns, data_column, label_column)
+        self.file_dataset = dataset
+        self.file_model.set_dataset(dataset)
+        self.file_path_label.setText(f"文件：{path}")
+        self._update_file_stats()
+        self.input_stack.setCurrentIndex(1)
+        self.close_file_btn.setVisible(True)
+        self.index_thread = DatasetIndexThread(dataset, parent=self)
+        self.index_thread.progress.connect(self._on_index_progress)
+        self.index_thread.start()
+
+    def _fill_column_combos(self, columns, data_column, label_column):
+        for combo in (self.data_column_combo, self.label_column_combo):
+            combo.blockSignals(True)
+            combo.clear()
+        self.data_column_combo.addItems([str(c) for c in columns])
+        self.label_column_combo.addItem("（无）")
+        self.label_column_combo.addItems([str(c) for c in columns])
+        self.data_column_combo.setCurrentIndex(data_column)
+        self.label_column_combo.setCurrentIndex(0 if label_column is None else label_column + 1)
+        for combo in (self.data_column_combo, self.label_column_combo):
+            combo.blockSignals(False)
+
+    def _on_table_options_changed(self):
+        if not isinstance(self.file_dataset, TableDataset):
+            return
+        label_index = self.label_column_combo.currentIndex()
+        try:
+            self._open_file_dataset(self.file_dataset.path, max(0, self.data_column_combo.currentIndex()),
+                                    label_index - 1 if label_index > 0 else None)
         except Exception as e:
             QMessageBox.critical(self, "文件错误", f"读取失败: {e}")
 
+    def _stop_preview(self):
+        """停止后台预览并清空页面缓存（数据源关闭前调用）"""
+        self._preview_request += 1
+        for thread in self._preview_threads:
+            thread.stop()
+            thread.wait()
+        self._preview_pages = None
+        self.thumb_model.set_pages(None)
+
+    def _close_file_dataset(self):
+        if self.file_dataset is not None:
+            self._stop_preview()
+        if self.index_thread is not None:
+            self.index_thread.stop()
+            self.index_thread.wait()
+            self.index_thread = None
+        if self.file_dataset is not None:
+            self.file_model.set_dataset(None)
+            self.file_dataset.close()
+            self.file_dataset = None
+
+    def close_file(self):
+        self._close_file_dataset()
+        self.table_options.setVisible(False)
+        self.input_stack.setCurrentIndex(0)
+        self.close_file_btn.setVisible(False)
+
+    def closeEvent(self, event):
+        self._stop_preview()
+        self._close_file_dataset()
+        super().closeEvent(event)
+
+    def _on_index_progress(self, rows, done_bytes, total_bytes):
+        self.file_model.sync_rows()
+        self._update_file_stats()
+
+    def _update_file_stats(self):
+        ds = self.file_dataset
+        if ds is None:
+            return
+        if ds.complete:
+            rows = f"共 {len(ds):,} 条"
+        else:
+            percent = ds.indexed_bytes * 100 // max(1, ds.size_bytes)
+            rows = f"正在索引… 已有 {len(ds):,} 条（{percent}%）"
+        kind = "格式" if isinstance(ds, TableDataset) else "检测到的分隔符"
+        self.file_stats_label.setText(f"{rows}，{kind}：{ds.detected_separator()}")
+
+    def _on_sep_changed(self):
+        self._invalidate_dataset()
+        if isinstance(self.file_dataset, InputDataset):
+            self._open_file_dataset(self.file_dataset.path)
+
+    def _dataset_ready(self) -> bool:
+        """文件模式下索引未完成时提示稍候"""
+        if self.file_dataset is not None and not self.file_dataset.complete:
+            QMessageBox.information(self, "请稍候", "正在为文件建立索引，完成后即可导出。")
+            return False
+        return True
+
     def choose_font_file(self, lineedit):
         path, _ = QFileDialog.getOpenFileName(self, "选择字体文件（.ttf/.otf）", "", "字体文件 (*.ttf *.otf);;所有文件 (*)")
         if path:
             lineedit.setText(path)
 
-    def _parse_input(self) -> list:
-        raw = self.text_input.toPlainText().strip()
-        if not raw:
-            return []
-        sep = self.sep_combo.currentText()
-        if sep == "自动":
-            parts = re.split(r'[,\n;\r]+', raw)
-        elif sep == ",":
-            parts = [p.strip() for p in raw.split(",")]
-        elif sep == ";":
-            parts = [p.strip() for p in raw.split(";")]
-        elif sep == "换行":
-            parts = [p.strip() for p in re.split(r'[\r\n]+', raw)]
+    def show_serial_template(self):
+        self._close_file_dataset()
+        self.table_options.setVisible(False)
+        self.input_stack.setCurrentIndex(2)
+        self.close_file_btn.setVisible(True)
+        self._update_serial_summary()
+
+    def _serial_template(self) -> SerialTemplate:
+        return SerialTemplate(self.serial_prefix_line.text(), int(self.serial_start_line.text()),
+                              int(self.serial_stop_line.text()), self.serial_step_spin.value(),
+                              self.serial_width_spin.value(), self.serial_suffix_line.text(),
+                              self.serial_check_combo.currentData())
+
+    def _update_serial_summary(self):
+        try:
+            serials = self._serial_template()
+        except ValueError as e:
+            self.serial_summary_label.setText(f"模板无效：{e}")
+            return
+        if not serials:
+            self.serial_summary_label.setText("共 0 条")
         else:
-            parts = re.split(r'[,\n;\r]+', raw)
-        parts = [p for p in parts if p]
-        return parts
+            self.serial_summary_label.setText(f"共 {len(serials):,} 条：{serials[0]} … {serials[-1]}")
+
+    def _input_dataset(self):
+        """
+        当前输入的数据集：序列号模板、文件（mmap / 表格）或文本；
+        文本只在输入或分隔符变化后重建一次索引
+        """
+        if self.input_stack.currentIndex() == 2:
+            try:
+                return self._serial_template()
+            except ValueError:
+                return []
+        if self.file_dataset is not None:
+            return self.file_dataset
+        if self.dataset is None:
+            self.dataset = InputDataset.from_text(self.text_input.toPlainText(), self.sep_combo.currentText())
+        return self.dataset
+
+    def _input_labels(self):
+        """表格文件选了标签列时返回平行的标签序列，否则为 None"""
+        return getattr(self._input_dataset(), "labels", None)
+
+    def _invalidate_dataset(self):
+        self.dataset = None
 
     def on_generate_qr(self):
-        items = self._parse_input()
-        if not items:
-            QMessageBox.warning(self, "无数据", "请先在上方输入或上传要生成的数据。")
-            return
-        preview_items = items[:self.max_display_items]
-        v_index = self.qr_version_combo.currentIndex()
-        version = None if v_index == 0 else self.qr_version_combo.currentData()
-        options = {
-            'version': version,
-            'error_correction': self.qr_ec_combo.currentText(),
-            'out_px': self.qr_size_spin.value(),
-            'left_right_padding_px': self.qr_left_right_padding_spin.value(),
-            'top_bottom_padding_px': self.qr_top_bottom_padding_spin.value(),
-            'module_color': self.qr_module_color_display.text() or "#000000",
-            'back_color': self.qr_back_color_display.text() or "#FFFFFF",
-            'outer_eye_color': self.qr_outer_eye_display.text() or None,
-            'inner_eye_color': self.qr_inner_eye_display.text() or None,
-            'show_text': self.qr_show_text_chk.isChecked(),
-            'font_path': self.qr_font_line.text() or None,
-            'text_pos': 'top' if self.qr_text_pos_combo.currentText() == '上方' else 'bottom',
-            'text_align': {'左': 'left', '中': 'center', '右': 'right'}[self.qr_text_align_combo.currentText()],
-            'text_margin': self.qr_text_margin_spin.value(),
-            'text_size': self.qr_text_size_spin.value(),
-            'text_bold': self.qr_text_bold_chk.isChecked(),
-            'text_italic': self.qr_text_italic_chk.isChecked()
-        }
-        auto_size = self.qr_auto_size_chk.isChecked()
-        self.clear_display()
-        self.start_generation(preview_items, mode='qr', options=options, auto_size=auto_size)
+        self._generate(self.qr_auto_size_chk.isChecked())
 
     def on_generate_barcode(self):
-        items = self._parse_input()
-        if not items:
+        self._generate(self.bar_auto_size_chk.isChecked())
+
+    def _generate(self, auto_size):
+        """生成：按当前参数直接渲染预览页（与导出使用同一版面）"""
+        if not self._input_dataset():
             QMessageBox.warning(self, "无数据", "请先在上方输入或上传要生成的数据。")
             return
-        preview_items = items[:self.max_display_items]
-        options = {
-            'barcode_type': self.barcode_type_combo.currentText(),
-            'bar_width_px': self.bar_width_spin.value(),
-            'bar_height_px': self.bar_height_spin.value(),
-            'margin_px': self.bar_margin_spin.value(),
-            'bar_color': self.bar_color_display.text() or "#000000",
-            'bg_transparent': self.bar_bg_trans_check.isChecked(),
-            'bg_color': self.bar_bg_color_display.text() or "#FFFFFF",
-            'show_text': self.bar_show_text_chk.isChecked(),
-            'font_path': self.bar_font_line.text() or None,
-            'text_pos': 'top' if self.bar_text_pos_combo.currentText() == '上方' else 'bottom',
-            'text_align': {'左': 'left', '中': 'center', '右': 'right'}[self.bar_text_align_combo.currentText()],
-            'text_margin': self.bar_text_margin_spin.value(),
-            'text_size': self.bar_text_size_spin.value(),
-            'text_bold': self.bar_text_bold_chk.isChecked(),
-            'text_italic': self.bar_text_italic_chk.isChecked()
-        }
-        auto_size = self.bar_auto_size_chk.isChecked()
         self.clear_display()
-        self.start_generation(preview_items, mode='barcode', options=options, auto_size=auto_size)
+        self._render_preview(auto_size)
 
     def clear_display(self):
         self.preview_label.clear()
-        self.generated_images = []
         self.preview_image = None
-        gc.collect()
-
-    def start_generation(self, items, mode, options, auto_size):
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(items))
-        self.progress_bar.setValue(0)
-        self.generator_thread = GeneratorThread(items, mode, options, batch_size=self.batch_size, max_display=self.max_display_items)
-        self.generator_thread.image_generated.connect(lambda idx, img, text: self.on_image_generated(idx, img, text, auto_size))
-        self.generator_thread.progress.connect(self.on_progress)
-        self.generator_thread.finished_all.connect(self.on_generation_finished)
-        self.generator_thread.error.connect(self.on_generation_error)
-        self.generator_thread.start()
-
-    def on_image_generated(self, idx, pil_img, text, auto_size):
-        if idx < self.max_display_items:
-            self.generated_images.append((text, pil_img))
-        if idx == min(self.max_display_items - 1, len(self._parse_input()) - 1):
-            self._render_preview(auto_size)
+        self.memory_governor.checkpoint()
 
     def _render_preview(self, auto_size):
-        a4_width, a4_height = PAGE_SIZES[self.page_size_combo.currentText()]
-        margin = self.qr_left_right_padding_spin.value() if self.tabs.currentWidget() == self.qr_tab else self.bar_margin_spin.value()
-        spacing = self.qr_top_bottom_padding_spin.value() if self.tabs.currentWidget() == self.qr_tab else self.bar_text_margin_spin.value()
-        codes_per_row = int(self.cols_per_row_combo.currentText()) if self.arrangement_combo.currentText() == "横向排列" else 1
-        codes_per_col = 3 if self.arrangement_combo.currentText() == "竖向排列" else 1
-        codes_per_page = min(codes_per_row * codes_per_col, self.max_display_items)
         mode = 'qr' if self.tabs.currentWidget() == self.qr_tab else 'barcode'
 
         # 调整图像大小
@@ -1326,113 +1098,100 @@ class MainWindow(QWidget):
             'text_italic': self.bar_text_italic_chk.isChecked()
         }
 
-        if auto_size and self.arrangement_combo.currentText() == "横向排列":
-            available_width = (a4_width - 2 * margin - (codes_per_row - 1) * spacing) // codes_per_row
-            options['out_px'] = max(100, available_width)
-            if mode == 'barcode':
-                options['bar_width_px'] = max(1, available_width // 50)  # 假设条宽比例
-
-        # 生成页面图像
-        output_img = Image.new("RGB", (a4_width, a4_height), (255, 255, 255))
-        draw = ImageDraw.Draw(output_img)
-        x, y = margin, margin
-        max_width = 0
-        max_height = 0
-
-        # 重新生成图像以确保使用最新的参数
-        self.generated_images = []
-        for text in self._parse_input()[:codes_per_page]:
-            img = generate_qr_pil(text, **options) if mode == 'qr' else generate_barcode_pil(text, **options)
-            self.generated_images.append((text, img))
-            max_width = max(max_width, img.width)
-            max_height = max(max_height, img.height)
-
-        for i, (text, pil_img) in enumerate(self.generated_images):
-            img = pil_img.convert("RGB") if pil_img.mode in ("RGBA", "P") else pil_img
-            img = img.resize((max_width, max_height), Image.LANCZOS)
-            if self.arrangement_combo.currentText() == "横向排列":
-                if x + max_width > a4_width - margin:
-                    x = margin
-                    y += max_height + spacing
-                if y + max_height > a4_height - margin:
-                    break
-                output_img.paste(img, (x, y))
-                draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                x += max_width + spacing
-            else:
-                if y + max_height > a4_height - margin:
-                    break
-                output_img.paste(img, (x, y))
-                draw.text((x, y + max_height + 10), text[:20], fill=(0, 0, 0))
-                y += max_height + spacing
-            img.close()
-            gc.collect()
-
-        # 缩放预览图像以适应窗口
-        scale = min(self.scroll_area.width() / a4_width, self.scroll_area.height() / a4_height, 1.0)
-        preview_width = int(a4_width * scale)
-        preview_height = int(a4_height * scale)
-        output_img = output_img.resize((preview_width, preview_height), Image.LANCZOS)
-        self.preview_image = output_img
-        pix = pil_image_to_qpixmap(self.preview_image)
-        self.preview_label.setPixmap(pix)
-        self.preview_label.setFixedSize(preview_width, preview_height)
-        gc.collect()
-
-    def _on_thumb_clicked(self, pil_img, text, ev):
-        w = QWidget()
-        w.setWindowTitle(text[:50])
-        v = QVBoxLayout(w)
-        pix = pil_image_to_qpixmap(pil_img)
-        lbl = QLabel()
-        lbl.setPixmap(pix)
-        lbl.setScaledContents(True)
-        lbl.setMinimumSize(300, 300)
-        v.addWidget(lbl)
-        btn = QPushButton("保存此图")
-        def save_one():
-            fmt = QFileDialog.getSaveFileName(self, "保存图片", f"{text}.png", "PNG 文件 (*.png);;JPG 文件 (*.jpg)")
-            if fmt and fmt[0]:
-                fp = fmt[0]
-                try:
-                    pil_img.save(fp)
-                    QMessageBox.information(self, "保存", f"已保存到 {fp}")
-                except Exception as e:
-                    QMessageBox.critical(self, "保存失败", str(e))
-        btn.clicked.connect(save_one)
-        v.addWidget(btn)
-        w.resize(600, 600)
-        w.show()
-
-    def on_progress(self, p, total):
-        self.progress_bar.setValue(p)
-        if p % 1000 == 0:
-            QApplication.processEvents()
-
-    def on_generation_error(self, error_msg):
-        self.progress_bar.setVisible(False)
-        QMessageBox.critical(self, "生成错误", error_msg)
-        self.generator_thread = None
-
-    def on_generation_finished(self):
-        self.progress_bar.setVisible(False)
-        self.generator_thread = None
+        # 在后台规划整个任务并按预览区域的实际像素逐页渲染，参数变化时旧任务直接取消
+        self._preview_request += 1
+        for thread in self._preview_threads:
+            thread.stop()
+        self._preview_pages = None
+        viewport = self.scroll_area.viewport()
+        thread = PreviewThread(self._preview_request, mode, options, self._input_dataset(), self._input_labels(),
+                               self.page_size_combo.currentText(), self.arrangement_combo.currentText(),
+                               int(self.cols_per_row_combo.currentText()), auto_size,
+                               (viewport.width(), viewport.height()), self.memory_governor, self)
+        thread.planned.connect(self._on_preview_planned)
+        thread.rendered.connect(self._on_preview_rendered)
+        thread.error.connect(self._on_preview_error)
+        thread.finished.connect(lambda t=thread: self._on_preview_thread_finished(t))
+        self._preview_threads.append(thread)
+        thread.start()
+
+    def _on_preview_planned(self, request_id, pages):
+        if request_id != self._preview_request:
+            return
+        self._preview_pages = pages
+        self._thumb_wanted = []
+        self.thumb_model.set_pages(pages)
+        self.page_count_label.setText(f"/ {pages.pages} 页")
+        self.page_spin.blockSignals(True)
+        self.page_spin.setRange(1, max(1, pages.pages))
+        self.page_spin.blockSignals(False)
+        self._show_preview_page(min(self._preview_page, pages.pages - 1))
+
+    def _show_preview_page(self, page):
+        """显示第 page 页（从 0 开始）：已缓存的立即显示，否则交给后台优先渲染"""
+        self._preview_page = max(0, page)
+        pages = self._preview_pages
+        if pages is None:
+            return
+        if self.page_spin.value() != page + 1:
+            self.page_spin.blockSignals(True)
+            self.page_spin.setValue(page + 1)
+            self.page_spin.blockSignals(False)
+        self.prev_page_btn.setEnabled(page > 0)
+        self.next_page_btn.setEnabled(page + 1 < pages.pages)
+        self.thumb_view.scrollTo(self.thumb_model.index(page))
+        img = pages.cached(page)
+        if img is not None:
+            self._set_preview_image(img)
+        self._flush_preview_wants()
+
+    def _request_thumb(self, page):
+        # 缩略图请求在一次绘制中陆续到达，合并后再交给后台
+        if page not in self._thumb_wanted:
+            self._thumb_wanted.append(page)
+        self.thumb_timer.start(0)
+
+    def _flush_preview_wants(self):
+        pages = self._preview_pages
+        if pages is None or not self._preview_threads:
+            return
+        page = self._preview_page
+        wanted = [(p, 0) for p in (page, page + 1) if p < pages.pages and pages.cached(p) is None]
+        wanted += [(p, THUMB_LEVEL) for p in self._thumb_wanted if pages.cached(p, THUMB_LEVEL) is None]
+        self._thumb_wanted = []
+        self._preview_threads[-1].want(wanted)
+
+    def _on_preview_rendered(self, request_id, page, level, img):
+        if request_id != self._preview_request:
+            return
+        if level == THUMB_LEVEL:
+            self.thumb_model.page_updated(page)
+        elif level == 0 and page == self._preview_page:
+            self._set_preview_image(img)
+
+    def _set_preview_image(self, img):
+        self.preview_image = img
+        self.preview_label.setPixmap(pil_image_to_qpixmap(img))
+        self.preview_label.setFixedSize(img.width, img.height)
+
+    def _on_preview_error(self, request_id, error_msg):
+        # 拖动参数时可能连续出错，只在预览区显示，不弹窗
+        if request_id == self._preview_request:
+            self.preview_label.setText(error_msg)
+
+    def _on_preview_thread_finished(self, thread):
+        if thread in self._preview_threads:
+            self._preview_threads.remove(thread)
+        thread.deleteLater()
 
     def export_results(self):
-        items = self._parse_input()
+        if not self._dataset_ready():
+            return
+        items = self._input_dataset()
         if not items:
             QMessageBox.warning(self, "没有数据", "请先在上方输入或上传要生成的数据。")
             return
 
-        if len(items) > 10000:
-            reply = QMessageBox.question(
-                self, "数据量警告",
-                f"检测到 {len(items)} 条数据，导出可能需要较长时间，预计内存占用 {len(items) * 0.36:.1f} MB。是否继续？",
-                QMessageBox.Yes | QMessageBox.No
-            )
-            if reply == QMessageBox.No:
-                return
-
         mode = 'qr' if self.tabs.currentWidget() == self.qr_tab else 'barcode'
         options = {
             'version': None if self.qr_version_combo.currentIndex() == 0 else self.qr_version_combo.currentData(),
@@ -1484,18 +1243,53 @@ class MainWindow(QWidget):
             if not path:
                 return
 
+        separate_files = False
+        if fmt != "PDF":
+            codes_per_page = image_codes_per_page(arrangement, cols_per_row)
+            if len(items) > codes_per_page:
+                reply = QMessageBox.question(
+                    self, "数据量警告",
+                    f"当前 {len(items)} 条数据超过单页容量（{codes_per_page} 个）。选择“是”保存为单独文件，选择“否”仅导出单页。",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                separate_files = reply == QMessageBox.Yes
+
+        # 按页面位图大小和在途页面数估算峰值内存，数据量大或超出内存上限时提醒
+        workers = self.workers_spin.value()
+        estimate = estimate_export_memory(self.memory_governor, fmt, page_size, workers, separate_files)
+        if len(items) > 10000 or estimate > self.memory_governor.budget:
+            reply = QMessageBox.question(
+                self, "数据量警告",
+                f"检测到 {len(items)} 条数据，导出可能需要较长时间，预计内存峰值 {estimate / MB:.1f} MB"
+                f"（上限 {self.memory_governor.budget / MB:.0f} MB）。是否继续？",
+                QMessageBox.Yes | QMessageBox.No
+            )
+            if reply == QMessageBox.No:
+                return
+
         self.setEnabled(False)
 
         self.progress_dialog = ProgressDialog(len(items), self)
-        self.export_thread = ExportThread(items, mode, options, fmt, arrangement, cols_per_row, path, page_size, auto_size, self)
+        pages_per_pdf = self.pages_per_pdf_spin.value()
+        pdf_mode = 'vector' if self.pdf_mode_combo.currentText() == "矢量" else 'raster'
+        self.export_thread = ExportThread(items, mode, options, fmt, arrangement, cols_per_row, path, page_size, auto_size,
+                                          pages_per_pdf=pages_per_pdf, pdf_mode=pdf_mode,
+                                          workers=workers, separate_files=separate_files,
+                                          labels=self._input_labels(), governor=self.memory_governor,
+                                          profile_memory=self.profile_memory_chk.isChecked(),
+                                          trace=self.trace_chk.isChecked(), parent=self)
         self.progress_dialog.cancel_btn.clicked.connect(self.cancel_export)
-        self.export_thread.progress.connect(self.progress_dialog.update_progress)
+        self.export_thread.report.connect(self.progress_dialog.update_report)
         self.export_thread.status.connect(self.progress_dialog.update_status)
         self.export_thread.finished.connect(self.on_export_finished)
         self.export_thread.error.connect(self.on_export_error)
         self.export_thread.start()
         self.progress_dialog.exec()
 
+    def _on_memory_budget_changed(self, value):
+        # 新的上限对之后启动的生成 / 预览 / 导出生效
+        self.memory_governor = MemoryGovernor(value * MB)
+
     def cancel_export(self):
         if self.export_thread:
             self.export_thread.stop()
@@ -1505,22 +1299,38 @@ class MainWindow(QWidget):
         self.setEnabled(True)
         QMessageBox.information(self, "导出取消", "导出过程已取消，临时文件已清理。")
 
+    def _with_reports(self, message):
+        """在提示后附上本次导出写出的内存报告 / 时间线路径"""
+        exporter = self.export_thread.exporter if self.export_thread else None
+        if exporter is None or not message:
+            return message
+        if exporter.memory_report:
+            message += f"\n内存报告：{exporter.memory_report}"
+        if exporter.trace_file:
+            message += f"\n时间线：{exporter.trace_file}"
+        return message
+
     def on_export_finished(self, message):
         self.progress_dialog.close()
         self.setEnabled(True)
+        message = self._with_reports(message)
         self.export_thread = None
         if message:
             QMessageBox.information(self, "导出成功", message)
-        gc.collect()
+        self.memory_governor.checkpoint()
+        logger.info(f"Memory governor: {self.memory_governor.stats()}")
 
     def on_export_error(self, error_msg):
         self.progress_dialog.close()
         self.setEnabled(True)
+        error_msg = self._with_reports(error_msg)
         self.export_thread = None
         QMessageBox.critical(self, "导出失败", error_msg)
-        gc.collect()
+        self.memory_governor.checkpoint()
 
 def main():
+    # 日志配置放在入口，导入本模块或 qrlist 时不修改全局 logging
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     app = QApplication(sys.argv)
     app.setFont(QFont("Segoe UI", 10))
     win = MainWindow()
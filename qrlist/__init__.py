@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+批量二维码 / 条形码生成核心：渲染、排版与导出，不依赖 Qt。
+桌面界面（app2.py）和命令行（python -m qrlist）共用这里的实现。
+包级名称按需导入（见 _EXPORTS）：import qrlist.render 只加载渲染所需的模块，
+表格读取、内存分析、时间线等模块在第一次访问对应名称时才导入
+"""
+
+from importlib import import_module
+
+# 名称 -> 所在子模块
+_EXPORTS = {}
+for _module, _names in {
+    "data": ("SEPARATORS", "parse_items", "InputDataset"),
+    "tabular": ("TableDataset",),
+    "serials": ("SerialTemplate", "ean_check_digit", "luhn_check_digit"),
+    "render": ("hex_to_rgba", "FontCache", "label_font_cache",
+               "rasterize_qr_matrix", "QRMatrixCache", "qr_matrix_cache", "generate_qr_pil",
+               "build_barcode_modules", "render_bar_pattern", "generate_barcode_pil",
+               "qr_vector_shapes", "barcode_vector_shapes"),
+    "pdf": ("StreamingPDFWriter", "RasterPDFPage", "VectorPDFPage"),
+    "layout": ("PAGE_SIZES", "page_slots", "auto_cell_width", "image_codes_per_page", "PageLayout"),
+    "timing": ("STAGES", "StageTimings", "stage"),
+    "memory": ("DEFAULT_BUDGET_MB", "MB", "process_rss", "MemoryGovernor"),
+    "memprofile": ("MemoryProfiler",),
+    "trace": ("TraceRecorder", "span"),
+    "progress": ("PROGRESS_INTERVAL", "ProgressReporter", "format_duration"),
+    "export": ("fill_page", "measure_cell", "plan_job_layout", "render_preview_page", "render_pdf_page",
+               "estimate_export_memory", "BatchExporter", "ExportCancelled"),
+    "preview": ("PreviewPages",),
+}.items():
+    for _name in _names:
+        _EXPORTS[_name] = _module
+del _module, _names, _name
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+"""
+无界面基准测试：固定、可复现的数据集上测量单条渲染延迟和端到端导出吞吐，结果输出为 JSON。
+用法: python -m qrlist.bench [--sizes 1k,10k,100k] [--filter qr/latency] [-o result.json]
+      python -m qrlist.bench --baseline base.json [--threshold 0.1]
+
+数据集：numeric（12 位数字序列号）、url（长 URL）、mixed（中英文混合文本），各 1k / 10k / 100k 条。
+用例：
+  qr/latency/<数据集>/ec=<L|M|Q|H>/text=<on|off>   单条二维码渲染延迟（前 --latency-items 条，冷缓存）
+  barcode/latency/<类型>                           单条条形码渲染延迟（numeric 数据集）
+  export/<pdf|png>/<模式>/<数据集>/<规模>           BatchExporter 端到端导出
+指标：items_per_s、pages_per_s、p50_ms / p95_ms / p99_ms、peak_rss（本进程，采样得到）、output_bytes。
+指定 --baseline 时逐项对比，任一指标变差超过 threshold 记为退化，退出码为 1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import threading
+
+from .render import generate_qr_pil, generate_barcode_pil, qr_matrix_cache
+from .export import BatchExporter
+from .memory import process_rss
+
+DATASET_SIZES = {"1k": 1000, "10k": 10000, "100k": 100000}
+DATASET_KINDS = ("numeric", "url", "mixed")
+EC_LEVELS = ("L", "M", "Q", "H")
+BARCODE_TYPES = ("code128", "ean13", "ean8", "upc", "code39", "itf")
+
+# 各条码类型对数据长度的要求：从 12 位序列号中截取
+BARCODE_DATA = {"ean8": lambda s: s[-7:], "upc": lambda s: s[-11:]}
+
+# 越大越好的指标；其余（延迟、内存、输出大小）越小越好
+HIGHER_IS_BETTER = ("items_per_s", "pages_per_s")
+COMPARED_METRICS = ("items_per_s", "pages_per_s", "p50_ms", "p95_ms", "peak_rss", "output_bytes")
+
+SEED = 2026
+_WORDS = ("订单", "批次", "仓库", "北京", "上海", "深圳", "发货", "检验", "合格", "编号",
+          "Order", "Batch", "Lot", "Zone", "Item", "Box", "Pallet", "QA")
+
+def make_dataset(kind: str, size: int, seed: int = SEED) -> list:
+    """第 i 条只由 (kind, seed, i) 决定，不同规模的数据集互为前缀"""
+    rng = random.Random(f"{kind}:{seed}")
+    if kind == "numeric":
+        return [f"{100000000000 + i * 7919 % 900000000000:012d}" for i in range(size)]
+    if kind == "url":
+        items = []
+        for i in range(size):
+            token = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789") for _ in range(24))
+            items.append(f"https://shop.example.com/products/{i:08d}/detail?ref=batch-print&sku={token}"
+                         f"&utm_source=label&utm_medium=qr&lang=zh-CN")
+        return items
+    if kind == "mixed":
+        return [f"{rng.choice(_WORDS)}{rng.choice(_WORDS)}-{i:06d} {rng.choice(_WORDS)} {rng.randint(1, 999)}号"
+                for i in range(size)]
+    raise ValueError(f"未知数据集：{kind}")
+
+class RSSSampler:
+    """后台线程按 interval 秒采样本进程 RSS，记录峰值"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.peak = process_rss()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, process_rss())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, process_rss())
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+def bench_latency(render, options: dict, items) -> dict:
+    """逐条渲染 items，返回延迟分布（毫秒）和吞吐。QR 矩阵缓存先清空，测的是冷编码"""
+    render(f"warmup-{len(items)}", **options).close()
+    qr_matrix_cache.clear()
+    times = []
+    with RSSSampler() as rss:
+        start = time.perf_counter()
+        for text in items:
+            t0 = time.perf_counter()
+            img = render(text, **options)
+            times.append(time.perf_counter() - t0)
+            img.close()
+        elapsed = time.perf_counter() - start
+    times.sort()
+    return {
+        "items": len(items),
+        "seconds": elapsed,
+        "items_per_s": len(items) / elapsed if elapsed else 0.0,
+        "mean_ms": elapsed * 1000 / len(items),
+        "p50_ms": _percentile(times, 0.50) * 1000,
+        "p95_ms": _percentile(times, 0.95) * 1000,
+        "p99_ms": _percentile(times, 0.99) * 1000,
+        "peak_rss": rss.peak,
+    }
+
+def _tree_bytes(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+def bench_export(fmt: str, mode: str, options: dict, items, workers: int = 1, page_size: str = "A4",
+                 cols_per_row: int = 7) -> dict:
+    """用 BatchExporter 导出到临时目录，返回吞吐、峰值 RSS 和输出大小；输出随后删除"""
+    tmp = tempfile.mkdtemp(prefix="qrlist-bench-")
+    output = os.path.join(tmp, "bench.pdf") if fmt == "PDF" else os.path.join(tmp, "images")
+    exporter = BatchExporter(items, mode, dict(options), fmt, "横向排列", cols_per_row, output, page_size, True,
+                             workers=workers, separate_files=fmt != "PDF")
+    qr_matrix_cache.clear()
+    try:
+        with RSSSampler() as rss:
+            start = time.perf_counter()
+            exporter.run()
+            elapsed = time.perf_counter() - start
+        pages = exporter.layout.pages if fmt == "PDF" and exporter.layout is not None else 0
+        return {
+            "items": exporter.total,
+            "pages": pages,
+            "seconds": elapsed,
+            "items_per_s": exporter.total / elapsed if elapsed else 0.0,
+            "pages_per_s": pages / elapsed if elapsed else 0.0,
+            "peak_rss": rss.peak,
+            "output_bytes": _tree_bytes(output),
+        }
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+def build_cases(sizes, latency_items: int, workers: int):
+    """产出 (用例名, 无参函数)；数据集按需生成"""
+    datasets = {}
+
+    def dataset(kind, size):
+        if (kind, size) not in datasets:
+            datasets[(kind, size)] = make_dataset(kind, size)
+        return datasets[(kind, size)]
+
+    for kind in DATASET_KINDS:
+        for ec in EC_LEVELS:
+            for show_text in (False, True):
+                options = {"error_correction": ec, "show_text": show_text}
+                yield (f"qr/latency/{kind}/ec={ec}/text={'on' if show_text else 'off'}",
+                       lambda kind=kind, options=options: bench_latency(
+                           generate_qr_pil, options, dataset(kind, DATASET_SIZES["1k"])[:latency_items]))
+    for barcode_type in BARCODE_TYPES:
+        convert = BARCODE_DATA.get(barcode_type, lambda s: s)
+        yield (f"barcode/latency/{barcode_type}",
+               lambda barcode_type=barcode_type, convert=convert: bench_latency(
+                   generate_barcode_pil, {"barcode_type": barcode_type},
+                   [convert(s) for s in dataset("numeric", DATASET_SIZES["1k"])[:latency_items]]))
+    for size_name in sizes:
+        size = DATASET_SIZES[size_name]
+        for kind in DATASET_KINDS:
+            yield (f"export/pdf/qr/{kind}/{size_name}",
+                   lambda kind=kind, size=size: bench_export("PDF", "qr", {"show_text": True},
+                                                             dataset(kind, size), workers))
+        yield (f"export/pdf/barcode/numeric/{size_name}",
+               lambda size=size: bench_export("PDF", "barcode", {"barcode_type": "code128"},
+                                              dataset("numeric", size), workers))
+        yield (f"export/png/qr/numeric/{size_name}",
+               lambda size=size: bench_export("PNG", "qr", {"show_text": True}, dataset("numeric", size), workers))
+
+def compare(results: dict, baseline: dict, threshold: float) -> dict:
+    """逐项对比两次结果，change 为相对变化（正数表示变好），变差超过 threshold 的计入 regressions"""
+    report = {"cases": {}, "regressions": []}
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        changes = {}
+        for key in COMPARED_METRICS:
+            old, new = base.get(key), metrics.get(key)
+            if not old or new is None:
+                continue
+            change = (new - old) / old if key in HIGHER_IS_BETTER else (old - new) / old
+            changes[key] = {"baseline": old, "current": new, "change": change}
+            if change < -threshold:
+                report["regressions"].append(f"{name}:{key}")
+        report["cases"][name] = changes
+    return report
+
+def _metadata(args) -> dict:
+    from PIL import __version__ as pillow_version
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pillow": pillow_version,
+        "cpu_count": os.cpu_count(),
+        "workers": args.workers,
+        "sizes": args.sizes,
+        "latency_items": args.latency_items,
+        "seed": SEED,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def _size_list(text: str) -> list:
+    sizes = [s.strip().lower() for s in text.split(",") if s.strip()]
+    for s in sizes:
+        if s not in DATASET_SIZES:
+            raise argparse.ArgumentTypeError(f"规模只能是 {', '.join(DATASET_SIZES)}：{s}")
+    return sizes
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m qrlist.bench", description="二维码 / 条形码渲染与导出基准测试")
+    parser.add_argument("--sizes", type=_size_list, default=list(DATASET_SIZES),
+                        help="导出用例的数据规模，逗号分隔，默认 1k,10k,100k")
+    parser.add_argument("--filter", action="append", default=[], help="只运行名称包含该子串的用例，可重复")
+    parser.add_argument("--latency-items", type=int, default=200, help="延迟用例渲染的条数")
+    parser.add_argument("--workers", type=int, default=1, help="导出用例的渲染进程数（峰值 RSS 只统计本进程）")
+    parser.add_argument("-o", "--output", help="结果 JSON 文件，默认写到标准输出")
+    parser.add_argument("--baseline", help="与之前保存的结果 JSON 对比")
+    parser.add_argument("--threshold", type=float, default=0.1, help="对比时视为退化的相对变差，默认 0.1")
+    parser.add_argument("--list", action="store_true", help="只列出用例名")
+    return parser
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    cases = [(name, run) for name, run in build_cases(args.sizes, args.latency_items, args.workers)
+             if not args.filter or any(f in name for f in args.filter)]
+    if args.list:
+        for name, _ in cases:
+            print(name)
+        return 0
+
+    results = {}
+    for name, run in cases:
+        sys.stderr.write(f"{name} ...")
+        sys.stderr.flush()
+        results[name] = run()
+        sys.stderr.write(f" {results[name]['items_per_s']:.1f} items/s\n")
+    report = {"meta": _metadata(args), "results": results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = compare(results, baseline.get("results", {}), args.threshold)
+        regressions = report["comparison"]["regressions"]
+        for name in regressions:
+            sys.stderr.write(f"退化: {name}\n")
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
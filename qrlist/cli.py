@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+命令行批量导出（不依赖 PySide6），与界面导出共用 BatchExporter。
+用法: python -m qrlist data.txt --mode qr --output out.pdf [选项]
+      python -m qrlist --serial "SN-2026-{000001..999999}" --output out.pdf [选项]
+
+进度以 JSON Lines 写到 stderr，每行一个事件：
+  {"event": "progress", "done": 120, "total": 1000, "pages": 2, "items_per_s": 850.3, "bytes": 1048576, "eta": 1.0}
+  {"event": "status", "message": "..."}
+  {"event": "timings", "stages": {"encode": {"count": ..., "p50_ms": ...}, ...}}
+  {"event": "done", "message": "..."}
+  {"event": "error", "message": "..."}
+退出码：0 成功，1 失败，2 参数错误，130 被中断
+"""
+
+import sys
+import json
+import inspect
+import logging
+import argparse
+
+from .data import SEPARATORS, InputDataset
+from .serials import CHECK_DIGITS, SerialTemplate
+from .layout import PAGE_SIZES
+from .export import BatchExporter, ExportCancelled
+from .memory import DEFAULT_BUDGET_MB, MB, MemoryGovernor
+from .render import generate_qr_pil, generate_barcode_pil
+
+ARRANGEMENTS = {"horizontal": "横向排列", "vertical": "竖向排列"}
+SEP_NAMES = {"auto": "自动", "comma": ",", "semicolon": ";", "newline": "换行"}
+PDF_MODES = ("raster", "vector")
+
+def option_defaults(mode: str) -> dict:
+    """某种模式下全部渲染选项及其默认值（取自 generate_qr_pil / generate_barcode_pil 的签名）"""
+    func = generate_qr_pil if mode == 'qr' else generate_barcode_pil
+    params = list(inspect.signature(func).parameters.values())[1:]
+    return {p.name: p.default for p in params if p.name not in ("label", "renderer", "fit_size")}
+
+def _add_option_args(parser):
+    group = parser.add_argument_group("渲染选项（未指定的使用默认值，与当前模式无关的选项会被忽略）")
+    # 二维码
+    group.add_argument("--version", type=int, help="QR 版本 1-40，不指定则自动")
+    group.add_argument("--error-correction", choices=["L", "M", "Q", "H"])
+    group.add_argument("--out-px", type=int, help="二维码边长（像素）")
+    group.add_argument("--left-right-padding-px", type=int)
+    group.add_argument("--top-bottom-padding-px", type=int)
+    group.add_argument("--module-color")
+    group.add_argument("--back-color")
+    group.add_argument("--outer-eye-color")
+    group.add_argument("--inner-eye-color")
+    # 条形码
+    group.add_argument("--barcode-type", help="如 code128 / ean13 / code39")
+    group.add_argument("--bar-width-px", type=int)
+    group.add_argument("--bar-height-px", type=int)
+    group.add_argument("--margin-px", type=int)
+    group.add_argument("--bar-color")
+    group.add_argument("--bg-transparent", action=argparse.BooleanOptionalAction)
+    group.add_argument("--bg-color")
+    # 文字
+    group.add_argument("--show-text", action=argparse.BooleanOptionalAction)
+    group.add_argument("--font-path")
+    group.add_argument("--text-pos", choices=["top", "bottom"])
+    group.add_argument("--text-align", choices=["left", "center", "right"])
+    group.add_argument("--text-margin", type=int)
+    group.add_argument("--text-size", type=int)
+    group.add_argument("--text-bold", action=argparse.BooleanOptionalAction)
+    group.add_argument("--text-italic", action=argparse.BooleanOptionalAction)
+
+def _page_list(spec: str) -> list:
+    """'3,5-7' -> [2, 4, 5, 6]（从 0 开始）"""
+    pages = []
+    try:
+        for part in spec.split(","):
+            first, _, last = part.strip().partition("-")
+            first = int(first)
+            last = int(last) if last else first
+            if first < 1 or last < first:
+                raise ValueError
+            pages.extend(range(first - 1, last))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的页码：{spec}")
+    return list(dict.fromkeys(pages))
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m qrlist", description="批量生成二维码 / 条形码并导出为 PDF 或图片")
+    parser.add_argument("input", nargs="?", help="输入文本文件（UTF-8），'-' 表示标准输入；使用 --serial 时省略")
+    parser.add_argument("--mode", choices=["qr", "barcode"], default="qr")
+    parser.add_argument("-o", "--output", required=True, help="PDF 文件路径，PNG/JPG 时为输出文件夹")
+    parser.add_argument("--format", dest="fmt", choices=["PDF", "PNG", "JPG"], type=str.upper, default="PDF")
+    parser.add_argument("--sep", choices=list(SEP_NAMES) + list(SEPARATORS), default="auto", help="分隔符")
+    parser.add_argument("--page-size", choices=list(PAGE_SIZES), type=str.upper, default="A4")
+    parser.add_argument("--arrangement", choices=list(ARRANGEMENTS) + list(ARRANGEMENTS.values()), default="horizontal")
+    parser.add_argument("--cols-per-row", type=int, default=7)
+    parser.add_argument("--auto-size", action="store_true", help="按页面宽度自动计算码的尺寸")
+    parser.add_argument("--pdf-mode", choices=PDF_MODES, default="raster")
+    parser.add_argument("--sizing", choices=["fit", "resample"], default="fit",
+                        help="fit：按单元格以整数模块直接渲染；resample：按 out_px 渲染后缩放（旧方式）")
+    parser.add_argument("--pages", type=_page_list, help="只导出（重印）指定页，从 1 开始，如 3,5-7")
+    parser.add_argument("--pages-per-pdf", type=int, default=0, help="每个 PDF 的页数，0 不分段")
+    parser.add_argument("--workers", type=int, default=None, help="渲染进程数，默认 CPU 核数")
+    parser.add_argument("--memory-budget", type=int, default=DEFAULT_BUDGET_MB,
+                        help=f"内存上限（MB），接近时减少在途页面并回收，默认 {DEFAULT_BUDGET_MB}")
+    parser.add_argument("--profile-memory", action="store_true",
+                        help="记录 RSS 时间线和各阶段峰值分配，报告写在输出旁（建议配合 --workers 1）")
+    parser.add_argument("--trace", action="store_true",
+                        help="记录条目 / 页面 / 写入的时间线，保存为 Chrome Trace JSON（可用 Perfetto 打开）")
+    parser.add_argument("--separate-files", action="store_true", help="PNG/JPG 时每条数据单独保存")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出日志（INFO）到 stderr")
+    table = parser.add_argument_group("表格输入（.csv / .xlsx）")
+    table.add_argument("--data-column", help="数据列：列号（从 1 开始）或表头名，默认第 1 列")
+    table.add_argument("--label-column", help="标签列：显示在码下方的文字，默认显示数据本身")
+    table.add_argument("--sheet", help="XLSX 工作表名，默认第一个")
+    table.add_argument("--no-header", dest="header", action="store_false", help="首行是数据而不是表头")
+    table.add_argument("--encoding", help="CSV 编码，默认自动检测")
+    serial = parser.add_argument_group("序列号模板（代替输入文件）")
+    serial.add_argument("--serial", help="如 SN-2026-{000001..999999} 或 A{1..1000:2}-X，位数取起始值的长度")
+    serial.add_argument("--check-digit", choices=list(CHECK_DIGITS), help="在计数器后追加校验位")
+    _add_option_args(parser)
+    return parser
+
+def build_options(args) -> dict:
+    options = option_defaults(args.mode)
+    for key in options:
+        value = getattr(args, key, None)
+        if value is not None:
+            options[key] = value
+    return options
+
+def _column(spec):
+    if spec is None:
+        return None
+    return int(spec) - 1 if spec.isdigit() else spec
+
+def open_input(args):
+    """
+    文本输入通过 mmap 建立索引，不整体读入内存；'-' 读取标准输入。
+    .csv / .xlsx 或指定了数据列 / 标签列的输入按表格流式读取，默认第 1 列为数据
+    """
+    sep = SEP_NAMES.get(args.sep, args.sep)
+    if args.serial:
+        return SerialTemplate.parse(args.serial, args.check_digit)
+    if args.input == "-":
+        return InputDataset.from_text(sys.stdin.read(), sep)
+    if (args.input.lower().endswith((".csv", ".xlsx", ".xlsm"))
+            or args.data_column is not None or args.label_column is not None):
+        # 表格读取依赖 csv / zipfile / xml，只在表格输入时导入
+        import zipfile
+        from .tabular import TableDataset
+        try:
+            return TableDataset(args.input, _column(args.data_column) or 0, _column(args.label_column),
+                                header=args.header, sheet=args.sheet, encoding=args.encoding)
+        except zipfile.BadZipFile as e:
+            raise ValueError(f"不是有效的 xlsx 文件: {e}") from e
+    return InputDataset.open(args.input, sep)
+
+def _emit(event: str, **fields):
+    fields = {"event": event, **fields}
+    sys.stderr.write(json.dumps(fields, ensure_ascii=False) + "\n")
+    sys.stderr.flush()
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (args.input is None) == (args.serial is None):
+        parser.error("需要输入文件或 --serial 其中之一")
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    try:
+        items = open_input(args)
+    except (OSError, ValueError, KeyError) as e:
+        _emit("error", message=f"读取失败: {e}")
+        return 1
+    if not items:
+        _emit("error", message="没有数据")
+        return 1
+
+    exporter = BatchExporter(items, args.mode, build_options(args), args.fmt,
+                             ARRANGEMENTS.get(args.arrangement, args.arrangement), args.cols_per_row,
+                             args.output, args.page_size, args.auto_size,
+                             pages_per_pdf=args.pages_per_pdf, pdf_mode=args.pdf_mode, workers=args.workers,
+                             separate_files=args.separate_files,
+                             on_report=lambda r: _emit("progress", done=r["items_done"], total=r["items_total"],
+                                                       pages=r["pages_done"], items_per_s=round(r["items_per_s"], 1),
+                                                       bytes=r["bytes_written"],
+                                                       eta=None if r["eta"] is None else round(r["eta"], 1)),
+                             on_status=lambda text: _emit("status", message=text),
+                             labels=getattr(items, "labels", None), pages=args.pages, sizing=args.sizing,
+                             governor=MemoryGovernor(args.memory_budget * MB), profile_memory=args.profile_memory,
+                             trace=args.trace)
+    try:
+        message = exporter.run()
+    except (KeyboardInterrupt, ExportCancelled):
+        exporter.stop()
+        _emit("error", message="导出已取消")
+        return 130
+    except MemoryError:
+        _emit("error", message="内存不足，请减少图像分辨率或数据量。")
+        return 1
+    except Exception as e:
+        _emit("error", message=f"导出失败：{e}")
+        return 1
+    finally:
+        if hasattr(items, "close"):
+            items.close()
+    _emit("timings", stages=exporter.timings.summary())
+    _emit("done", message=message)
+    return 0
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+输入数据解析
+"""
+
+import os
+import re
+import mmap
+from array import array
+
+# 分隔符模式（与界面下拉框选项一致）
+SEPARATORS = ("自动", ",", ";", "换行")
+
+def parse_items(raw: str, sep: str = "自动") -> list:
+    """按分隔符模式将原始文本拆分为数据列表，去掉空项"""
+    raw = raw.strip()
+    if not raw:
+        return []
+    if sep == "自动":
+        parts = re.split(r'[,\n;\r]+', raw)
+    elif sep == ",":
+        parts = [p.strip() for p in raw.split(",")]
+    elif sep == ";":
+        parts = [p.strip() for p in raw.split(";")]
+    elif sep == "换行":
+        parts = [p.strip() for p in re.split(r'[\r\n]+', raw)]
+    else:
+        parts = re.split(r'[,\n;\r]+', raw)
+    parts = [p for p in parts if p]
+    return parts
+
+# 各分隔符模式下一条数据的字节模式（UTF-8 下分隔符都是单字节，可直接在字节上切分）
+_ITEM_PATTERNS = {
+    "自动": re.compile(rb"[^,;\r\n]+"),
+    ",": re.compile(rb"[^,]+"),
+    ";": re.compile(rb"[^;]+"),
+    "换行": re.compile(rb"[^\r\n]+"),
+}
+# 分段建索引时用来把分段边界对齐到分隔符
+_SEP_PATTERNS = {
+    "自动": re.compile(rb"[,;\r\n]"),
+    ",": re.compile(rb","),
+    ";": re.compile(rb";"),
+    "换行": re.compile(rb"[\r\n]"),
+}
+_WHITESPACE = frozenset(b" \t\n\r\x0b\x0c")
+_UTF8_BOM = b"\xef\xbb\xbf"
+# 检测分隔符时取样的字节数
+_DETECT_SAMPLE_BYTES = 64 * 1024
+
+def detect_separator(sample: bytes) -> str:
+    """根据样本中各分隔符的出现次数猜测分隔符（换行 / , / ;），次数相同时优先换行"""
+    counts = {
+        "换行": sample.count(b"\n") or sample.count(b"\r"),
+        ",": sample.count(b","),
+        ";": sample.count(b";"),
+    }
+    best = max(counts, key=counts.get)
+    return best if counts[best] > counts["换行"] else "换行"
+
+class InputDataset:
+    """
+    输入数据集：对 UTF-8 数据按分隔符建立偏移索引，之后按需解码。
+    文件通过 mmap 打开，不整体读入内存；粘贴的文本编码为 bytes 后使用同一索引。
+    len() 为 O(1)，dataset[i] 随机访问，dataset[a:b] 返回该段的列表，迭代时逐条解码。
+    切分规则与 parse_items 一致（空白按 ASCII 空白处理）。
+    lazy=True 时构造后不建索引，由调用方反复调用 index_chunk()（可在后台线程）逐段建立，
+    期间 len() 只包含已索引的条目
+    """
+
+    def __init__(self, buffer, sep: str = "自动", path: str = None, closer=None, lazy: bool = False):
+        self.sep = sep if sep in _ITEM_PATTERNS else "自动"
+        self.path = path
+        self._buf = buffer
+        self._closer = closer
+        self._starts = array("Q")
+        self._ends = array("Q")
+        start, end = 0, len(buffer)
+        if buffer[:3] == _UTF8_BOM:
+            start = 3
+        # 与 parse_items 一样先去掉整体首尾空白
+        while start < end and buffer[start] in _WHITESPACE:
+            start += 1
+        while end > start and buffer[end - 1] in _WHITESPACE:
+            end -= 1
+        self._pos = start  # 下一段索引的起点
+        self._end = end
+        if not lazy:
+            self.index_chunk(end)
+
+    @classmethod
+    def open(cls, path: str, sep: str = "自动", lazy: bool = False) -> "InputDataset":
+        f = open(path, "rb")
+        try:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", sep, path)
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        finally:
+            f.close()
+        return cls(mm, sep, path, closer=mm.close, lazy=lazy)
+
+    @classmethod
+    def from_text(cls, text: str, sep: str = "自动") -> "InputDataset":
+        return cls(text.encode("utf-8", "surrogatepass"), sep)
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._buf)
+
+    @property
+    def indexed_bytes(self) -> int:
+        return self._pos
+
+    @property
+    def complete(self) -> bool:
+        return self._pos >= self._end
+
+    def detected_separator(self) -> str:
+        return detect_separator(bytes(self._buf[:_DETECT_SAMPLE_BYTES]))
+
+    def index_chunk(self, max_bytes: int = 16 * 1024 * 1024) -> bool:
+        """再索引大约 max_bytes 字节（边界对齐到下一个分隔符），返回是否已全部索引"""
+        buf, pos, end = self._buf, self._pos, self._end
+        if pos >= end:
+            return True
+        stop = end
+        if pos + max_bytes < end:
+            m = _SEP_PATTERNS[self.sep].search(buf, pos + max_bytes, end)
+            if m:
+                stop = m.start()
+        starts, ends = self._starts, self._ends
+        strip_items = self.sep != "自动"
+        for m in _ITEM_PATTERNS[self.sep].finditer(buf, pos, stop):
+            s, e = m.span()
+            if strip_items:
+                while s < e and buf[s] in _WHITESPACE:
+                    s += 1
+                while e > s and buf[e - 1] in _WHITESPACE:
+                    e -= 1
+                if s == e:
+                    continue
+            starts.append(s)
+            ends.append(e)
+        self._pos = stop
+        return stop >= end
+
+    def __len__(self):
+        return len(self._ends)
+
+    def _item(self, i: int) -> str:
+        return self._buf[self._starts[i]:self._ends[i]].decode("utf-8", "replace")
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._item(i) for i in range(*index.indices(len(self._ends)))]
+        n = len(self._ends)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("dataset index out of range")
+        return self._item(index)
+
+    def __iter__(self):
+        for i in range(len(self._ends)):
+            yield self._item(i)
+
+    def __bool__(self):
+        return len(self._ends) > 0
+
+    def close(self):
+        if self._closer is not None:
+            self._closer()
+            self._closer = None
+        self._buf = b""
+        self._starts = array("Q")
+        self._ends = array("Q")
+        self._pos = self._end = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,527 @@
+# -*- coding: utf-8 -*-
+"""
+批量导出引擎（PDF / PNG / JPG），不依赖 Qt。
+界面的 ExportThread 与命令行共用同一套流程，进度和状态通过回调上报
+"""
+
+import os
+import json
+import time
+import logging
+from collections import deque
+
+from .layout import PAGE_SIZES, PageLayout, auto_cell_width, image_codes_per_page
+from .render import (generate_qr_pil, generate_barcode_pil, qr_vector_shapes, barcode_vector_shapes,
+                     qr_matrix_cache, label_font_cache)
+from .pdf import StreamingPDFWriter, RasterPDFPage, VectorPDFPage
+from .memory import MemoryGovernor
+from .timing import StageTimings, activate, stage
+from .trace import TraceRecorder, span, activate as activate_trace
+from .progress import ProgressReporter
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# 页面渲染（可在渲染进程中执行）
+# -----------------------------
+# 渲染进程内的取消标志（由 _init_render_worker 设置）
+_render_cancel_event = None
+
+def _init_render_worker(cancel_event):
+    global _render_cancel_event
+    _render_cancel_event = cancel_event
+
+def fill_page(page, layout: PageLayout, render, options: dict, items, labels=None, cancelled=None,
+              fit: bool = False) -> bool:
+    """
+    按版面把 items 依次放入 page 的单元格并写说明文字；
+    labels 为与 items 平行的标签文字（None 时显示数据本身），cancelled() 为真时中止并返回 False。
+    fit 为 True 时（仅位图）每个码直接按单元格尺寸渲染，粘贴时不再缩放
+    """
+    if fit:
+        options = dict(options, fit_size=(layout.cell_w, layout.cell_h))
+    for i, (text, (x, y)) in enumerate(zip(items, layout.slots)):
+        if cancelled is not None and cancelled():
+            return False
+        label = labels[i] if labels is not None else None
+        with span("item", "render", slot=i):
+            page.place(render(text, label=label, **options), x, y, layout.cell_w, layout.cell_h)
+            page.caption((text if label is None else label)[:20], x, layout.caption_y(y))
+    return True
+
+def measure_cell(render, options: dict, items, labels=None, sample: int = 10, cancelled=None):
+    """单元格尺寸：前 sample 条渲染结果的最大宽高；取消时返回 None"""
+    max_width = 0
+    max_height = 0
+    for i, text in enumerate(items[:min(sample, len(items))]):
+        if cancelled is not None and cancelled():
+            return None
+        img = render(text, label=labels[i] if labels is not None else None, **options)
+        max_width = max(max_width, img.width)
+        max_height = max(max_height, img.height)
+        img.close()
+    return max_width, max_height
+
+def plan_job_layout(mode: str, options: dict, items, labels, page_size: str, arrangement: str, cols_per_row: int,
+                    auto_size: bool, max_cells_per_page: int = None, cancelled=None) -> PageLayout:
+    """
+    按页面尺寸、排列方式、边距和码的尺寸规划整个任务的版面，导出与预览共用。
+    auto_size 时按页面宽度改写 options 中的 out_px / bar_width_px；
+    单元格大小取前 10 条的最大尺寸；取消时返回 None
+    """
+    page_width, _ = PAGE_SIZES[page_size]
+    margin = options.get('left_right_padding_px', 0)
+    spacing = options.get('top_bottom_padding_px', 0)
+    if auto_size and arrangement == "横向排列":
+        available_width = auto_cell_width(page_width, margin, spacing, cols_per_row)
+        if mode == 'barcode':
+            options['bar_width_px'] = max(1, available_width // 50)  # 假设条宽比例
+        else:
+            options['out_px'] = max(100, available_width)
+
+    render = generate_qr_pil if mode == 'qr' else generate_barcode_pil
+    cell = measure_cell(render, options, items, labels, cancelled=cancelled)
+    if cell is None:
+        return None
+    return PageLayout.for_page_size(len(items), page_size, cell[0], cell[1], margin, spacing, arrangement,
+                                    max_cells_per_page)
+
+# 以像素为单位的渲染选项，按屏幕分辨率预览时随页面一起缩放
+_PIXEL_OPTIONS = ("out_px", "left_right_padding_px", "top_bottom_padding_px", "text_margin", "text_size",
+                  "bar_width_px", "bar_height_px", "margin_px")
+
+def render_preview_page(mode: str, options: dict, layout: PageLayout, items, labels=None, scale: float = 1.0,
+                        cancelled=None):
+    """
+    按 scale 缩小后的版面直接渲染一页位图预览：每个码按缩小后的单元格以整数模块渲染，
+    不再生成 300 DPI 整页后缩放。取消时返回 None
+    """
+    view = layout.scaled(scale)
+    options = {k: max(1, round(v * scale)) if k in _PIXEL_OPTIONS and v else v for k, v in options.items()}
+    page = RasterPDFPage(view.page_width, view.page_height,
+                         caption_font=label_font_cache.get(None, max(6, round(VectorPDFPage.CAPTION_SIZE_PX * scale))))
+    render = generate_qr_pil if mode == 'qr' else generate_barcode_pil
+    if not fill_page(page, view, render, options, items, labels, cancelled, fit=True):
+        page.close()
+        return None
+    return page.image
+
+def _render_cancelled():
+    return _render_cancel_event is not None and _render_cancel_event.is_set()
+
+def render_pdf_page(job: tuple, items, labels=None) -> tuple:
+    """
+    渲染并编码一整页，可在渲染进程中执行。
+    job = (mode, options, pdf_mode, layout, sizing)；items / labels 为该页的数据和标签。
+    返回 encode_raster_page / encode_vector_page 的结果，取消时返回 None
+    """
+    mode, options, pdf_mode, layout, sizing = job
+    if pdf_mode == "vector":
+        page = VectorPDFPage(layout.page_width, layout.page_height)
+        render = qr_vector_shapes if mode == 'qr' else barcode_vector_shapes
+    else:
+        page = RasterPDFPage(layout.page_width, layout.page_height)
+        render = generate_qr_pil if mode == 'qr' else generate_barcode_pil
+    try:
+        fit = sizing == "fit" and pdf_mode != "vector"
+        if not fill_page(page, layout, render, options, items, labels, _render_cancelled, fit):
+            return None
+        return page.encode()
+    finally:
+        page.close()
+
+def _page_footprint(layout: PageLayout, encoded: tuple) -> int:
+    """
+    一页在内存中的占用（字节）：位图页按整页 RGB 位图（宽 × 高 × 3 通道）计，
+    即渲染时的实际峰值，而不是压缩后的大小；矢量页按内容流大小计
+    """
+    if encoded[0] == "raster":
+        return layout.page_width * layout.page_height * 3
+    return len(encoded[-1])
+
+def _render_pdf_page_timed(job: tuple, items, labels=None, page: int = 0, trace: bool = False) -> tuple:
+    """
+    在渲染进程中执行 render_pdf_page，同时返回该页的分阶段计时（StageTimings.raw()），
+    trace 为 True 时再返回该页的追踪事件（TraceRecorder.raw()），否则为 None
+    """
+    timings = StageTimings()
+    recorder = TraceRecorder() if trace else None
+    previous = activate(timings)
+    previous_trace = activate_trace(recorder)
+    try:
+        with span("page", "render", page=page + 1):
+            encoded = render_pdf_page(job, items, labels)
+        return encoded, timings.raw(), recorder.raw() if trace else None
+    finally:
+        activate(previous)
+        activate_trace(previous_trace)
+
+def estimate_export_memory(governor: MemoryGovernor, fmt: str, page_size: str, workers: int,
+                           separate_files: bool = False) -> int:
+    """
+    导出的预计内存峰值（字节）：当前 RSS，加上每个渲染进程一张整页位图，
+    再加上在途页面（与 BatchExporter 的在途数相同，按实测的单页占用计，未实测时按整页位图计）。
+    PNG/JPG 单独保存时同一时刻只有一条在途
+    """
+    page_width, page_height = PAGE_SIZES[page_size]
+    page_bytes = page_width * page_height * 3
+    if fmt != "PDF" and separate_files:
+        return governor.sample() + governor.footprint("item", page_bytes)
+    if workers <= 1:
+        return governor.sample() + page_bytes + governor.footprint("page", page_bytes)
+    in_flight = governor.in_flight("page", workers * 2)
+    return governor.sample() + workers * page_bytes + in_flight * governor.footprint("page", page_bytes)
+
+# -----------------------------
+# 导出流程
+# -----------------------------
+class ExportCancelled(Exception):
+    """导出被取消"""
+
+class BatchExporter:
+    """
+    批量导出。run() 返回完成提示文本，取消时抛出 ExportCancelled，其余错误直接抛出；
+    stop() 可在其他线程调用。PNG/JPG 导出时 output_path 为输出文件夹，
+    separate_files 为 True 时每条数据单独保存，否则只导出一页拼版。
+    items 只需支持 len()、下标和切片（如 InputDataset / TableDataset），labels 为可选的平行标签序列。
+    pages 为要导出的页号（从 0 开始）列表，用于只重印其中几页，None 表示全部。
+    sizing: 'fit' 按单元格直接以整数模块渲染（默认），'resample' 按 out_px 渲染后 LANCZOS 缩放到单元格。
+    governor 为内存预算控制器（见 MemoryGovernor），决定在途页面数和何时回收，None 时使用默认预算。
+    各阶段耗时（含渲染进程中的）计入 timings（StageTimings），任务结束时以 JSON 写入日志。
+    profile_memory 为 True 时启用 MemoryProfiler，无论成功与否都在输出旁写内存报告（见 memory_report_path）；
+    trace 为 True 时按条目 / 页面 / 写入记录时间线（含渲染进程），写为 Chrome Trace JSON（见 trace_path）。
+    进度经 ProgressReporter 合并后按约 10Hz 上报：on_progress(已完成条数)，on_report(快照 dict，见 ProgressReporter)
+    """
+
+    def __init__(self, items, mode, options, fmt, arrangement, cols_per_row, output_path, page_size, auto_size,
+                 pages_per_pdf=0, pdf_mode="raster", workers=None, separate_files=False,
+                 on_progress=None, on_status=None, labels=None, pages=None,
+                 sizing="fit", governor: MemoryGovernor = None, profile_memory: bool = False,
+                 trace: bool = False, on_report=None):
+        self.items = items
+        self.labels = labels
+        self.pages = pages
+        self.layout = None
+        self.total = len(items)  # 本次实际要导出的条数（重印部分页面时少于 len(items)）
+        self.mode = mode
+        self.options = options
+        self.fmt = fmt
+        self.arrangement = arrangement
+        self.cols_per_row = cols_per_row
+        self.output_path = output_path
+        self.page_size = page_size
+        self.auto_size = auto_size
+        self.pages_per_pdf = pages_per_pdf  # 0 表示不分段，输出单个 PDF
+        self.pdf_mode = pdf_mode  # 'raster' 位图 / 'vector' 矢量
+        self.workers = workers or os.cpu_count() or 1  # 渲染进程数，1 表示在本线程内渲染
+        self.separate_files = separate_files
+        self.sizing = sizing
+        self.governor = governor or MemoryGovernor()
+        self.timings = StageTimings()
+        self.profiler = None
+        if profile_memory:
+            # 内存分析依赖 tracemalloc，只在启用时导入
+            from .memprofile import MemoryProfiler
+            self.profiler = MemoryProfiler()
+        self.memory_report = None  # 写出的内存报告路径
+        self.tracer = TraceRecorder("export") if trace else None
+        self.trace_file = None  # 写出的时间线路径
+        self.on_progress = on_progress or (lambda done: None)
+        self.on_status = on_status or (lambda text: None)
+        self.on_report = on_report or (lambda snapshot: None)
+        self._reporter = None
+        self._bytes_written = 0  # 已关闭的输出文件的总字节数
+        self._cancel_event = None
+        self._running = True
+        self._pdf_writer = None
+        self._pdf_index = 1
+        self._pdf_start_time = 0.0
+
+    def _start_progress(self, pages_total=0):
+        self._reporter = ProgressReporter(self._report, self.total, pages_total)
+
+    def _report(self, snapshot):
+        self.on_progress(snapshot["items_done"])
+        self.on_report(snapshot)
+
+    def _written(self) -> int:
+        writer = self._pdf_writer
+        return self._bytes_written + (writer.bytes_written if writer is not None else 0)
+
+    def _sidecar_path(self, suffix: str, name: str) -> str:
+        """输出旁的附加文件：PDF 为同名加 suffix，PNG/JPG 为输出文件夹中的 name"""
+        if self.fmt == "PDF":
+            return f"{self.output_path.rsplit('.', 1)[0]}{suffix}"
+        return os.path.join(self.output_path, name)
+
+    @property
+    def memory_report_path(self) -> str:
+        return self._sidecar_path(".memory.json", "memory_report.json")
+
+    @property
+    def trace_path(self) -> str:
+        return self._sidecar_path(".trace.json", "trace.json")
+
+    def run(self) -> str:
+        previous_timings = activate(self.timings)
+        previous_trace = activate_trace(self.tracer)
+        if self.profiler is not None:
+            self.timings.profiler = self.profiler
+            self.profiler.start()
+        outcome = "failed"
+        try:
+            if self.fmt == "PDF":
+                message = self._export_pdf()
+            else:
+                message = self._export_images()
+            if not self._running:
+                outcome = "cancelled"
+                raise ExportCancelled()
+            outcome = "done"
+            return message
+        except MemoryError:
+            outcome = "out of memory"
+            raise
+        finally:
+            if self.profiler is not None:
+                self._write_memory_report(outcome)
+            # 取消或失败时删除未完成的 PDF
+            if self._pdf_writer is not None:
+                self._pdf_writer.abort()
+                self._pdf_writer = None
+            if self.mode == 'qr':
+                logger.info(f"QR matrix cache: {qr_matrix_cache.stats()}")
+            logger.info(f"Memory governor: {self.governor.stats()}")
+            logger.info(f"Stage timings: {json.dumps(self.timings.summary())}")
+            activate(previous_timings)
+            activate_trace(previous_trace)
+            if self.tracer is not None:
+                self._write_trace()
+
+    def _write_memory_report(self, outcome):
+        self.profiler.stop()
+        self.timings.profiler = None
+        path = self.memory_report_path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.memory_report = self.profiler.write_report(
+                path, outcome=outcome, mode=self.mode, fmt=self.fmt, items=self.total, workers=self.workers,
+                governor=self.governor.stats(), timings=self.timings.summary())
+            logger.info(f"Memory report: {path}")
+        except OSError as e:
+            logger.warning(f"Failed to write memory report {path}: {e}")
+
+    def _write_trace(self):
+        path = self.trace_path
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.trace_file = self.tracer.write(path)
+            logger.info(f"Trace ({len(self.tracer)} events): {path}")
+        except OSError as e:
+            logger.warning(f"Failed to write trace {path}: {e}")
+
+    def stop(self):
+        self._running = False
+        if self._cancel_event is not None:
+            self._cancel_event.set()
+
+    def _render(self, text, label=None):
+        render = generate_qr_pil if self.mode == 'qr' else generate_barcode_pil
+        return render(text, label=label, **self.options)
+
+    def _label(self, i):
+        return self.labels[i] if self.labels is not None else None
+
+    def plan_layout(self, max_cells_per_page=None) -> PageLayout:
+        """规划整个任务的版面（见 plan_job_layout），取消时返回 None"""
+        with span("plan"):
+            self.layout = plan_job_layout(self.mode, self.options, self.items, self.labels, self.page_size,
+                                          self.arrangement, self.cols_per_row, self.auto_size, max_cells_per_page,
+                                          cancelled=lambda: not self._running)
+        self.governor.checkpoint()
+        return self.layout
+
+    def _export_pdf(self):
+        layout = self.plan_layout()
+        if layout is None:
+            return None
+        # 每页布局相同，任意一页都可单独渲染（可分发到多个渲染进程），按页号顺序写入
+        if self.pages is None:
+            page_numbers = list(range(layout.pages))
+        else:
+            page_numbers = [p for p in self.pages if 0 <= p < layout.pages]
+            if not page_numbers:
+                raise ValueError(f"页码超出范围（共 {layout.pages} 页）")
+            self.total = sum(len(layout.page_items(p)) for p in page_numbers)
+        job = (self.mode, self.options, self.pdf_mode, layout, self.sizing)
+        page_count = 0
+        item_count = 0
+        self._start_progress(len(page_numbers))
+
+        for encoded, count in self._render_pages(job, layout, page_numbers):
+            with span("write", page=page_count + 1):
+                self._write_pdf_page(encoded)
+            page_count += 1
+            if self.profiler is not None:
+                self.profiler.checkpoint(f"page {page_count}")
+            item_count += count
+            self._reporter.update(item_count, page_count, self._written())
+
+        if not self._running:
+            return None
+        self._close_pdf_writer()
+        self._reporter.update(bytes_written=self._written())
+        self._reporter.finish()
+        if self.pages_per_pdf:
+            return f"已导出 {item_count} 个二维码/条形码到 {self._pdf_index - 1} 个 PDF 文件（{page_count} 页）"
+        return f"已导出 {item_count} 个二维码/条形码到 {self.output_path}（{page_count} 页）"
+
+    def _page_items(self, layout, page):
+        """某一页的 (数据, 标签)，标签可能为 None"""
+        rows = layout.page_items(page)
+        return self.items[rows.start:rows.stop], (self.labels[rows.start:rows.stop] if self.labels is not None else None)
+
+    def _render_pages(self, job, layout, page_numbers):
+        """
+        依次产出 (编码后的页面, 该页条数)，严格保持 page_numbers 的顺序。
+        workers > 1 时分发到进程池，同时在途的页面数受限，取消时通知渲染进程尽快退出
+        """
+        workers = min(self.workers, len(page_numbers))
+        if workers <= 1:
+            for p in page_numbers:
+                if not self._running:
+                    return
+                items, labels = self._page_items(layout, p)
+                with span("page", "render", page=p + 1):
+                    encoded = render_pdf_page(job, items, labels)
+                if encoded is None:
+                    return
+                self.governor.observe("page", _page_footprint(layout, encoded))
+                self.governor.checkpoint()
+                yield encoded, len(items)
+            return
+
+        # 进程池只在多进程渲染时用到，延迟导入
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        ctx = multiprocessing.get_context("spawn")
+        self._cancel_event = ctx.Event()
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                   initializer=_init_render_worker, initargs=(self._cancel_event,))
+        pending = deque()
+        queue = iter(page_numbers)
+        remaining = len(page_numbers)
+        try:
+            while remaining or pending:
+                # 在途页面数按实测的页面大小和剩余内存额度收紧
+                window = self.governor.in_flight("page", workers * 2)
+                while self._running and remaining and len(pending) < window:
+                    p = next(queue)
+                    items, labels = self._page_items(layout, p)
+                    pending.append((pool.submit(_render_pdf_page_timed, job, items, labels, p, self.tracer is not None),
+                                    len(items)))
+                    remaining -= 1
+                if not self._running or not pending:
+                    return
+                future, count = pending.popleft()
+                # 主线程在这里等待渲染进程，时间线上的 wait 区间即流水线空泡
+                with span("wait", in_flight=len(pending) + 1):
+                    encoded, timings, events = future.result()
+                self.timings.merge(timings)
+                if events:
+                    self.tracer.merge(events, "render worker")
+                if encoded is None:
+                    return
+                self.governor.observe("page", _page_footprint(layout, encoded))
+                self.governor.checkpoint()
+                yield encoded, count
+        finally:
+            self._cancel_event.set()
+            pool.shutdown(wait=True, cancel_futures=True)
+            self._cancel_event = None
+
+    def _write_pdf_page(self, encoded):
+        """页面完成后立即写入 PDF；按需（pages_per_pdf）切换到下一个分段文件"""
+        if self._pdf_writer is None:
+            if self.pages_per_pdf:
+                path = f"{self.output_path.rsplit('.', 1)[0]}_{self._pdf_index}.pdf"
+            else:
+                path = self.output_path
+            self._pdf_writer = StreamingPDFWriter(path)
+            self._pdf_start_time = time.time()
+            self.on_status(f"正在写入PDF文件 {path}")
+        self._pdf_writer.add_encoded_page(encoded)
+        if self.pages_per_pdf and self._pdf_writer.page_count >= self.pages_per_pdf:
+            self._close_pdf_writer()
+
+    def _close_pdf_writer(self):
+        writer = self._pdf_writer
+        if writer is None:
+            return
+        self._pdf_writer = None
+        writer.close()
+        size = os.path.getsize(writer.path)
+        self._bytes_written += size
+        self._pdf_index += 1
+        logger.info(f"Created PDF {writer.path}, {writer.page_count} pages, {size} bytes, time: {time.time() - self._pdf_start_time:.2f}s")
+
+    def _export_images(self):
+        folder = self.output_path
+        os.makedirs(folder, exist_ok=True)
+        ext = "png" if self.fmt == "PNG" else "jpg"
+        codes_per_page = image_codes_per_page(self.arrangement, self.cols_per_row)
+        if self.separate_files and len(self.items) > codes_per_page:
+            if self.auto_size:
+                self.plan_layout()  # 只为按页面宽度确定码的尺寸
+            self._start_progress()
+            for i, text in enumerate(self.items):
+                if not self._running:
+                    return None
+                with span("item", "render", index=i + 1):
+                    img = self._render(text, self._label(i))
+                    if img.mode in ("RGBA", "P"):
+                        img = img.convert("RGB")
+                safe_text = "".join(c for c in text if c.isalnum() or c in "-_")[:50]
+                fname = os.path.join(folder, f"code_{i+1}_{safe_text}.{ext}")
+                with stage("write"), span("write", index=i + 1):
+                    if ext == 'jpg':
+                        img.save(fname, quality=95)
+                    else:
+                        img.save(fname)
+                self._bytes_written += os.path.getsize(fname)
+                self._reporter.update(i + 1, bytes_written=self._bytes_written)
+                self.governor.observe("item", img.width * img.height * len(img.getbands()))
+                img.close()
+                img = None
+                self.governor.checkpoint()
+                if self.profiler is not None:
+                    self.profiler.checkpoint(f"item {i + 1}")
+            self._reporter.finish()
+            return f"已将 {len(self.items)} 个二维码/条形码导出到 {folder}"
+
+        # 只导出第一页拼版
+        layout = self.plan_layout(max_cells_per_page=codes_per_page)
+        if layout is None:
+            return None
+        items, labels = self._page_items(layout, 0)
+        self.total = len(items)
+        self._start_progress(1)
+        page = RasterPDFPage(layout.page_width, layout.page_height)
+        try:
+            render = generate_qr_pil if self.mode == 'qr' else generate_barcode_pil
+            if not fill_page(page, layout, render, self.options, items, labels, lambda: not self._running,
+                             self.sizing == "fit"):
+                return None
+            fname = os.path.join(folder, f"batch_codes.{ext}")
+            with stage("write"), span("write"):
+                if ext == 'jpg':
+                    page.image.save(fname, quality=95)
+                else:
+                    page.image.save(fname)
+            self._reporter.update(len(items), 1, os.path.getsize(fname))
+            self._reporter.finish()
+        finally:
+            page.close()
+        self.governor.checkpoint()
+        return f"已导出 {len(items)} 个二维码/条形码到 {fname}"
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+整个任务的版面规划：每页布局相同，单元格坐标只计算一次，之后任意条目 / 页面 O(1) 定位
+"""
+
+import copy
+
+# 页面尺寸定义（像素，基于300 DPI）
+PAGE_SIZES = {
+    "A3": (3508, 4961),  # 297mm x 420mm
+    "A4": (2480, 3508),  # 210mm x 297mm
+    "A5": (1748, 2480),  # 148mm x 210mm
+}
+
+# 说明文字与码下边缘的间距
+CAPTION_GAP = 10
+
+# 拼版图片（PNG/JPG 单页、预览）每页最多放的码数：横向为每行个数，竖向为 3 个
+VERTICAL_CODES_PER_PAGE = 3
+
+def page_slots(page_width: int, page_height: int, margin: int, spacing: int,
+               cell_w: int, cell_h: int, arrangement: str) -> list:
+    """
+    一页内各个码的左上角坐标（每页布局相同），与原逐条排版循环的换行/换页规则一致。
+    一个码都放不下时仍返回一个位置，保证每页至少一个码
+    """
+    slots = []
+    x, y = margin, margin
+    while True:
+        if arrangement == "横向排列" and x + cell_w > page_width - margin:
+            x = margin
+            y += cell_h + spacing
+        if y + cell_h > page_height - margin:
+            break
+        slots.append((x, y))
+        if arrangement == "横向排列":
+            x += cell_w + spacing
+        else:
+            y += cell_h + spacing
+    return slots or [(margin, margin)]
+
+def auto_cell_width(page_width: int, margin: int, spacing: int, cols_per_row: int) -> int:
+    """自动尺寸：按每行个数平分页面可用宽度"""
+    return (page_width - 2 * margin - (cols_per_row - 1) * spacing) // cols_per_row
+
+def image_codes_per_page(arrangement: str, cols_per_row: int) -> int:
+    return cols_per_row if arrangement == "横向排列" else VERTICAL_CODES_PER_PAGE
+
+class PageLayout:
+    """
+    item_count 个码按同一单元格尺寸排版后的结果。
+    pages / cells_per_page 在构造时确定；locate(i) -> (page, x, y)、page_items(p) 均为 O(1)，
+    因此任意一页都可以单独（乱序、并行或重印）渲染。max_cells_per_page 可限制每页个数
+    """
+
+    def __init__(self, item_count: int, page_width: int, page_height: int, cell_w: int, cell_h: int,
+                 margin: int, spacing: int, arrangement: str, max_cells_per_page: int = None):
+        self.item_count = item_count
+        self.page_width = page_width
+        self.page_height = page_height
+        self.cell_w = cell_w
+        self.cell_h = cell_h
+        self.arrangement = arrangement
+        self.caption_gap = CAPTION_GAP
+        slots = page_slots(page_width, page_height, margin, spacing, cell_w, cell_h, arrangement)
+        if max_cells_per_page:
+            slots = slots[:max_cells_per_page]
+        self.slots = slots
+        self.cells_per_page = len(slots)
+        self.pages = (item_count + self.cells_per_page - 1) // self.cells_per_page
+
+    @classmethod
+    def for_page_size(cls, item_count: int, page_size: str, cell_w: int, cell_h: int,
+                      margin: int, spacing: int, arrangement: str, max_cells_per_page: int = None) -> "PageLayout":
+        page_width, page_height = PAGE_SIZES[page_size]
+        return cls(item_count, page_width, page_height, cell_w, cell_h, margin, spacing, arrangement,
+                   max_cells_per_page)
+
+    def locate(self, index: int) -> tuple:
+        """第 index 条所在的 (页号, x, y)"""
+        if not 0 <= index < self.item_count:
+            raise IndexError("item index out of range")
+        page, slot = divmod(index, self.cells_per_page)
+        x, y = self.slots[slot]
+        return page, x, y
+
+    def page_items(self, page: int) -> range:
+        """第 page 页包含的条目下标"""
+        if not 0 <= page < self.pages:
+            raise IndexError("page index out of range")
+        start = page * self.cells_per_page
+        return range(start, min(start + self.cells_per_page, self.item_count))
+
+    def caption_y(self, y: int) -> int:
+        """码下方说明文字的位置"""
+        return y + self.cell_h + self.caption_gap
+
+    def scaled(self, scale: float) -> "PageLayout":
+        """按比例缩小的同一版面（格子数、换行和分页不变），用于按屏幕分辨率渲染预览"""
+        view = copy.copy(self)
+        view.page_width = max(1, round(self.page_width * scale))
+        view.page_height = max(1, round(self.page_height * scale))
+        view.cell_w = max(1, int(self.cell_w * scale))
+        view.cell_h = max(1, int(self.cell_h * scale))
+        view.caption_gap = round(self.caption_gap * scale)
+        view.slots = [(int(x * scale), int(y * scale)) for x, y in self.slots]
+        return view
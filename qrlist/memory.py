@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+内存预算控制：按进程 RSS 与实测的单条 / 单页占用决定在途数量、缓存大小和何时回收，
+代替逐条 gc.collect() 和事后捕获 MemoryError
+"""
+
+import gc
+import os
+import sys
+import threading
+
+# 默认内存上限（MB）
+DEFAULT_BUDGET_MB = 1024
+
+MB = 1024 * 1024
+
+def _statm_rss():
+    with open("/proc/self/statm", "rb") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    process = ctypes.windll.kernel32.GetCurrentProcess()
+    if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+        raise OSError("GetProcessMemoryInfo failed")
+    return counters.WorkingSetSize
+
+def _psutil_rss():
+    import psutil
+    return psutil.Process().memory_info().rss
+
+_rss_reader = None
+
+def process_rss() -> int:
+    """当前进程的常驻内存（字节）；平台不支持时返回 0"""
+    global _rss_reader
+    if _rss_reader is not None:
+        try:
+            return _rss_reader()
+        except Exception:
+            return 0
+    readers = [_statm_rss] if sys.platform.startswith("linux") else []
+    if sys.platform == "win32":
+        readers.append(_windows_rss)
+    readers.append(_psutil_rss)
+    for reader in readers:
+        try:
+            rss = reader()
+        except Exception:
+            continue
+        _rss_reader = reader
+        return rss
+    _rss_reader = lambda: 0
+    return 0
+
+class MemoryGovernor:
+    """
+    线程安全的内存预算控制器，budget 为进程 RSS 上限（字节）。
+    - observe(kind, nbytes)：记录一条 / 一页等对象的实测占用（指数滑动平均）
+    - in_flight(kind, limit)：按剩余额度和实测占用确定在途数量，接近上限时收紧到 1（背压）
+    - cache_bytes(limit)：按剩余额度确定缓存的字节上限
+    - checkpoint()：RSS 越过回收阈值或高水位时才 gc.collect()，代替逐条回收
+    所有决策计入 stats()。只统计本进程，渲染子进程各自的内存不在其中
+    """
+
+    def __init__(self, budget: int = DEFAULT_BUDGET_MB * MB, high_water: float = 0.85, collect_step: float = 0.125):
+        self.budget = budget
+        self.high_water = int(budget * high_water)  # 超过后收紧在途数量并尽快回收
+        self.collect_step = max(int(budget * collect_step), 8 * MB)  # 两次回收之间 RSS 至少增长这么多
+        self._footprints = {}
+        self._lock = threading.Lock()
+        self.rss = process_rss()
+        self.peak_rss = self.rss
+        self._collect_at = min(self.rss + self.collect_step, self.high_water)
+        self.checks = 0
+        self.collections = 0
+        self.freed = 0
+        self.throttled = 0
+        self.last_window = {}
+
+    def observe(self, kind: str, nbytes: int):
+        """记录一个 kind 对象的实测占用，新的测量值权重 1/4"""
+        with self._lock:
+            old = self._footprints.get(kind)
+            self._footprints[kind] = nbytes if old is None else (old * 3 + nbytes) // 4
+
+    def footprint(self, kind: str, default: int = 0) -> int:
+        with self._lock:
+            return self._footprints.get(kind, default)
+
+    def headroom(self) -> int:
+        """距离上限还剩多少字节（以最近一次读数为准）"""
+        return max(0, self.high_water - self.rss)
+
+    def under_pressure(self) -> bool:
+        return self.rss >= self.high_water
+
+    def in_flight(self, kind: str, limit: int) -> int:
+        """同时在途的 kind 对象数上限：不超过 limit，剩余额度不足时减少，至少为 1"""
+        size = self.footprint(kind)
+        if size <= 0:
+            window = limit
+        else:
+            window = max(1, min(limit, self.headroom() // size))
+        with self._lock:
+            if window < limit:
+                self.throttled += 1
+            self.last_window[kind] = window
+        return window
+
+    def cache_bytes(self, limit: int) -> int:
+        """缓存的字节上限：不超过 limit，也不超过剩余额度的 1/4（至少 8MB）"""
+        return max(8 * MB, min(limit, self.headroom() // 4))
+
+    def estimate(self, counts: dict) -> int:
+        """当前 RSS 加上 {kind: 个数} 按实测占用计算的预计峰值（字节）"""
+        return self.sample() + sum(count * self.footprint(kind) for kind, count in counts.items())
+
+    def sample(self) -> int:
+        rss = process_rss()
+        with self._lock:
+            self.rss = rss
+            self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def checkpoint(self) -> bool:
+        """读取 RSS，越过回收阈值时执行一次 gc.collect()；返回是否回收"""
+        rss = self.sample()
+        with self._lock:
+            self.checks += 1
+            if rss < self._collect_at:
+                return False
+        gc.collect()
+        after = process_rss()
+        with self._lock:
+            self.collections += 1
+            self.freed += max(0, rss - after)
+            self.rss = after
+            # 回收后仍在高水位以上时，等再增长一个 collect_step 才再次回收，避免反复空转
+            self._collect_at = after + self.collect_step if after >= self.high_water else \
+                min(after + self.collect_step, self.high_water)
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "budget": self.budget,
+                "rss": self.rss,
+                "peak_rss": self.peak_rss,
+                "footprints": dict(self._footprints),
+                "checks": self.checks,
+                "collections": self.collections,
+                "freed": self.freed,
+                "throttled": self.throttled,
+                "windows": dict(self.last_window),
+            }
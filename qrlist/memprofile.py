@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+可选的内存分析：任务期间按时间采样 RSS，用 tracemalloc 统计各阶段（stage()）的峰值分配，
+在页面 / 条目边界对 Python 分配做快照，最后把报告写成 JSON。
+tracemalloc 只看得到 Python 分配，Pillow 的像素缓冲区体现在各阶段的 RSS 增量里；
+多进程渲染时渲染进程的分配不计入，分析时建议只用 1 个渲染进程
+"""
+
+import json
+import time
+import threading
+import tracemalloc
+
+from .memory import process_rss
+
+class MemoryProfiler:
+    """
+    通过 StageTimings.profiler 挂到 stage() 上：进入阶段时记录 RSS 和已分配字节并重置 tracemalloc 峰值，
+    退出时得到该阶段的峰值分配（嵌套阶段的峰值并入外层）和 RSS 增量。
+    start() / stop() 之间后台线程每 interval 秒采样一次 RSS 时间线
+    """
+
+    def __init__(self, interval: float = 0.05, frames: int = 1, top: int = 15):
+        self.interval = interval
+        self.frames = frames
+        self.top = top
+        self.timeline = []  # (秒, RSS, tracemalloc 当前字节, 当时所在阶段)
+        self.stages = {}
+        self.peak_snapshot = None
+        self._snapshot_bytes = 0
+        self._local = threading.local()
+        self._current_stage = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._started_tracing = False
+        self._start_time = 0.0
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self._started_tracing = True
+        self._start_time = time.perf_counter()
+        self._sample()
+        self._thread = threading.Thread(target=self._run, name="memory-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._sample()
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        current = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+        self.timeline.append((round(time.perf_counter() - self._start_time, 4), process_rss(), current,
+                              self._current_stage))
+
+    def enter(self, name: str):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        current = tracemalloc.get_traced_memory()[0]
+        stack.append([name, process_rss(), current, 0])
+        tracemalloc.reset_peak()
+        self._current_stage = name
+
+    def exit(self, name: str):
+        stack = self._local.stack
+        _, rss_before, traced_before, child_peak = stack.pop()
+        peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+        rss_growth = process_rss() - rss_before
+        if stack:
+            stack[-1][3] = max(stack[-1][3], peak)
+            self._current_stage = stack[-1][0]
+        else:
+            self._current_stage = None
+        with self._lock:
+            entry = self.stages.get(name)
+            if entry is None:
+                entry = self.stages[name] = {"count": 0, "peak_alloc": 0, "rss_growth_max": 0, "rss_growth_total": 0}
+            entry["count"] += 1
+            entry["peak_alloc"] = max(entry["peak_alloc"], peak - traced_before)
+            entry["rss_growth_max"] = max(entry["rss_growth_max"], rss_growth)
+            entry["rss_growth_total"] += max(0, rss_growth)
+
+    def checkpoint(self, label: str):
+        """页面 / 条目边界：Python 分配比上次快照多出 10% 以上时重新快照，保留分配最多的代码行"""
+        current = tracemalloc.get_traced_memory()[0]
+        if current <= self._snapshot_bytes * 1.1:
+            return
+        self._snapshot_bytes = current
+        snapshot = tracemalloc.take_snapshot().filter_traces(
+            (tracemalloc.Filter(False, tracemalloc.__file__),))
+        self.peak_snapshot = {
+            "label": label,
+            "traced_bytes": current,
+            "top": [{"where": str(stat.traceback), "bytes": stat.size, "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:self.top]],
+        }
+
+    def report(self, **extra) -> dict:
+        rss = [sample[1] for sample in self.timeline]
+        return {
+            **extra,
+            "peak_rss": max(rss) if rss else 0,
+            "traced_peak": max((sample[2] for sample in self.timeline), default=0),
+            "stages": dict(self.stages),
+            "peak_snapshot": self.peak_snapshot,
+            "timeline": [{"t": t, "rss": r, "traced": c, "stage": s} for t, r, c, s in self.timeline],
+        }
+
+    def write_report(self, path: str, **extra) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(**extra), f, ensure_ascii=False, indent=1)
+        return path
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+流式 PDF 写入与页面排版（位图 / 矢量）
+"""
+
+import os
+import zlib
+
+from PIL import Image, ImageDraw
+
+from .timing import stage
+
+# -----------------------------
+# 流式 PDF 写入
+# -----------------------------
+def encode_raster_page(img: Image.Image, resolution: float = 300.0, compress_level: int = 6) -> tuple:
+    """将整页位图压缩为 PDF 图像流，返回可跨进程传递的元组"""
+    if img.mode == "1":
+        color_space, bpc = b"/DeviceGray", 1
+    elif img.mode == "L":
+        color_space, bpc = b"/DeviceGray", 8
+    else:
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        color_space, bpc = b"/DeviceRGB", 8
+    image_dict = (b"/Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s /BitsPerComponent %d /Filter /FlateDecode"
+                  % (img.width, img.height, color_space, bpc))
+    with stage("encode-image"):
+        data = zlib.compress(img.tobytes(), compress_level)
+    return ("raster", img.width * 72.0 / resolution, img.height * 72.0 / resolution, image_dict, data)
+
+def encode_vector_page(content: bytes, width_pt: float, height_pt: float, compress_level: int = 6) -> tuple:
+    """压缩矢量页面内容流，返回可跨进程传递的元组"""
+    with stage("encode-image"):
+        return ("vector", width_pt, height_pt, None, zlib.compress(content, compress_level))
+
+class StreamingPDFWriter:
+    """
+    逐页写入的 PDF 生成器：每页的图像流和对象在 add_page 时立即写盘，
+    内存中只保留各对象的 xref 偏移，任意页数的 PDF 内存占用保持不变。
+    - resolution: 页面图像的 DPI（PAGE_SIZES 基于 300 DPI）
+    """
+    def __init__(self, path: str, resolution: float = 300.0, compress_level: int = 6):
+        self.path = path
+        self.resolution = resolution
+        self.compress_level = compress_level
+        self.page_count = 0
+        self._offsets = [None, None, None]  # 0 号对象保留，1 = Catalog，2 = Pages（关闭时写入）
+        self._page_ids = []
+        self._font_id = None
+        self._fh = open(path, "wb")
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    @property
+    def bytes_written(self) -> int:
+        return self._fh.tell() if self._fh else 0
+
+    def _write(self, data: bytes):
+        self._fh.write(data)
+
+    def _reserve_id(self) -> int:
+        self._offsets.append(None)
+        return len(self._offsets) - 1
+
+    def _write_obj(self, obj_id: int, body: bytes):
+        self._offsets[obj_id] = self._fh.tell()
+        self._write(b"%d 0 obj\n" % obj_id + body + b"\nendobj\n")
+
+    def _write_stream(self, obj_id: int, dict_entries: bytes, data: bytes):
+        self._offsets[obj_id] = self._fh.tell()
+        self._write(b"%d 0 obj\n<< %s /Length %d >>\nstream\n" % (obj_id, dict_entries, len(data)))
+        self._write(data)
+        self._write(b"\nendstream\nendobj\n")
+
+    def add_page(self, img: Image.Image):
+        """写入一页位图（'1' / 'L' / 'RGB'，其它模式转为 RGB）"""
+        self.add_encoded_page(encode_raster_page(img, self.resolution, self.compress_level))
+
+    def add_vector_page(self, content: bytes, width_pt: float, height_pt: float):
+        """写入一页矢量内容流（可使用 /F1 Helvetica 字体）"""
+        self.add_encoded_page(encode_vector_page(content, width_pt, height_pt, self.compress_level))
+
+    def add_encoded_page(self, encoded: tuple):
+        """写入 encode_raster_page / encode_vector_page 的结果（可在其它进程中编码）"""
+        with stage("write"):
+            kind, width_pt, height_pt, image_dict, data = encoded
+            if kind == "raster":
+                img_id = self._reserve_id()
+                self._write_stream(img_id, image_dict, data)
+                content = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (width_pt, height_pt)
+                self._add_page_object(content, width_pt, height_pt, b"/XObject << /Im0 %d 0 R >>" % img_id)
+            else:
+                if self._font_id is None:
+                    self._font_id = self._reserve_id()
+                    self._write_obj(self._font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+                self._add_page_object(data, width_pt, height_pt, b"/Font << /F1 %d 0 R >>" % self._font_id,
+                                      filter_entry=b"/Filter /FlateDecode")
+
+    def _add_page_object(self, content: bytes, width_pt: float, height_pt: float, resources: bytes, filter_entry: bytes = b""):
+        content_id = self._reserve_id()
+        self._write_stream(content_id, filter_entry, content)
+        page_id = self._reserve_id()
+        self._write_obj(page_id, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] /Resources << %s >> /Contents %d 0 R >>"
+                        % (width_pt, height_pt, resources, content_id))
+        self._page_ids.append(page_id)
+        self.page_count += 1
+
+    def close(self):
+        """写入页树、xref 和 trailer"""
+        if self._fh is None:
+            return
+        self._offsets[2] = self._fh.tell()
+        self._write(b"2 0 obj\n<< /Type /Pages /Count %d /Kids [" % self.page_count)
+        for i in range(0, len(self._page_ids), 1000):
+            self._write(b"".join(b"%d 0 R " % pid for pid in self._page_ids[i:i + 1000]))
+        self._write(b"] >>\nendobj\n")
+        xref_pos = self._fh.tell()
+        self._write(b"xref\n0 %d\n0000000000 65535 f \n" % len(self._offsets))
+        for i in range(1, len(self._offsets), 1000):
+            self._write(b"".join(b"%010d 00000 n \n" % off for off in self._offsets[i:i + 1000]))
+        self._write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(self._offsets), xref_pos))
+        self._fh.close()
+        self._fh = None
+
+    def abort(self):
+        """取消导出：关闭并删除未完成的文件"""
+        if self._fh is None:
+            return
+        self._fh.close()
+        self._fh = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+def _pdf_color(rgba, op: bytes) -> bytes:
+    return b"%.3f %.3f %.3f %s" % (rgba[0] / 255.0, rgba[1] / 255.0, rgba[2] / 255.0, op)
+
+def _pdf_text(text: str) -> bytes:
+    """PDF 字符串字面量（WinAnsi 编码，无法编码的字符替换为 ?）"""
+    raw = text.encode("cp1252", "replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+class RasterPDFPage:
+    """位图页面：按 300 DPI 像素坐标粘贴每个码的图像；caption_font 为说明文字字体，默认 Pillow 内置字体"""
+    def __init__(self, width: int, height: int, caption_font=None):
+        self.image = Image.new("RGB", (width, height), (255, 255, 255))
+        self.draw = ImageDraw.Draw(self.image)
+        self.caption_font = caption_font
+
+    def place(self, img: Image.Image, x: int, y: int, cell_w: int, cell_h: int):
+        """已按单元格尺寸渲染的 RGB 图像直接粘贴，其它图像转换并缩放到单元格"""
+        src = img
+        if img.mode != "RGB" or img.size != (cell_w, cell_h):
+            with stage("resample"):
+                if img.mode != "RGB":
+                    img = img.convert("RGB")
+                if img.size != (cell_w, cell_h):
+                    img = img.resize((cell_w, cell_h), Image.LANCZOS)
+        with stage("compose"):
+            self.image.paste(img, (x, y))
+        if img is not src:
+            img.close()
+
+    def caption(self, text: str, x: int, y: int):
+        self.draw.text((x, y), text, font=self.caption_font, fill=(0, 0, 0))
+
+    def encode(self) -> tuple:
+        return encode_raster_page(self.image)
+
+    def close(self):
+        self.image.close()
+        self.draw = None
+
+class VectorPDFPage:
+    """矢量页面：与位图页面使用相同的像素坐标布局，输出为 PDF 路径和文字运算符"""
+    CAPTION_SIZE_PX = 11
+
+    def __init__(self, width: int, height: int, resolution: float = 300.0):
+        self.scale = 72.0 / resolution
+        self.width_pt = width * self.scale
+        self.height_pt = height * self.scale
+        self._ops = []
+
+    def _text(self, text, x_pt, baseline_pt, size_x, size_y, rgba=(0, 0, 0, 255)):
+        self._ops.append(b"BT " + _pdf_color(rgba, b"rg") + b" /F1 1 Tf %.4f 0 0 %.4f %.4f %.4f Tm %s Tj ET"
+                         % (size_x, size_y, x_pt, baseline_pt, _pdf_text(text)))
+
+    def place(self, shapes: dict, x: int, y: int, cell_w: int, cell_h: int):
+        with stage("compose"):
+            w, h = shapes["size"]
+            sx = cell_w / w * self.scale
+            sy = cell_h / h * self.scale
+            ox = x * self.scale
+            oy = self.height_pt - y * self.scale
+            ops = self._ops
+            # 码自身坐标系：像素单位、y 向下
+            ops.append(b"q %.6f 0 0 %.6f %.4f %.4f cm" % (sx, -sy, ox, oy))
+            if shapes["background"] is not None:
+                ops.append(_pdf_color(shapes["background"], b"rg") + b" 0 0 %d %d re f" % (w, h))
+            for rgba, rects in shapes["rects"]:
+                ops.append(_pdf_color(rgba, b"rg"))
+                ops.append(b"\n".join(b"%d %d %d %d re" % r for r in rects))
+                ops.append(b"f")
+            ops.append(b"Q")
+            for tx, baseline, size_px, text, rgba in shapes["texts"]:
+                self._text(text, ox + tx * sx, oy - baseline * sy, size_px * sx, size_px * sy, rgba)
+
+    def caption(self, text: str, x: int, y: int):
+        size = self.CAPTION_SIZE_PX * self.scale
+        self._text(text, x * self.scale, self.height_pt - (y + self.CAPTION_SIZE_PX) * self.scale, size, size)
+
+    def encode(self) -> tuple:
+        return encode_vector_page(b"\n".join(self._ops), self.width_pt, self.height_pt)
+
+    def close(self):
+        self._ops = []
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+多页预览：按需以屏幕分辨率渲染任务中的任意一页，结果放入按字节限额的 LRU 缓存
+"""
+
+import threading
+from collections import OrderedDict
+
+from .layout import PageLayout
+from .export import render_preview_page
+
+class PreviewPages:
+    """
+    整个任务的预览页面，页号与导出一致（layout 由 plan_job_layout 规划）。
+    级别 0 为按 scale 渲染的屏幕分辨率页，级别 n 为其 1/2^n 的缩略图：
+    任一更大的级别已缓存时从最近的一级直接 reduce 得到，否则按相应比例直接渲染，不会先渲染大图。
+    所有级别共用一个线程安全的 LRU 缓存，超过 max_bytes 时淘汰最久未使用的页面
+    """
+
+    def __init__(self, mode: str, options: dict, layout: PageLayout, items, labels=None, scale: float = 1.0,
+                 max_bytes: int = 64 * 1024 * 1024):
+        self.mode = mode
+        self.options = options
+        self.layout = layout
+        self.items = items
+        self.labels = labels
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def pages(self) -> int:
+        return self.layout.pages
+
+    def cached(self, page: int, level: int = 0):
+        """已缓存的页面图像，没有则返回 None（不渲染）"""
+        key = (page, level)
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+            return img
+
+    def render(self, page: int, level: int = 0, cancelled=None):
+        """取得第 page 页（从 0 开始）的预览图，未缓存时渲染；取消时返回 None"""
+        img = self.cached(page, level)
+        with self._lock:
+            if img is not None:
+                self.hits += 1
+                return img
+            self.misses += 1
+        # 从已缓存的最近一个更大级别缩小，跨级时一次 reduce(2^差值)
+        larger = None
+        for k in range(level - 1, -1, -1):
+            larger = self.cached(page, k)
+            if larger is not None:
+                break
+        if larger is not None:
+            img = larger.reduce(2 ** (level - k))
+        else:
+            rows = self.layout.page_items(page)
+            labels = self.labels[rows.start:rows.stop] if self.labels is not None else None
+            img = render_preview_page(self.mode, self.options, self.layout, self.items[rows.start:rows.stop], labels,
+                                      self.scale / (2 ** level), cancelled)
+            if img is None:
+                return None
+        self._put((page, level), img)
+        return img
+
+    def _put(self, key, img):
+        size = img.width * img.height * len(img.getbands())
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = img
+            self._bytes += size
+            while len(self._entries) > 1 and self._bytes > self.max_bytes:
+                _, old = self._entries.popitem(last=False)
+                self._bytes -= old.width * old.height * len(old.getbands())
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
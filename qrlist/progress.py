@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+合并的进度上报：逐条 / 逐页的进度先记在 ProgressReporter 里，按固定频率（默认 10Hz）
+交给回调一个快照，界面事件循环或 stderr 不会被逐条的更新淹没
+"""
+
+import time
+
+# 默认上报间隔（秒）
+PROGRESS_INTERVAL = 0.1
+
+class ProgressReporter:
+    """
+    update() 可以每条调用一次，只有距上次上报超过 interval 秒、或全部完成时才调用 callback(snapshot)。
+    snapshot 为 dict：items_done / items_total / pages_done / pages_total / bytes_written /
+    elapsed（秒）/ items_per_s（平滑后的速度）/ eta（剩余秒数，未知时为 None）
+    """
+
+    def __init__(self, callback, items_total: int = 0, pages_total: int = 0, interval: float = PROGRESS_INTERVAL,
+                 clock=time.monotonic):
+        self.callback = callback
+        self.items_total = items_total
+        self.pages_total = pages_total
+        self.interval = interval
+        self.clock = clock
+        self.items_done = 0
+        self.pages_done = 0
+        self.bytes_written = 0
+        self.items_per_s = 0.0
+        self.reports = 0
+        self._start = clock()
+        self._last_time = self._start
+        self._last_items = 0
+        self._dirty = False
+
+    def update(self, items_done: int = None, pages_done: int = None, bytes_written: int = None):
+        """记录最新的累计值（未给出的保持不变），到达上报时间或全部完成时上报"""
+        if items_done is not None:
+            self.items_done = items_done
+        if pages_done is not None:
+            self.pages_done = pages_done
+        if bytes_written is not None:
+            self.bytes_written = bytes_written
+        self._dirty = True
+        now = self.clock()
+        if now - self._last_time >= self.interval or (self.items_total and self.items_done >= self.items_total):
+            self._report(now)
+
+    def finish(self):
+        """上报最后一次尚未发出的进度"""
+        if self._dirty:
+            self._report(self.clock())
+
+    def _report(self, now):
+        span = now - self._last_time
+        if span > 0 and self.items_done > self._last_items:
+            rate = (self.items_done - self._last_items) / span
+            # 指数平滑，避免单页渲染时间的抖动让速度和剩余时间来回跳
+            self.items_per_s = rate if self.items_per_s == 0 else self.items_per_s * 0.7 + rate * 0.3
+        self._last_time = now
+        self._last_items = self.items_done
+        self._dirty = False
+        self.reports += 1
+        self.callback(self.snapshot(now))
+
+    def snapshot(self, now: float = None) -> dict:
+        now = self.clock() if now is None else now
+        remaining = max(0, self.items_total - self.items_done)
+        eta = remaining / self.items_per_s if self.items_per_s > 0 else (0.0 if remaining == 0 else None)
+        return {
+            "items_done": self.items_done,
+            "items_total": self.items_total,
+            "pages_done": self.pages_done,
+            "pages_total": self.pages_total,
+            "bytes_written": self.bytes_written,
+            "elapsed": now - self._start,
+            "items_per_s": self.items_per_s,
+            "eta": eta,
+        }
+
+def format_duration(seconds: float) -> str:
+    """剩余时间的显示：1:05、1:02:03，未知时为 --:--"""
+    if seconds is None:
+        return "--:--"
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
@@ -0,0 +1,599 @@
+# -*- coding: utf-8 -*-
+"""
+二维码 / 条形码渲染核心（不依赖 Qt，可在命令行或渲染进程中使用）
+"""
+
+import os
+import re
+import threading
+import logging
+from collections import OrderedDict
+
+from PIL import Image, ImageDraw, ImageOps, ImageFont
+
+from .timing import stage
+
+# qrcode / python-barcode 在首次编码时才导入，只用一种码制时不加载另一个库
+
+logger = logging.getLogger(__name__)
+
+# -----------------------------
+# 辅助函数：颜色
+# -----------------------------
+def hex_to_rgba(hex_color: str, alpha=255):
+    """将 '#RRGGBB' -> (R,G,B,A)"""
+    if not hex_color:
+        return (0, 0, 0, alpha)
+    s = hex_color.strip()
+    if s.startswith('#'):
+        s = s[1:]
+    if len(s) == 3:
+        s = ''.join([c*2 for c in s])
+    r = int(s[0:2], 16)
+    g = int(s[2:4], 16)
+    b = int(s[4:6], 16)
+    return (r, g, b, alpha)
+
+# -----------------------------
+# 标签文字字体缓存
+# -----------------------------
+def _font_variant_path(font_path: str, bold: bool, italic: bool) -> str:
+    """按 Windows 字体命名习惯推导加粗/斜体文件名，如 arial.ttf -> arialbd.ttf"""
+    if bold and italic:
+        suffix = "bi"
+    elif bold:
+        suffix = "bd"
+    elif italic:
+        suffix = "i"
+    else:
+        return font_path
+    return font_path.replace(".ttf", f"{suffix}.ttf").replace(".otf", f"{suffix}.otf")
+
+class FontCache:
+    """
+    进程级字体缓存，键为 (path, size, bold, italic)。
+    变体文件只解析一次，加载失败的文件会被记住，之后直接返回已构建的 FreeTypeFont。
+    """
+    def __init__(self):
+        self._fonts = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+
+    def get(self, font_path: str = None, size: int = 12, bold: bool = False, italic: bool = False):
+        key = (font_path or None, size, bool(bold), bool(italic))
+        with self._lock:
+            font = self._fonts.get(key)
+            if font is None:
+                font = self._resolve(*key)
+                self._fonts[key] = font
+            return font
+
+    def _truetype(self, path, size):
+        if path in self._failed:
+            return None
+        try:
+            return ImageFont.truetype(path, size=max(6, size))
+        except Exception as e:
+            logger.warning(f"Failed to load font {path}: {e}")
+            self._failed.add(path)
+            return None
+
+    def _resolve(self, font_path, size, bold, italic):
+        # 优先用户指定字体（及其加粗/斜体变体），其次 Arial，最后 Pillow 默认字体
+        if font_path and os.path.exists(font_path):
+            try_font = _font_variant_path(font_path, bold, italic)
+            font = self._truetype(try_font, size)
+            if font:
+                logger.info(f"Loaded font: {try_font}, size: {size}")
+                return font
+        font = self._truetype(_font_variant_path("arial.ttf", bold, italic), size)
+        if font:
+            logger.info(f"Loaded fallback font: Arial, size: {size}")
+            return font
+        logger.info(f"Using Pillow default font, size limited to: {min(size, 12)}")
+        return ImageFont.load_default()
+
+    def clear(self):
+        with self._lock:
+            self._fonts.clear()
+            self._failed.clear()
+
+label_font_cache = FontCache()
+
+def _text_label_layout(width: int, height: int, text: str, font,
+                       text_pos: str = "bottom", text_align: str = "center", text_margin: int = 5):
+    """
+    计算文字区域布局，位图与矢量输出共用。
+    返回 (extra_height, code_y, text_x, text_y)：新增高度、原图的纵向偏移、文字左上角坐标
+    """
+    text_bbox = font.getbbox(text)
+    text_w, text_h = text_bbox[2] - text_bbox[0], text_bbox[3] - text_bbox[1]
+    extra_height = text_h + text_margin * 2
+
+    if text_pos == "bottom":
+        code_y = 0
+        text_y = height + text_margin
+    else:
+        code_y = extra_height
+        text_y = text_margin
+
+    if text_align == "center":
+        text_x = (width - text_w) // 2
+    elif text_align == "right":
+        text_x = width - text_w - text_margin
+    else:
+        text_x = text_margin
+    return extra_height, code_y, text_x, text_y
+
+def _ink(rgba, mode: str):
+    """RGBA 颜色 -> 指定图像模式下的颜色值"""
+    return tuple(rgba) if mode == "RGBA" else tuple(rgba[:3])
+
+def _label_height(text: str, font, text_margin: int = 5) -> int:
+    """文字区域占用的高度（与 _text_label_layout 的 extra_height 一致）"""
+    text_bbox = font.getbbox(text)
+    return text_bbox[3] - text_bbox[1] + text_margin * 2
+
+def _add_text_label(img: Image.Image, text: str, font, fill, back_rgba,
+                    text_pos: str = "bottom", text_align: str = "center", text_margin: int = 5) -> Image.Image:
+    """在图像上方或下方扩出文字区域并绘制文字，二维码与条形码共用；输出与 img 模式相同"""
+    extra_height, code_y, text_x, text_y = _text_label_layout(img.width, img.height, text, font,
+                                                              text_pos, text_align, text_margin)
+    new_img = Image.new(img.mode, (img.width, img.height + extra_height), _ink(back_rgba, img.mode))
+    new_img.paste(img, (0, code_y))
+    ImageDraw.Draw(new_img).text((text_x, text_y), text, font=font, fill=_ink(fill, img.mode))
+    return new_img
+
+def _fit_canvas(img: Image.Image, fit_size: tuple, back_rgba) -> Image.Image:
+    """把按整数模块渲染好的码居中放到 fit_size 的 RGB 画布上，不做任何重采样"""
+    canvas = Image.new("RGB", fit_size, _ink(back_rgba, "RGB"))
+    canvas.paste(img, ((fit_size[0] - img.width) // 2, (fit_size[1] - img.height) // 2))
+    img.close()
+    return canvas
+
+# -----------------------------
+# QR 生成核心逻辑
+# -----------------------------
+# 栅格化时使用的调色板索引
+_QR_BACK, _QR_MODULE, _QR_OUTER_EYE, _QR_INNER_EYE = 0, 1, 2, 3
+
+def qr_index_buffer(matrix, outer_eye_color: str = None, inner_eye_color: str = None) -> bytearray:
+    """QR 矩阵 -> 每模块一个调色板索引字节（背景/模块/外眼/内眼），定位眼颜色以掩码写入"""
+    modules = len(matrix)
+    buf = bytearray(b"".join(bytes(row) for row in matrix))
+
+    def fill(fx, fy, size, value):
+        for r in range(fy, fy + size):
+            start = r * modules + fx
+            buf[start:start + size] = bytes((value,)) * size
+
+    for fx, fy in ((0, 0), (modules - 7, 0), (0, modules - 7)):
+        if outer_eye_color:
+            fill(fx, fy, 7, _QR_OUTER_EYE)
+        fill(fx + 1, fy + 1, 5, _QR_BACK)
+        fill(fx + 2, fy + 2, 3, _QR_INNER_EYE if inner_eye_color else _QR_MODULE)
+    return buf
+
+def rasterize_qr_matrix(matrix, box_size: int,
+                        back_color: str = "#FFFFFF",
+                        module_color: str = "#000000",
+                        outer_eye_color: str = None,
+                        inner_eye_color: str = None,
+                        mode: str = "RGBA") -> Image.Image:
+    """
+    将 QR 矩阵一次性转换为调色板索引图，再按整数倍 NEAREST 放大到 box_size。
+    定位眼颜色以索引掩码写入，不再覆盖绘制；输出与逐模块绘制逐像素一致。
+    mode 为输出的图像模式（'RGBA' / 'RGB'）
+    """
+    modules = len(matrix)
+    buf = qr_index_buffer(matrix, outer_eye_color, inner_eye_color)
+    palette = (hex_to_rgba(back_color) + hex_to_rgba(module_color)
+               + hex_to_rgba(outer_eye_color) + hex_to_rgba(inner_eye_color))
+    img = Image.frombytes("P", (modules, modules), bytes(buf))
+    img.putpalette(palette, rawmode="RGBA")
+    if box_size > 1:
+        qr_px = modules * box_size
+        img = img.resize((qr_px, qr_px), Image.NEAREST)
+    return img.convert(mode)
+
+def _rasterize_qr_reference(matrix, box_size, back_color, module_color, outer_eye_color, inner_eye_color):
+    """逐模块 draw.rectangle 的原始实现，保留用于与 rasterize_qr_matrix 对比"""
+    modules = len(matrix)
+    qr_px = modules * box_size
+    img = Image.new("RGBA", (qr_px, qr_px), hex_to_rgba(back_color))
+    draw = ImageDraw.Draw(img)
+    mod_color_rgba = hex_to_rgba(module_color)
+    for r in range(modules):
+        for c in range(modules):
+            if matrix[r][c]:
+                x0 = c * box_size
+                y0 = r * box_size
+                draw.rectangle([x0, y0, x0 + box_size - 1, y0 + box_size - 1], fill=mod_color_rgba)
+
+    finder_coords = [(0, 0), (modules - 7, 0), (0, modules - 7)]
+    for fx, fy in finder_coords:
+        if outer_eye_color:
+            col = hex_to_rgba(outer_eye_color)
+            x0 = fx * box_size
+            y0 = fy * box_size
+            draw.rectangle([x0, y0, x0 + 7 * box_size - 1, y0 + 7 * box_size - 1], fill=col)
+        bc = hex_to_rgba(back_color)
+        x1 = (fx + 1) * box_size
+        y1 = (fy + 1) * box_size
+        draw.rectangle([x1, y1, x1 + 5 * box_size - 1, y1 + 5 * box_size - 1], fill=bc)
+        if inner_eye_color:
+            col2 = hex_to_rgba(inner_eye_color)
+            x2 = (fx + 2) * box_size
+            y2 = (fy + 2) * box_size
+            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=col2)
+        else:
+            ic = hex_to_rgba(module_color)
+            x2 = (fx + 2) * box_size
+            y2 = (fy + 2) * box_size
+            draw.rectangle([x2, y2, x2 + 3 * box_size - 1, y2 + 3 * box_size - 1], fill=ic)
+    return img
+
+def _encode_qr_matrix(data: str, version: int = None, error_correction: str = "M"):
+    """QR 编码（Reed-Solomon + 掩码评估），返回不可变的行字节元组"""
+    import qrcode
+    from qrcode.constants import ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q, ERROR_CORRECT_H
+
+    ec_map = {"L": ERROR_CORRECT_L, "M": ERROR_CORRECT_M, "Q": ERROR_CORRECT_Q, "H": ERROR_CORRECT_H}
+    ec = ec_map.get(error_correction.upper(), ERROR_CORRECT_M)
+
+    qr = qrcode.QRCode(
+        version=version if version else None,
+        error_correction=ec,
+        box_size=1,
+        border=0
+    )
+    qr.add_data(data)
+    try:
+        qr.make(fit=(version is None))
+    except Exception:
+        qr = qrcode.QRCode(error_correction=ec, box_size=1, border=0)
+        qr.add_data(data)
+        qr.make(fit=True)
+    return tuple(bytes(row) for row in qr.get_matrix())
+
+class QRMatrixCache:
+    """
+    线程安全的 QR 矩阵 LRU 缓存，键为 (data, version, error_correction)。
+    超过 max_entries 条或 max_bytes 字节时淘汰最久未使用的条目；
+    只修改颜色、内边距、文字等参数时不会重新编码。
+    """
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, data: str, version: int = None, error_correction: str = "M"):
+        key = (data, version or None, error_correction.upper())
+        with self._lock:
+            matrix = self._entries.get(key)
+            if matrix is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return matrix
+            self.misses += 1
+        # 编码放在锁外，避免阻塞其它线程
+        with stage("encode"):
+            matrix = _encode_qr_matrix(data, version, error_correction)
+        self._put(key, matrix)
+        return matrix
+
+    def _put(self, key, matrix):
+        size = len(matrix) * len(matrix) + len(key[0])
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = matrix
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                old_key, old_matrix = self._entries.popitem(last=False)
+                self._bytes -= len(old_matrix) * len(old_matrix) + len(old_key[0])
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+qr_matrix_cache = QRMatrixCache()
+
+def generate_qr_pil(data: str,
+                    version: int = None,
+                    error_correction: str = "M",
+                    out_px: int = 300,
+                    left_right_padding_px: int = 10,
+                    top_bottom_padding_px: int = 10,
+                    module_color: str = "#000000",
+                    back_color: str = "#FFFFFF",
+                    outer_eye_color: str = None,
+                    inner_eye_color: str = None,
+                    show_text: bool = False,
+                    font_path: str = None,
+                    text_pos: str = "bottom",
+                    text_align: str = "center",
+                    text_margin: int = 5,
+                    text_size: int = 12,
+                    text_bold: bool = False,
+                    text_italic: bool = False,
+                    label: str = None,
+                    renderer: str = "fast",
+                    fit_size: tuple = None) -> Image.Image:
+    """
+    生成二维码 PIL Image，支持文字大小和样式（加粗/斜体），非正方形画布
+    - label: 显示的文字，默认为数据本身
+    - renderer: 'fast'（整块栅格化）或 'reference'（逐模块绘制，用于对比）
+    - fit_size: (宽, 高)。指定时取能放进该尺寸的最大整数模块，直接输出该尺寸的 RGB 图像，
+      不再按 out_px 缩放（排版时省去逐个重采样，模块边缘保持锐利）
+    """
+    matrix = qr_matrix_cache.get(data, version, error_correction)
+    modules = len(matrix)
+    text = data if label is None else label
+    font = label_font_cache.get(font_path, text_size, text_bold, text_italic) if show_text else None
+    if fit_size is not None:
+        text_h = _label_height(text, font, text_margin) if show_text else 0
+        available_px = min(fit_size[0] - 2 * left_right_padding_px,
+                           fit_size[1] - 2 * top_bottom_padding_px - text_h)
+    else:
+        available_px = max(1, out_px - 2 * left_right_padding_px)
+    box_size = max(1, available_px // modules)
+    mod_color_rgba = hex_to_rgba(module_color)
+    back_rgba = hex_to_rgba(back_color)
+    with stage("rasterize"):
+        if renderer == "reference":
+            img = _rasterize_qr_reference(matrix, box_size, back_color, module_color, outer_eye_color, inner_eye_color)
+            if fit_size is not None:
+                img = img.convert("RGB")
+        else:
+            img = rasterize_qr_matrix(matrix, box_size, back_color, module_color, outer_eye_color, inner_eye_color,
+                                      mode="RGBA" if fit_size is None else "RGB")
+
+    # 添加文字
+    if show_text:
+        with stage("text"):
+            img = _add_text_label(img, text, font, mod_color_rgba, back_rgba, text_pos, text_align, text_margin)
+
+    if fit_size is not None:
+        with stage("compose"):
+            return _fit_canvas(img, fit_size, back_rgba)
+
+    # 添加左右和上下内边距
+    with stage("compose"):
+        final = ImageOps.expand(img, border=(left_right_padding_px, top_bottom_padding_px, left_right_padding_px, top_bottom_padding_px), fill=back_rgba)
+
+    # 调整到目标宽度（保持比例，纵向可能非正方形）
+    if final.width != out_px:
+        scale = out_px / final.width
+        with stage("resample"):
+            final = final.resize((out_px, int(final.height * scale)), Image.NEAREST)
+
+    return final
+
+# -----------------------------
+# Barcode 生成核心逻辑
+# -----------------------------
+# 条码两侧静区宽度（以窄条模块数计，与原 ImageWriter quiet_zone=6.5 一致）
+BARCODE_QUIET_ZONE_MODULES = 6.5
+
+def build_barcode_modules(data: str, barcode_type: str = "code128"):
+    """
+    用 python-barcode 的 build() 得到模块串（'1' 条 / '0' 空），不经过任何 writer。
+    数据与类型不匹配（如 EAN13 长度不对）时降级为 code128。返回 (barcode 对象, 模块串)
+    """
+    import barcode
+
+    with stage("encode"):
+        return _build_barcode_modules(barcode, data, barcode_type)
+
+def _build_barcode_modules(barcode, data, barcode_type):
+    try:
+        barcode_cls = barcode.get_barcode_class(barcode_type)
+    except Exception:
+        barcode_cls = barcode.get_barcode_class("code128")
+    try:
+        obj = barcode_cls(data)
+        code = obj.build()[0]
+    except Exception:
+        obj = barcode.get_barcode_class("code128")(data)
+        code = obj.build()[0]
+    return obj, code
+
+def render_bar_pattern(code: str, bar_width_px: int, bar_height_px: int, bar_rgba, bg_rgba,
+                       mode: str = "RGBA") -> Image.Image:
+    """将模块串直接绘制为条码图：每个模块正好 bar_width_px 宽、bar_height_px 高，输出为 mode 模式"""
+    row = bytes(0 if c == "0" else 1 for c in code)
+    img = Image.frombytes("P", (len(row), 1), row)
+    img.putpalette(tuple(bg_rgba) + tuple(bar_rgba), rawmode="RGBA")
+    img = img.resize((len(row) * max(1, bar_width_px), max(1, bar_height_px)), Image.NEAREST)
+    return img.convert(mode)
+
+def generate_barcode_pil(data: str,
+                        barcode_type: str = "code128",
+                        bar_width_px: int = 2,
+                        bar_height_px: int = 100,
+                        margin_px: int = 6,
+                        bar_color: str = "#000000",
+                        bg_transparent: bool = False,
+                        bg_color: str = "#FFFFFF",
+                        show_text: bool = True,
+                        font_path: str = None,
+                        text_pos: str = "bottom",
+                        text_align: str = "center",
+                        text_margin: int = 5,
+                        text_size: int = 12,
+                        text_bold: bool = False,
+                        text_italic: bool = False,
+                        label: str = None,
+                        fit_size: tuple = None) -> Image.Image:
+    """
+    生成条形码 PIL Image。fit_size 为 (宽, 高) 时取能放进该尺寸的最大整数条宽，
+    条高不超过可用高度，直接输出该尺寸的 RGB 图像（透明背景按白色处理）
+    """
+    bar_rgba = hex_to_rgba(bar_color)
+    bg_rgba = (0, 0, 0, 0) if bg_transparent else hex_to_rgba(bg_color)
+    obj, code = build_barcode_modules(data, barcode_type)
+    if show_text:
+        font = label_font_cache.get(font_path, text_size, text_bold, text_italic)
+        text = obj.get_fullcode() if label is None else label
+    mode = "RGBA"
+    if fit_size is not None:
+        mode = "RGB"
+        if bg_transparent:
+            bg_rgba = (255, 255, 255, 255)
+        available_w = fit_size[0] - 2 * margin_px
+        bar_width_px = max(1, int(available_w // (len(code) + 2 * BARCODE_QUIET_ZONE_MODULES)))
+        while bar_width_px > 1 and len(code) * bar_width_px + 2 * int(round(BARCODE_QUIET_ZONE_MODULES * bar_width_px)) > available_w:
+            bar_width_px -= 1
+        text_h = _label_height(text, font, text_margin) if show_text else 0
+        bar_height_px = max(1, min(bar_height_px, fit_size[1] - 2 * margin_px - text_h))
+    with stage("rasterize"):
+        img = render_bar_pattern(code, bar_width_px, bar_height_px, bar_rgba, bg_rgba, mode)
+        quiet_px = int(round(BARCODE_QUIET_ZONE_MODULES * max(1, bar_width_px)))
+        img = ImageOps.expand(img, border=(quiet_px, 0, quiet_px, 0), fill=_ink(bg_rgba, mode))
+
+    # 文字由 PIL 使用缓存字体重绘，支持自定义字体/加粗/斜体/对齐
+    if show_text:
+        with stage("text"):
+            img = _add_text_label(img, text, font, bar_rgba, bg_rgba, text_pos, text_align, text_margin)
+
+    with stage("compose"):
+        if fit_size is not None:
+            return _fit_canvas(img, fit_size, bg_rgba)
+        return ImageOps.expand(img, border=(margin_px, margin_px, margin_px, margin_px), fill=bg_rgba)
+
+# -----------------------------
+# 矢量图形（用于矢量 PDF 导出）
+# -----------------------------
+_QR_INDEX_RUNS = re.compile(rb"\x01+|\x02+|\x03+")
+
+def _font_ascent(font, fallback: int) -> int:
+    try:
+        return font.getmetrics()[0]
+    except Exception:
+        return fallback
+
+def _vector_label(width, height, text, font, rgba, text_pos, text_align, text_margin):
+    """返回 (extra_height, code_y, 文字条目)，文字条目为 (x, baseline_y, size_px, text, rgba)"""
+    extra_height, code_y, text_x, text_y = _text_label_layout(width, height, text, font,
+                                                              text_pos, text_align, text_margin)
+    bbox = font.getbbox(text)
+    size_px = getattr(font, "size", bbox[3] - bbox[1])
+    return extra_height, code_y, (text_x, text_y + _font_ascent(font, size_px), size_px, text, rgba)
+
+def qr_vector_shapes(data: str,
+                     version: int = None,
+                     error_correction: str = "M",
+                     out_px: int = 300,
+                     left_right_padding_px: int = 10,
+                     top_bottom_padding_px: int = 10,
+                     module_color: str = "#000000",
+                     back_color: str = "#FFFFFF",
+                     outer_eye_color: str = None,
+                     inner_eye_color: str = None,
+                     show_text: bool = False,
+                     font_path: str = None,
+                     text_pos: str = "bottom",
+                     text_align: str = "center",
+                     text_margin: int = 5,
+                     text_size: int = 12,
+                     text_bold: bool = False,
+                     text_italic: bool = False,
+                     label: str = None,
+                     renderer: str = "fast") -> dict:
+    """
+    与 generate_qr_pil 布局一致的矢量描述：每行相同颜色的连续模块合并为一个矩形。
+    返回 {'size': (w, h), 'background': rgba, 'rects': [(rgba, [(x, y, w, h), ...]), ...], 'texts': [...]}，
+    坐标为缩放到 out_px 之前的像素坐标（y 向下）
+    """
+    matrix = qr_matrix_cache.get(data, version, error_correction)
+    modules = len(matrix)
+    available_px = max(1, out_px - 2 * left_right_padding_px)
+    box_size = max(1, available_px // modules)
+    qr_px = modules * box_size
+    width = qr_px + 2 * left_right_padding_px
+    height = qr_px
+    code_y = 0
+    texts = []
+    if show_text:
+        font = label_font_cache.get(font_path, text_size, text_bold, text_italic)
+        extra_height, code_y, placed = _vector_label(qr_px, qr_px, data if label is None else label, font,
+                                                     hex_to_rgba(module_color), text_pos, text_align, text_margin)
+        height += extra_height
+        texts.append((placed[0] + left_right_padding_px, placed[1] + top_bottom_padding_px) + placed[2:])
+    height += 2 * top_bottom_padding_px
+
+    ox, oy = left_right_padding_px, top_bottom_padding_px + code_y
+    buf = bytes(qr_index_buffer(matrix, outer_eye_color, inner_eye_color))
+    runs = {_QR_MODULE: [], _QR_OUTER_EYE: [], _QR_INNER_EYE: []}
+    for r in range(modules):
+        row_y = oy + r * box_size
+        for m in _QR_INDEX_RUNS.finditer(buf, r * modules, (r + 1) * modules):
+            start = m.start() - r * modules
+            runs[buf[m.start()]].append((ox + start * box_size, row_y, (m.end() - m.start()) * box_size, box_size))
+    colors = {_QR_MODULE: module_color, _QR_OUTER_EYE: outer_eye_color, _QR_INNER_EYE: inner_eye_color}
+    rects = [(hex_to_rgba(colors[k]), v) for k, v in runs.items() if v]
+    return {"size": (width, height), "background": hex_to_rgba(back_color), "rects": rects, "texts": texts}
+
+def barcode_vector_shapes(data: str,
+                          barcode_type: str = "code128",
+                          bar_width_px: int = 2,
+                          bar_height_px: int = 100,
+                          margin_px: int = 6,
+                          bar_color: str = "#000000",
+                          bg_transparent: bool = False,
+                          bg_color: str = "#FFFFFF",
+                          show_text: bool = True,
+                          font_path: str = None,
+                          text_pos: str = "bottom",
+                          text_align: str = "center",
+                          text_margin: int = 5,
+                          text_size: int = 12,
+                          text_bold: bool = False,
+                          text_italic: bool = False,
+                          label: str = None) -> dict:
+    """与 generate_barcode_pil 布局一致的矢量描述：每段连续的条为一个矩形"""
+    bar_rgba = hex_to_rgba(bar_color)
+    bw = max(1, bar_width_px)
+    bh = max(1, bar_height_px)
+    obj, code = build_barcode_modules(data, barcode_type)
+    quiet_px = int(round(BARCODE_QUIET_ZONE_MODULES * bw))
+    inner_w = len(code) * bw + 2 * quiet_px
+    height = bh
+    code_y = 0
+    texts = []
+    if show_text:
+        font = label_font_cache.get(font_path, text_size, text_bold, text_italic)
+        text = obj.get_fullcode() if label is None else label
+        extra_height, code_y, placed = _vector_label(inner_w, bh, text, font, bar_rgba,
+                                                     text_pos, text_align, text_margin)
+        height += extra_height
+        texts.append((placed[0] + margin_px, placed[1] + margin_px) + placed[2:])
+    ox = margin_px + quiet_px
+    oy = margin_px + code_y
+    bars = [(ox + m.start() * bw, oy, (m.end() - m.start()) * bw, bh) for m in re.finditer(r"[^0]+", code)]
+    return {
+        "size": (inner_w + 2 * margin_px, height + 2 * margin_px),
+        "background": None if bg_transparent else hex_to_rgba(bg_color),
+        "rects": [(bar_rgba, bars)],
+        "texts": texts,
+    }
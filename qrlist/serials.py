@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+序列号模板：前缀 + 补零计数器（起止 / 步长）+ 可选校验位 + 后缀，按需生成，不展开成列表
+"""
+
+import re
+
+def ean_check_digit(digits: str) -> str:
+    """EAN / UPC 校验位（从右往左第 1、3、5… 位权重 3，其余权重 1）"""
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return str((10 - total % 10) % 10)
+
+def luhn_check_digit(digits: str) -> str:
+    """Luhn（模 10）校验位"""
+    total = 0
+    for i, d in enumerate(reversed(digits)):
+        n = int(d)
+        if i % 2 == 0:
+            n *= 2
+            if n > 9:
+                n -= 9
+        total += n
+    return str((10 - total % 10) % 10)
+
+CHECK_DIGITS = {"ean": ean_check_digit, "luhn": luhn_check_digit}
+
+# 模板写法：PREFIX{START..END}SUFFIX 或 PREFIX{START..END:STEP}SUFFIX，位数取 START 的长度
+_SPEC = re.compile(r"^(?P<prefix>.*?)\{(?P<start>\d+)\.\.(?P<stop>\d+)(?::(?P<step>-?\d+))?\}(?P<suffix>.*)$", re.S)
+_NON_DIGITS = re.compile(r"\D")
+
+class SerialTemplate:
+    """
+    序列号数据集：第 i 条为 prefix + 计数器（补零到 width 位）+ 校验位 + suffix。
+    计数器从 start 到 stop（含），步长 step；校验位按前缀和计数器中的数字计算。
+    len() 精确，支持下标 / 切片 / 迭代，可直接替代解析出的数据列表
+    """
+
+    def __init__(self, prefix: str = "", start: int = 1, stop: int = 1, step: int = 1, width: int = 0,
+                 suffix: str = "", check_digit: str = None):
+        if step == 0:
+            raise ValueError("步长不能为 0")
+        if check_digit is not None and check_digit not in CHECK_DIGITS:
+            raise ValueError(f"不支持的校验位：{check_digit}")
+        self.prefix = prefix
+        self.suffix = suffix
+        self.width = width
+        self.check_digit = check_digit
+        self._range = range(start, stop + (1 if step > 0 else -1), step)
+        self._prefix_digits = _NON_DIGITS.sub("", prefix)
+
+    @classmethod
+    def parse(cls, spec: str, check_digit: str = None) -> "SerialTemplate":
+        """解析 'SN-2026-{000001..999999}' 形式的模板"""
+        m = _SPEC.match(spec)
+        if not m:
+            raise ValueError(f"无法解析序列号模板：{spec}（示例：SN-2026-{{000001..999999}}）")
+        return cls(m.group("prefix"), int(m.group("start")), int(m.group("stop")), int(m.group("step") or 1),
+                   len(m.group("start")), m.group("suffix"), check_digit)
+
+    def _format(self, n: int) -> str:
+        counter = str(n).zfill(self.width)
+        if self.check_digit is not None:
+            counter += CHECK_DIGITS[self.check_digit](self._prefix_digits + counter)
+        return f"{self.prefix}{counter}{self.suffix}"
+
+    def __len__(self):
+        return len(self._range)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._format(n) for n in self._range[index]]
+        return self._format(self._range[index])
+
+    def __iter__(self):
+        for n in self._range:
+            yield self._format(n)
+
+    def __bool__(self):
+        return len(self._range) > 0
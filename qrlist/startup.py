@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动导入耗时检查（python -X importtime）。
+用法: python -m qrlist.startup [--mode qr|barcode] [--budget-ms 150]
+统计无界面导出一次所需的全部导入耗时（扣除解释器自身启动时的导入），
+超出预算时退出码为 1；同时检查没有加载 PySide6、另一种码制的库和只在表格输入 / 内存分析 / 基准测试时才用到的模块，
+且只导入 qrlist.render 时不会经由包 __init__ 带入导出、时间线等模块
+"""
+
+import re
+import sys
+import argparse
+import subprocess
+
+# 默认预算：只生成二维码的无界面导出
+DEFAULT_BUDGET_MS = 150.0
+
+# 模拟一次无界面导出：加载命令行入口并渲染一个码
+_SNIPPETS = {
+    "qr": "import qrlist.cli, qrlist.render as r; r.generate_qr_pil('12345')",
+    "barcode": "import qrlist.cli, qrlist.render as r; r.generate_barcode_pil('12345')",
+}
+# 普通文本输入的导出不应加载的模块（表格读取、tracemalloc 内存分析、基准测试）
+_OPTIONAL = ("csv", "zipfile", "xml.etree", "pyexpat", "tracemalloc", "qrlist.tabular", "qrlist.memprofile", "qrlist.bench")
+# 各模式下不应被加载的模块
+_FORBIDDEN = {
+    "qr": ("PySide6", "barcode") + _OPTIONAL,
+    "barcode": ("PySide6", "qrcode") + _OPTIONAL,
+}
+# 只导入渲染模块时不应被加载的模块
+_RENDER_SNIPPET = "import qrlist.render"
+_RENDER_FORBIDDEN = ("qrlist.export", "qrlist.pdf", "qrlist.trace", "qrlist.progress", "qrlist.cli") + _OPTIONAL
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def _import_times(code: str) -> dict:
+    """在新解释器中执行 code，返回 {顶层导入模块: 累计耗时(us)}"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        m = _LINE.match(line)
+        if m and len(m.group(3)) == 1:
+            times[m.group(4)] = times.get(m.group(4), 0) + int(m.group(2))
+    return times
+
+def _loaded_modules(code: str) -> set:
+    """在新解释器中执行 code，返回 sys.modules 中的全部模块名"""
+    check = subprocess.run([sys.executable, "-c", code + "; import sys; print(' '.join(sys.modules))"],
+                           capture_output=True, text=True, check=True)
+    return set(check.stdout.split())
+
+def measure(mode: str = "qr") -> dict:
+    """返回 {'total_ms', 'modules': {模块: ms}, 'forbidden': [意外加载的模块]}"""
+    baseline = _import_times("pass")
+    times = _import_times(_SNIPPETS[mode])
+    modules = {name: us / 1000.0 for name, us in times.items() if name not in baseline}
+    loaded = _loaded_modules(_SNIPPETS[mode])
+    forbidden = [name for name in _FORBIDDEN[mode] if name in loaded]
+    loaded = _loaded_modules(_RENDER_SNIPPET)
+    forbidden += [f"{name} ({_RENDER_SNIPPET})" for name in _RENDER_FORBIDDEN if name in loaded]
+    return {"total_ms": sum(modules.values()), "modules": modules, "forbidden": forbidden}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m qrlist.startup", description="检查无界面导出的冷启动导入耗时")
+    parser.add_argument("--mode", choices=list(_SNIPPETS), default="qr")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="测量次数，取最小值")
+    args = parser.parse_args(argv)
+
+    results = [measure(args.mode) for _ in range(max(1, args.runs))]
+    best = min(results, key=lambda r: r["total_ms"])
+    for name, ms in sorted(best["modules"].items(), key=lambda kv: -kv[1])[:10]:
+        print(f"{ms:8.1f} ms  {name}")
+    print(f"total {best['total_ms']:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if best["forbidden"]:
+        print(f"unexpected imports: {', '.join(best['forbidden'])}")
+        return 1
+    return 0 if best["total_ms"] <= args.budget_ms else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,445 @@
+# -*- coding: utf-8 -*-
+"""
+CSV / XLSX 表格输入：流式逐行读取，只取选定的数据列和标签列。
+CSV 自动检测编码和分隔符并正确处理引号；XLSX 直接迭代 zip 中的工作表 XML，不加载整个工作簿
+"""
+
+import io
+import os
+import csv
+import mmap
+import threading
+import codecs
+import zipfile
+import tempfile
+import posixpath
+from array import array
+from xml.parsers import expat
+from xml.etree.ElementTree import iterparse
+
+# 检测编码 / 分隔符时读取的字节数
+_SAMPLE_BYTES = 64 * 1024
+_CSV_DELIMITERS = ",;\t|"
+_DELIMITER_NAMES = {",": ",", ";": ";", "\t": "制表符", "|": "|"}
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+def detect_encoding(sample: bytes) -> str:
+    """BOM 优先；否则能按 UTF-8 解码就用 UTF-8，不能则按 GB18030（兼容 GBK）"""
+    if sample.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if sample.startswith(codecs.BOM_UTF16_LE) or sample.startswith(codecs.BOM_UTF16_BE):
+        return "utf-16"
+    try:
+        # 样本末尾可能截断了多字节字符，用增量解码器且 final=False
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "gb18030"
+
+_column_cache = {}
+
+def _column_index(ref: str) -> int:
+    """'A1' -> 0，'AB12' -> 27"""
+    letters = ref.rstrip("0123456789")
+    n = _column_cache.get(letters)
+    if n is None:
+        n = 0
+        for c in letters.upper():
+            n = n * 26 + ord(c) - 64
+        n = _column_cache[letters] = n - 1
+    return n
+
+_local_cache = {}
+
+def _local(tag: str) -> str:
+    """去掉命名空间：ElementTree 的 '{uri}tag' 或 expat 的 'x:tag'"""
+    name = _local_cache.get(tag)
+    if name is None:
+        name = _local_cache[tag] = tag[max(tag.rfind("}"), tag.rfind(":")) + 1:]
+    return name
+
+def _expat_feed(stream, start, end, text, chunk_size=64 * 1024):
+    """逐块把 stream 喂给 expat，每块解析后 yield 一次，调用方借此分批处理结果"""
+    parser = expat.ParserCreate()
+    parser.buffer_text = True
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = text
+    while True:
+        data = stream.read(chunk_size)
+        parser.Parse(data, not data)
+        yield
+        if not data:
+            return
+
+class _CountingReader(io.RawIOBase):
+    """包装只读流并统计已读取字节数，用于显示进度"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        data = self._raw.read(len(b))
+        n = len(data)
+        b[:n] = data
+        self.count += n
+        return n
+
+    def close(self):
+        self._raw.close()
+        super().close()
+
+class _SpillStore:
+    """
+    追加写入临时文件的字符串表，内存中只保留偏移。
+    add() 先放入待写缓冲，flush() 写盘并重新映射后新条目才可读，读写可在不同线程进行。
+    任何时候只保留一个映射（每个映射都占用一个文件描述符），换映射与读取用锁互斥
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile()
+        self._size = 0
+        self._pending = bytearray()
+        self._pending_offsets = []
+        self._starts = array("Q")
+        self._ends = array("Q")
+        self._buf = b""
+        self._lock = threading.Lock()
+
+    def add(self, text: str):
+        data = text.encode("utf-8", "surrogatepass")
+        start = self._size + len(self._pending)
+        self._pending += data
+        self._pending_offsets.append((start, start + len(data)))
+
+    def flush(self):
+        if not self._pending_offsets:
+            return
+        self._file.seek(self._size)
+        self._file.write(self._pending)
+        self._file.flush()
+        self._size += len(self._pending)
+        if self._size:
+            mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            with self._lock:
+                old, self._buf = self._buf, mm
+            if isinstance(old, mmap.mmap):
+                old.close()
+        offsets, self._pending_offsets = self._pending_offsets, []
+        self._pending = bytearray()
+        self._starts.extend(s for s, _ in offsets)
+        self._ends.extend(e for _, e in offsets)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def __getitem__(self, i: int) -> str:
+        with self._lock:
+            data = self._buf[self._starts[i]:self._ends[i]]
+        return data.decode("utf-8", "replace")
+
+    def close(self):
+        with self._lock:
+            old, self._buf = self._buf, b""
+        if isinstance(old, mmap.mmap):
+            old.close()
+        self._file.close()
+
+class _LabelView:
+    """TableDataset 标签列的只读序列视图"""
+
+    def __init__(self, dataset):
+        self._dataset = dataset
+
+    def __len__(self):
+        return len(self._dataset)
+
+    def __getitem__(self, index):
+        store = self._dataset._labels
+        if isinstance(index, slice):
+            return [store[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataset index out of range")
+        return store[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._dataset._labels[i]
+
+class TableDataset:
+    """
+    CSV / XLSX 中选定列的数据集，接口与 InputDataset 相同（len / 下标 / 切片 / 迭代 / index_chunk）。
+    源文件只顺序读一遍，数据列和标签列的值写入临时文件并 mmap，内存中只有偏移索引。
+    data_column / label_column 为从 0 开始的列号或表头名；数据列为空的行跳过。
+    有标签列时 labels 为与数据平行的序列，否则为 None
+    """
+
+    def __init__(self, path: str, data_column=0, label_column=None, header: bool = True,
+                 sheet=None, encoding: str = None, lazy: bool = False):
+        self.path = path
+        self.header = header
+        self.columns = []
+        self._data = _SpillStore()
+        self._labels = _SpillStore() if label_column is not None else None
+        self._complete = False
+        try:
+            if path.lower().endswith((".xlsx", ".xlsm")):
+                self.format = "xlsx"
+                self._rows = self._xlsx_rows(sheet)
+            else:
+                self.format = "csv"
+                self._rows = self._csv_rows(encoding)
+            first = next(self._rows, None)
+            if first is not None:
+                self.columns = first if header else [f"第{i + 1}列" for i in range(len(first))]
+            self._data_index = self._resolve_column(data_column)
+            self._label_index = self._resolve_column(label_column) if label_column is not None else None
+            if first is not None and not header:
+                self._add_row(first)
+        except Exception:
+            self.close()
+            raise
+        if not lazy:
+            while not self.index_chunk():
+                pass
+
+    def _resolve_column(self, column) -> int:
+        if isinstance(column, int):
+            return column
+        if column in self.columns:
+            return self.columns.index(column)
+        raise ValueError(f"找不到列：{column}")
+
+    # ---- CSV ----
+    def _csv_rows(self, encoding):
+        raw = open(self.path, "rb")
+        self._source = raw
+        self.size_bytes = os.fstat(raw.fileno()).st_size
+        sample = raw.read(_SAMPLE_BYTES)
+        raw.seek(0)
+        self.encoding = encoding or detect_encoding(sample)
+        text_sample = sample.decode(self.encoding, "ignore")
+        try:
+            dialect = csv.Sniffer().sniff(text_sample, delimiters=_CSV_DELIMITERS)
+        except csv.Error:
+            dialect = csv.excel
+        self.delimiter = dialect.delimiter
+        self._position = raw.tell
+        return self._iter_csv(raw, dialect)
+
+    def _iter_csv(self, raw, dialect):
+        text = io.TextIOWrapper(raw, encoding=self.encoding, errors="replace", newline="")
+        yield from csv.reader(text, dialect)
+
+    # ---- XLSX ----
+    def _xlsx_rows(self, sheet):
+        zf = zipfile.ZipFile(self.path)
+        self._source = zf
+        sheet_path, self.sheet_name = self._xlsx_sheet_path(zf, sheet)
+        self.encoding = None
+        self.delimiter = None
+        self._shared = self._xlsx_shared_strings(zf)
+        stream = _CountingReader(zf.open(sheet_path))
+        self.size_bytes = zf.getinfo(sheet_path).file_size
+        self._position = lambda: stream.count
+        return self._iter_xlsx(stream)
+
+    @staticmethod
+    def _xlsx_sheet_path(zf, sheet):
+        """按名称或序号（从 0 开始）找到工作表在 zip 中的路径，默认第一个"""
+        sheets = []
+        for _, elem in iterparse(zf.open("xl/workbook.xml")):
+            if _local(elem.tag) == "sheet":
+                sheets.append((elem.get("name"), elem.get(f"{{{_REL_NS}}}id")))
+        targets = {}
+        for _, elem in iterparse(zf.open("xl/_rels/workbook.xml.rels")):
+            if _local(elem.tag) == "Relationship":
+                targets[elem.get("Id")] = elem.get("Target")
+        if not sheets:
+            raise ValueError("工作簿中没有工作表")
+        if sheet is None:
+            name, rid = sheets[0]
+        elif isinstance(sheet, int):
+            name, rid = sheets[sheet]
+        else:
+            matches = [s for s in sheets if s[0] == sheet]
+            if not matches:
+                raise ValueError(f"找不到工作表：{sheet}")
+            name, rid = matches[0]
+        target = targets[rid]
+        path = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        return path, name
+
+    @staticmethod
+    def _xlsx_shared_strings(zf):
+        """共享字符串表同样写入临时文件，按序号随机读取"""
+        store = _SpillStore()
+        if "xl/sharedStrings.xml" not in zf.namelist():
+            return store
+        state = {"parts": [], "in_t": False, "phonetic": 0}
+
+        def start(name, attrs):
+            tag = _local(name)
+            if tag == "t":
+                state["in_t"] = not state["phonetic"]
+            elif tag == "rPh":
+                state["phonetic"] += 1
+
+        def end(name):
+            tag = _local(name)
+            if tag == "t":
+                state["in_t"] = False
+            elif tag == "rPh":
+                state["phonetic"] -= 1
+            elif tag == "si":
+                store.add("".join(state["parts"]))
+                state["parts"] = []
+
+        def text(data):
+            if state["in_t"]:
+                state["parts"].append(data)
+
+        with zf.open("xl/sharedStrings.xml") as f:
+            for _ in _expat_feed(f, start, end, text):
+                if len(store._pending_offsets) >= 65536:
+                    store.flush()
+        store.flush()
+        return store
+
+    def _iter_xlsx(self, stream):
+        """用 expat 逐块解析工作表 XML，每解析完一块就产出其中完整的行"""
+        shared = self._shared
+        rows = []
+        state = {"row": None, "col": 0, "kind": None, "in_value": False, "value": []}
+
+        def start(name, attrs):
+            tag = _local(name)
+            if tag == "c":
+                ref = attrs.get("r")
+                state["col"] = _column_index(ref) if ref else len(state["row"])
+                state["kind"] = attrs.get("t")
+                state["value"] = []
+            elif tag == "v" or (tag == "t" and state["kind"] == "inlineStr"):
+                state["in_value"] = True
+            elif tag == "row":
+                state["row"] = []
+
+        def end(name):
+            tag = _local(name)
+            if tag == "v" or tag == "t":
+                state["in_value"] = False
+            elif tag == "c":
+                value = "".join(state["value"])
+                if state["kind"] == "s" and value:
+                    value = shared[int(value)]
+                row, col = state["row"], state["col"]
+                if col >= len(row):
+                    row.extend([""] * (col - len(row) + 1))
+                row[col] = value
+            elif tag == "row":
+                rows.append(state["row"])
+
+        def text(data):
+            if state["in_value"]:
+                state["value"].append(data)
+
+        for _ in _expat_feed(stream, start, end, text):
+            if rows:
+                yield from rows
+                rows.clear()
+
+    # ---- 索引 ----
+    def _add_row(self, row):
+        i = self._data_index
+        value = row[i].strip() if i < len(row) else ""
+        if not value:
+            return
+        self._data.add(value)
+        if self._labels is not None:
+            j = self._label_index
+            self._labels.add(row[j].strip() if j < len(row) else "")
+
+    @property
+    def indexed_bytes(self) -> int:
+        return self.size_bytes if self._complete else self._position()
+
+    @property
+    def complete(self) -> bool:
+        return self._complete
+
+    def detected_separator(self) -> str:
+        if self.format == "xlsx":
+            return f"XLSX 工作表 {self.sheet_name}"
+        return f"CSV {_DELIMITER_NAMES.get(self.delimiter, self.delimiter)}（{self.encoding}）"
+
+    def index_chunk(self, max_bytes: int = 16 * 1024 * 1024) -> bool:
+        """再读取大约 max_bytes 字节的源数据，返回是否已读完"""
+        if self._complete:
+            return True
+        stop = self._position() + max_bytes
+        for row in self._rows:
+            self._add_row(row)
+            if self._position() >= stop:
+                break
+        else:
+            self._complete = True
+        # 先写标签再写数据：len() 以数据列为准，可见的行一定已有标签
+        if self._labels is not None:
+            self._labels.flush()
+        self._data.flush()
+        if self._complete:
+            self._close_source()
+        return self._complete
+
+    def _close_source(self):
+        source, self._source = getattr(self, "_source", None), None
+        if source is not None:
+            source.close()
+
+    # ---- 访问 ----
+    @property
+    def labels(self):
+        return _LabelView(self) if self._labels is not None else None
+
+    def __len__(self):
+        return len(self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._data[i] for i in range(*index.indices(len(self._data)))]
+        n = len(self._data)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("dataset index out of range")
+        return self._data[index]
+
+    def __iter__(self):
+        for i in range(len(self._data)):
+            yield self._data[i]
+
+    def __bool__(self):
+        return len(self._data) > 0
+
+    def close(self):
+        self._rows = iter(())
+        self._close_source()
+        self._data.close()
+        if self._labels is not None:
+            self._labels.close()
+        shared = getattr(self, "_shared", None)
+        if shared is not None:
+            shared.close()
+            self._shared = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
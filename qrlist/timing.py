@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+分阶段计时：渲染与导出路径上用 stage(name) 包住各阶段，计入当前线程激活的 StageTimings。
+没有激活时 stage() 返回空上下文，开销可以忽略，因此导出时默认常开
+"""
+
+import threading
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+# 流水线各阶段：QR / 条码编码、栅格化、文字、拼版粘贴、缩放重采样、页面图像压缩、写文件
+STAGES = ("encode", "rasterize", "text", "compose", "resample", "encode-image", "write")
+
+# 直方图每个 2 的幂区间再分成 4 个子区间，分位数误差约 ±12%
+_SUB_BITS = 2
+
+def _bucket(ns: int) -> int:
+    bits = ns.bit_length()
+    if bits <= _SUB_BITS + 1:
+        return ns
+    return (bits - _SUB_BITS) << _SUB_BITS | (ns >> (bits - _SUB_BITS - 1)) & ((1 << _SUB_BITS) - 1)
+
+def _bucket_value(bucket: int) -> float:
+    """区间中点（纳秒）"""
+    if bucket < 1 << (_SUB_BITS + 1):
+        return float(bucket)
+    shift = (bucket >> _SUB_BITS) - 1
+    low = ((1 << _SUB_BITS) | bucket & ((1 << _SUB_BITS) - 1)) << shift
+    return low + (1 << shift) / 2
+
+class StageTimings:
+    """
+    线程安全的各阶段耗时汇总：每个阶段记录次数、总耗时、最大值、最小值和对数直方图。
+    summary() 给出可直接写成 JSON 的统计（毫秒，分位数由直方图估算并限制在实测最小 / 最大值之间）；
+    raw() / merge() 用于把渲染进程中的计时并入任务。
+    profiler 不为 None 时（如 MemoryProfiler）每个阶段进出都会调用它的 enter(name) / exit(name)
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+        self.profiler = None
+
+    def add(self, stage: str, ns: int):
+        bucket = _bucket(ns)
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                entry = self._stages[stage] = [0, 0, 0, {}, ns]
+            entry[0] += 1
+            entry[1] += ns
+            if ns > entry[2]:
+                entry[2] = ns
+            if ns < entry[4]:
+                entry[4] = ns
+            histogram = entry[3]
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+
+    def raw(self) -> dict:
+        with self._lock:
+            return {name: (count, total, peak, dict(histogram), low)
+                    for name, (count, total, peak, histogram, low) in self._stages.items()}
+
+    def merge(self, raw: dict):
+        with self._lock:
+            for name, (count, total, peak, histogram, low) in raw.items():
+                entry = self._stages.get(name)
+                if entry is None:
+                    entry = self._stages[name] = [0, 0, 0, {}, low]
+                entry[0] += count
+                entry[1] += total
+                entry[2] = max(entry[2], peak)
+                entry[4] = min(entry[4], low)
+                for bucket, n in histogram.items():
+                    entry[3][bucket] = entry[3].get(bucket, 0) + n
+
+    def percentile(self, stage: str, q: float) -> float:
+        """stage 耗时的 q 分位数（毫秒），没有记录时为 0"""
+        with self._lock:
+            entry = self._stages.get(stage)
+            if entry is None:
+                return 0.0
+            return _histogram_percentile(entry[0], entry[3], q, entry[4], entry[2]) / 1e6
+
+    def summary(self) -> dict:
+        stats = {}
+        for name, (count, total, peak, histogram, low) in sorted(self.raw().items(),
+                                                            key=lambda kv: _stage_order(kv[0])):
+            stats[name] = {
+                "count": count,
+                "total_ms": total / 1e6,
+                "mean_ms": total / count / 1e6,
+                "p50_ms": _histogram_percentile(count, histogram, 0.50, low, peak) / 1e6,
+                "p90_ms": _histogram_percentile(count, histogram, 0.90, low, peak) / 1e6,
+                "p99_ms": _histogram_percentile(count, histogram, 0.99, low, peak) / 1e6,
+                "max_ms": peak / 1e6,
+            }
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._stages.clear()
+
+def _stage_order(name):
+    return (STAGES.index(name), name) if name in STAGES else (len(STAGES), name)
+
+def _histogram_percentile(count: int, histogram: dict, q: float, low: int, high: int) -> float:
+    """区间中点可能超出实际记录的范围（如只有一个样本时），因此限制在 [low, high] 内"""
+    rank = q * count
+    seen = 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= rank:
+            return float(min(max(_bucket_value(bucket), low), high))
+    return 0.0
+
+class _Stage:
+    __slots__ = ("timings", "name", "start")
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        if self.timings.profiler is not None:
+            self.timings.profiler.enter(self.name)
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.timings.add(self.name, perf_counter_ns() - self.start)
+        if self.timings.profiler is not None:
+            self.timings.profiler.exit(self.name)
+
+_local = threading.local()
+_NULL_STAGE = nullcontext()
+
+def activate(timings: StageTimings = None):
+    """让当前线程之后的 stage() 计入 timings，None 表示停止计时；返回之前激活的对象"""
+    previous = getattr(_local, "timings", None)
+    _local.timings = timings
+    return previous
+
+def active() -> StageTimings:
+    return getattr(_local, "timings", None)
+
+def stage(name: str):
+    """计时上下文：with stage("encode"): ...；当前线程没有激活的 StageTimings 时不计时"""
+    timings = getattr(_local, "timings", None)
+    if timings is None:
+        return _NULL_STAGE
+    return _Stage(timings, name)
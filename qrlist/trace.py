@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+时间线追踪：按条目 / 页面 / 写入记录区间事件，导出为 Chrome Trace Event JSON，
+可在 Perfetto（ui.perfetto.dev）或 chrome://tracing 中打开，查看各线程 / 渲染进程何时空闲。
+与 timing.stage() 一样按线程激活，未激活时 span() 为空上下文
+"""
+
+import os
+import json
+import threading
+from contextlib import nullcontext
+from time import perf_counter_ns
+
+class TraceRecorder:
+    """
+    线程安全的事件记录器。事件以元组保存（可跨进程传递）：
+    (name, cat, 开始 ns, 时长 ns, pid, tid, args)；write() 时转换为 Trace Event 的 "X" 事件，
+    并为每个进程 / 线程写入名称元数据
+    """
+
+    def __init__(self, process_name: str = "qrlist"):
+        self._events = []
+        self._lock = threading.Lock()
+        self._process_names = {os.getpid(): process_name}
+        self._thread_names = {}
+
+    def add(self, name: str, cat: str, start_ns: int, dur_ns: int, args: dict = None):
+        tid = threading.get_native_id()
+        event = (name, cat, start_ns, dur_ns, os.getpid(), tid, args)
+        with self._lock:
+            if tid not in self._thread_names:
+                self._thread_names[tid] = threading.current_thread().name
+            self._events.append(event)
+
+    def raw(self) -> list:
+        with self._lock:
+            return list(self._events)
+
+    def merge(self, events: list, process_name: str = None):
+        """并入其它进程记录的事件（raw() 的结果）"""
+        with self._lock:
+            self._events.extend(events)
+            if process_name:
+                for event in events:
+                    self._process_names.setdefault(event[4], f"{process_name} {event[4]}")
+
+    def __len__(self):
+        return len(self._events)
+
+    def trace_events(self) -> list:
+        with self._lock:
+            events = list(self._events)
+            process_names = dict(self._process_names)
+            thread_names = dict(self._thread_names)
+        result = [{"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": name}}
+                  for pid, name in process_names.items()]
+        main_pid = os.getpid()
+        result += [{"name": "thread_name", "ph": "M", "pid": main_pid, "tid": tid, "args": {"name": name}}
+                   for tid, name in thread_names.items()]
+        for name, cat, start_ns, dur_ns, pid, tid, args in events:
+            event = {"name": name, "cat": cat, "ph": "X", "ts": start_ns / 1000, "dur": dur_ns / 1000,
+                     "pid": pid, "tid": tid}
+            if args:
+                event["args"] = args
+            result.append(event)
+        return result
+
+    def write(self, path: str) -> str:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return path
+
+class _Span:
+    __slots__ = ("recorder", "name", "cat", "args", "start")
+
+    def __init__(self, recorder, name, cat, args):
+        self.recorder = recorder
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.recorder.add(self.name, self.cat, self.start, perf_counter_ns() - self.start, self.args)
+
+_local = threading.local()
+_NULL_SPAN = nullcontext()
+
+def activate(recorder: TraceRecorder = None):
+    """让当前线程之后的 span() 记入 recorder，None 表示停止记录；返回之前激活的对象"""
+    previous = getattr(_local, "recorder", None)
+    _local.recorder = recorder
+    return previous
+
+def span(name: str, cat: str = "export", **args):
+    """区间事件：with span("page", page=3): ...；当前线程没有激活的 TraceRecorder 时不记录"""
+    recorder = getattr(_local, "recorder", None)
+    if recorder is None:
+        return _NULL_SPAN
+    return _Span(recorder, name, cat, args or None)
@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+"""测试从仓库根目录导入 qrlist；子进程（启动耗时检查、命令行）也在根目录下运行"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+@pytest.fixture(autouse=True)
+def _repo_root(monkeypatch):
+    monkeypatch.chdir(ROOT)
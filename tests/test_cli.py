@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""命令行冒烟测试：python -m qrlist 能从文本文件导出 PDF"""
+
+import json
+
+import pytest
+
+from qrlist.cli import main
+
+def _events(capsys):
+    return [json.loads(line) for line in capsys.readouterr().err.splitlines() if line.startswith("{")]
+
+@pytest.mark.parametrize("argv", [
+    ["--mode", "barcode", "--auto-size"],
+    ["--mode", "barcode", "--auto-size", "--pdf-mode", "vector"],
+    ["--mode", "qr"],
+])
+def test_export_pdf(tmp_path, capsys, argv):
+    src = tmp_path / "items.txt"
+    src.write_text("\n".join(f"A{i:04d}" for i in range(25)), encoding="utf-8")
+    out = tmp_path / "out.pdf"
+    assert main([str(src), "-o", str(out), "--workers", "1"] + argv) == 0
+    events = _events(capsys)
+    assert events[-1]["event"] == "done"
+    assert not [e for e in events if e["event"] == "error"]
+    assert out.read_bytes().startswith(b"%PDF")
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""冷启动检查：无界面导出的导入耗时在预算内，且不加载多余的模块"""
+
+import pytest
+
+from qrlist.startup import DEFAULT_BUDGET_MS, measure
+
+RUNS = 3  # 与 python -m qrlist.startup 相同，取多次测量的最小值
+
+@pytest.mark.parametrize("mode", ["qr", "barcode"])
+def test_import_budget(mode):
+    best = min((measure(mode) for _ in range(RUNS)), key=lambda r: r["total_ms"])
+    assert best["total_ms"] <= DEFAULT_BUDGET_MS, best["modules"]
+
+@pytest.mark.parametrize("mode", ["qr", "barcode"])
+def test_no_forbidden_imports(mode):
+    assert measure(mode)["forbidden"] == []